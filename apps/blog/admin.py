@@ -1,6 +1,25 @@
 from django.contrib import admin
+from django.db import transaction
 
+from .cache import comments_changed
+from .counters import recount_comments, recount_users
 from .models import Comment, Post
 
 admin.site.register(Post)
-admin.site.register(Comment)
+
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    """keeps the counters of posts and users, which the admin's deletes skip"""
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, Comment.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            comments = list(queryset.values_list("post_id", "author_id"))
+            super().delete_queryset(request, queryset)
+            post_ids = {post_id for post_id, _ in comments}
+            recount_comments(post_ids)
+            recount_users({author_id for _, author_id in comments})
+            comments_changed(*post_ids)
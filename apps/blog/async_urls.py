@@ -0,0 +1,33 @@
+from django.urls import path
+
+from . import urls
+from .async_views import (
+    AsyncCommentDetailView,
+    AsyncCommentListView,
+    AsyncPostDetailView,
+    AsyncPostListView,
+)
+
+app_name = "blog"
+
+ASYNC_VIEWS = {
+    "post-list": AsyncPostListView,
+    "post-detail": AsyncPostDetailView,
+    "comment-list": AsyncCommentListView,
+    "comment-detail": AsyncCommentDetailView,
+}
+
+# blog.urls with the cached reads swapped for their async fronts
+urlpatterns = [
+    path(
+        str(pattern.pattern),
+        (
+            ASYNC_VIEWS[pattern.name].as_view()
+            if pattern.name in ASYNC_VIEWS
+            else pattern.callback
+        ),
+        pattern.default_args,
+        name=pattern.name,
+    )
+    for pattern in urls.urlpatterns
+]
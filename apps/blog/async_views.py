@@ -0,0 +1,192 @@
+import asyncio
+
+from core.executors import arun_in_executor
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpResponse
+from django.utils.decorators import classonlymethod
+from django.utils.http import parse_etags, urlencode
+from django.views import View
+from rest_framework.renderers import JSONRenderer
+
+from .cache import (
+    aget_cached_detail,
+    aget_cached_list,
+    get_version_token,
+    make_etag,
+)
+from .views import CommentDetailView, CommentListView, PostDetailView, PostListView
+
+
+def _run_with_connections(fn, *args, **kwargs):
+    # what request_started and request_finished do for a sync request
+    close_old_connections()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_db(fn, *args, **kwargs):
+    """
+    run the blocking ``fn`` on the ``ASYNC_DB_WORKERS`` threads
+
+    Database connections live on those threads, so at most that many are
+    opened by a process however many requests are in flight.
+    """
+    return await arun_in_executor(
+        "async-db",
+        settings.ASYNC_DB_WORKERS,
+        _run_with_connections,
+        fn,
+        *args,
+        **kwargs,
+    )
+
+
+def render_sync_view(view, request, *args, **kwargs):
+    response = view(request, *args, **kwargs)
+    if hasattr(response, "render"):
+        response.render()
+
+    return response
+
+
+class AsyncCachedReadView(View):
+    """
+    async front of a cached DRF view, for the ASGI entry point
+
+    Cache hits of plain JSON reads are answered on the event loop with the
+    bytes the DRF view would send. Anything else, including misses, writes,
+    credentials and other formats, runs the DRF view on the database pool.
+    """
+
+    sync_view_class = None
+    sync_view = None
+    allow = ""
+    renderer = JSONRenderer()
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        sync_view = cls.sync_view_class.as_view()
+        # setup() adds HEAD, as for the real view
+        sync_instance = cls.sync_view_class()
+        sync_instance.setup(None)
+        allow = ", ".join(sync_instance.allowed_methods)
+        view = super().as_view(sync_view=sync_view, allow=allow, **initkwargs)
+        # every handler is a coroutine, but Django 4.0's View cannot tell the
+        # handler so, 4.1 marks async views the same way
+        view._is_coroutine = asyncio.coroutines._is_coroutine
+
+        return view
+
+    async def get(self, request, *args, **kwargs):
+        response = None
+        if self.can_serve(request):
+            response = await self.get_cached_response(request, *args, **kwargs)
+        if response is None:
+            response = await self.fallback(request, *args, **kwargs)
+
+        return response
+
+    async def fallback(self, request, *args, **kwargs):
+        return await run_db(render_sync_view, self.sync_view, request, *args, **kwargs)
+
+    post = put = patch = delete = options = http_method_not_allowed = fallback
+
+    def can_serve(self, request):
+        """what the cache holds: JSON for requests without credentials"""
+        # DRF rejects bad tokens even on public reads, leave them to it
+        if "HTTP_AUTHORIZATION" in request.META:
+            return False
+        if request.GET.get("format", "json") != "json":
+            return False
+
+        accept = request.headers.get("Accept", "")
+        if "text/html" in accept:
+            return False
+        return not accept or any(
+            media_type in accept
+            for media_type in ("application/json", "application/*", "*/*")
+        )
+
+    def get_cache_variant(self, request):
+        """the key ``CacheVariantMixin`` builds for the same request"""
+        query = urlencode(sorted(request.GET.lists()), doseq=True)
+        return f"{request.get_host()}|json?{query}"
+
+    async def get_cached_response(self, request, *args, **kwargs):
+        """the response from cache, None to fall back to the DRF view"""
+        return None
+
+    def render(self, data, **headers):
+        response = HttpResponse(
+            self.renderer.render(data), content_type=self.renderer.media_type
+        )
+        return self.finalize(response, **headers)
+
+    def finalize(self, response, **headers):
+        # the headers DRF's finalize_response adds
+        response["Vary"] = "Accept"
+        response["Allow"] = self.allow
+        for header, value in headers.items():
+            response[header] = value
+
+        return response
+
+
+class AsyncCachedListView(AsyncCachedReadView):
+    def get_cache_collection(self, **kwargs):
+        return self.sync_view_class.cache_collection
+
+    async def get_cached_response(self, request, *args, **kwargs):
+        data = await aget_cached_list(
+            self.get_cache_collection(**kwargs), self.get_cache_variant(request)
+        )
+        if data is None:
+            return None
+
+        return self.render(data)
+
+
+class AsyncCachedDetailView(AsyncCachedReadView):
+    """checks the row version on the database pool, the data comes from cache"""
+
+    async def get_cached_response(self, request, *args, **kwargs):
+        model = self.sync_view_class.queryset.model
+        pk = kwargs[self.sync_view_class.lookup_url_kwarg]
+        token = await run_db(get_version_token, model, pk)
+        if token is None:
+            # the DRF view sends the 404
+            return None
+
+        variant = self.get_cache_variant(request)
+        etag = make_etag(token, variant)
+        if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+        if etag in if_none_match or "*" in if_none_match:
+            return self.finalize(HttpResponse(status=304), ETag=etag)
+
+        data = await aget_cached_detail(model, pk, token, variant)
+        if data is None:
+            return None
+
+        return self.render(data, ETag=etag)
+
+
+class AsyncPostListView(AsyncCachedListView):
+    sync_view_class = PostListView
+
+
+class AsyncPostDetailView(AsyncCachedDetailView):
+    sync_view_class = PostDetailView
+
+
+class AsyncCommentListView(AsyncCachedListView):
+    sync_view_class = CommentListView
+
+    def get_cache_collection(self, **kwargs):
+        return f"comments:{kwargs.get('post_pk')}"
+
+
+class AsyncCommentDetailView(AsyncCachedDetailView):
+    sync_view_class = CommentDetailView
@@ -0,0 +1,200 @@
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import exceptions, generics, permissions, status
+from rest_framework.response import Response
+
+from .permissions import IsAuthorOrReadOnly
+
+
+class BulkWriteView(generics.GenericAPIView):
+    """
+    create, patch or delete many objects in one request and one transaction
+
+    POST takes a list of objects and inserts them with ``bulk_create``,
+    PATCH takes a list of partial objects with their ``id`` and writes
+    them with ``bulk_update`` (one UPDATE per batch), DELETE takes a list
+    of ids and deletes them with a single set-based DELETE. Every item is
+    validated and ownership-checked first, and may name an object only
+    once; if any item fails nothing is written and the per-item results
+    say why.
+    """
+
+    permission_classes = (permissions.IsAuthenticated,)
+    object_permission = IsAuthorOrReadOnly()
+    batch_size = 500
+
+    def get_items(self):
+        items = self.request.data
+        if not isinstance(items, list):
+            raise exceptions.ValidationError({"non_field_errors": ["Expected a list."]})
+        if len(items) > settings.BLOG_BULK_MAX_ITEMS:
+            raise exceptions.ValidationError(
+                {
+                    "non_field_errors": [
+                        f"At most {settings.BLOG_BULK_MAX_ITEMS} items per request."
+                    ]
+                }
+            )
+
+        return items
+
+    def get_targets(self, items):
+        """existing objects named by ``items``, fetched in one query"""
+        ids = set()
+        for item in items:
+            try:
+                ids.add(uuid.UUID(str(item["id"] if isinstance(item, dict) else item)))
+            except (KeyError, ValueError):
+                pass
+
+        return self.get_queryset().in_bulk(ids)
+
+    def get_target(self, item, targets, seen):
+        """the object an item names, or the error result for it"""
+        try:
+            pk = uuid.UUID(str(item["id"] if isinstance(item, dict) else item))
+        except (KeyError, TypeError, ValueError):
+            return None, {"status": 400, "errors": {"id": ["A valid id is required."]}}
+
+        # each object is written once, whatever the order of its items
+        if pk in seen:
+            return None, {
+                "status": 400,
+                "id": str(pk),
+                "errors": {"id": ["This id is repeated in the request."]},
+            }
+        seen.add(pk)
+
+        obj = targets.get(pk)
+        if obj is None:
+            return None, {"status": 404, "id": str(pk)}
+        if not self.object_permission.has_object_permission(self.request, self, obj):
+            return None, {"status": 403, "id": str(pk)}
+
+        return obj, None
+
+    def succeeded(self, results, item_status):
+        return all(result["status"] == item_status for result in results)
+
+    def respond(self, results, item_status, response_status=None):
+        if not self.succeeded(results, item_status):
+            # nothing was written, say so for the items that were fine
+            for result in results:
+                if result["status"] == item_status:
+                    result["status"] = status.HTTP_424_FAILED_DEPENDENCY
+            return Response(results, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(results, status=response_status or item_status)
+
+    def post(self, request, *args, **kwargs):
+        items = self.get_items()
+        results, pending = [], []
+        for item in items:
+            serializer = self.get_serializer(data=item)
+            if serializer.is_valid():
+                obj = self.build_instance(serializer.validated_data)
+                result = {"status": 201, "id": str(obj.pk)}
+                pending.append((obj, result))
+            else:
+                result = {"status": 400, "errors": serializer.errors}
+            results.append(result)
+
+        self.check_create(pending)
+        objects = [obj for obj, _ in pending]
+        if self.succeeded(results, status.HTTP_201_CREATED):
+            with transaction.atomic():
+                self.get_queryset().model.objects.bulk_create(
+                    objects, batch_size=self.batch_size
+                )
+                self.after_create(objects)
+
+        return self.respond(results, status.HTTP_201_CREATED)
+
+    def patch(self, request, *args, **kwargs):
+        items = self.get_items()
+        targets = self.get_targets(items)
+        results, objects, fields, seen = [], [], set(), set()
+        for item in items:
+            if not isinstance(item, dict):
+                results.append(
+                    {
+                        "status": 400,
+                        "errors": {"non_field_errors": ["Expected an object."]},
+                    }
+                )
+                continue
+
+            obj, error = self.get_target(item, targets, seen)
+            if error is not None:
+                results.append(error)
+                continue
+
+            data = {key: value for key, value in item.items() if key != "id"}
+            serializer = self.get_serializer(obj, data=data, partial=True)
+            if not serializer.is_valid():
+                results.append(
+                    {"status": 400, "id": str(obj.pk), "errors": serializer.errors}
+                )
+                continue
+
+            for name, value in serializer.validated_data.items():
+                setattr(obj, name, value)
+                fields.add(name)
+            objects.append(obj)
+            results.append({"status": 200, "id": str(obj.pk)})
+
+        if objects and self.succeeded(results, status.HTTP_200_OK):
+            now = timezone.now()
+            for obj in objects:
+                obj.updated = now
+                obj.version = F("version") + 1
+            with transaction.atomic():
+                self.get_queryset().model.objects.bulk_update(
+                    objects,
+                    sorted(fields | {"updated", "version"}),
+                    batch_size=self.batch_size,
+                )
+                self.after_update(objects, fields)
+
+        return self.respond(results, status.HTTP_200_OK)
+
+    def delete(self, request, *args, **kwargs):
+        items = self.get_items()
+        targets = self.get_targets(items)
+        results, objects, seen = [], [], set()
+        for item in items:
+            obj, error = self.get_target(item, targets, seen)
+            if error is not None:
+                results.append(error)
+                continue
+
+            objects.append(obj)
+            results.append({"status": 204, "id": str(obj.pk)})
+
+        if objects and self.succeeded(results, status.HTTP_204_NO_CONTENT):
+            with transaction.atomic():
+                self.get_queryset().model.objects.filter(
+                    pk__in=[obj.pk for obj in objects]
+                ).delete()
+                self.after_delete(objects)
+
+        return self.respond(results, status.HTTP_204_NO_CONTENT, status.HTTP_200_OK)
+
+    def build_instance(self, validated_data):
+        return self.get_queryset().model(author=self.request.user, **validated_data)
+
+    def check_create(self, pending):
+        """set-wide checks on ``(object, result)`` pairs, may fail results"""
+
+    def after_create(self, objects):
+        pass
+
+    def after_update(self, objects, fields):
+        pass
+
+    def after_delete(self, objects):
+        pass
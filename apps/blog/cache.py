@@ -0,0 +1,177 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+
+def get_cache():
+    return caches[settings.BLOG_CACHE_ALIAS]
+
+
+def get_version_token(model, pk):
+    """
+    current version of a row as ``"<updated>-<version>"``, or None if missing
+
+    Reads two columns by primary key, so conditional requests are answered
+    without loading or serializing the row.
+    """
+    try:
+        row = model.objects.values_list("updated", "version").get(pk=pk)
+    except (model.DoesNotExist, ValidationError):
+        return None
+
+    return make_version_token(*row)
+
+
+def make_version_token(updated, version):
+    return f"{updated.timestamp()}-{version}"
+
+
+def make_etag(token, variant):
+    """strong ETag for one representation (format, query) of a row version"""
+    digest = hashlib.md5(f"{token}|{variant}".encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def detail_key(model, pk):
+    return f"blog:{model._meta.model_name}:{pk}"
+
+
+def get_cached_detail(model, pk, token, variant):
+    """serialized data cached for this version and variant, if any"""
+    entry = get_cache().get(detail_key(model, pk))
+    if entry is None or entry["token"] != token:
+        return None
+
+    return entry["variants"].get(variant)
+
+
+def set_cached_detail(model, pk, token, variant, data):
+    cache = get_cache()
+    key = detail_key(model, pk)
+    entry = cache.get(key)
+    if entry is None or entry["token"] != token:
+        entry = {"token": token, "variants": {}}
+
+    entry["variants"][variant] = data
+    cache.set(key, entry, settings.BLOG_CACHE_TIMEOUT)
+
+
+def invalidate_detail(model, pk):
+    get_cache().delete(detail_key(model, pk))
+
+
+def generation_key(collection):
+    return f"blog:generation:{collection}"
+
+
+def get_generation(collection):
+    """
+    current generation of a collection such as ``"posts"``
+
+    A missing counter restarts from the clock rather than from 1, so an
+    evicted counter can never line up with pages cached before it.
+    """
+    cache = get_cache()
+    key = generation_key(collection)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, time.time_ns(), None)
+        generation = cache.get(key)
+
+    return generation
+
+
+def bump_generation(*collections):
+    """orphan every cached page of ``collections`` once the transaction commits"""
+
+    def bump():
+        cache = get_cache()
+        for collection in collections:
+            try:
+                cache.incr(generation_key(collection))
+            except ValueError:
+                cache.add(generation_key(collection), time.time_ns(), None)
+        # replicas may lag behind the bump, see CachedListMixin
+        if settings.DATABASE_REPLICAS:
+            cache.set_many(
+                {bumped_key(collection): time.time() for collection in collections},
+                settings.BLOG_CACHE_TIMEOUT,
+            )
+
+    transaction.on_commit(bump)
+
+
+def bumped_key(collection):
+    return f"blog:bumped:{collection}"
+
+
+def bumped_within(collection, seconds):
+    """whether a write bumped ``collection`` in the last ``seconds``"""
+    bumped = get_cache().get(bumped_key(collection))
+    return bumped is not None and time.time() - bumped < seconds
+
+
+def list_key(collection, variant, generation):
+    digest = hashlib.md5(variant.encode()).hexdigest()
+    return f"blog:list:{collection}:{generation}:{digest}"
+
+
+def get_cached_list(collection, variant, generation):
+    return get_cache().get(list_key(collection, variant, generation))
+
+
+def set_cached_list(collection, variant, generation, data):
+    """
+    cache a page under the generation read before its queryset ran
+
+    A bump landing in between then orphans the page instead of filing it
+    under the new generation.
+    """
+    key = list_key(collection, variant, generation)
+    get_cache().set(key, data, settings.BLOG_CACHE_TIMEOUT)
+
+
+def posts_changed():
+    bump_generation("posts")
+
+
+def comments_changed(*post_ids):
+    # posts embed comment counts and previews, so they go stale too
+    bump_generation("posts", *(f"comments:{post_id}" for post_id in post_ids))
+
+
+async def aget_cache_value(key):
+    """
+    read ``key`` from an async view
+
+    In-process caches are read on the event loop, they never block on I/O;
+    other backends go through ``aget``, a thread hop in this Django.
+    """
+    cache = get_cache()
+    if isinstance(cache, (LocMemCache, DummyCache)):
+        return cache.get(key)
+
+    return await cache.aget(key)
+
+
+async def aget_cached_detail(model, pk, token, variant):
+    entry = await aget_cache_value(detail_key(model, pk))
+    if entry is None or entry["token"] != token:
+        return None
+
+    return entry["variants"].get(variant)
+
+
+async def aget_cached_list(collection, variant):
+    # without a generation nothing of the collection can be cached
+    generation = await aget_cache_value(generation_key(collection))
+    if generation is None:
+        return None
+
+    return await aget_cache_value(list_key(collection, variant, generation))
@@ -0,0 +1,11 @@
+from core.checks import check_shared_cache
+from django.conf import settings
+from django.core.checks import Tags, register
+
+
+@register(Tags.caches)
+def check_blog_cache(app_configs, **kwargs):
+    """generations bumped per process would leave other workers' pages stale"""
+    return check_shared_cache(
+        settings.BLOG_CACHE_ALIAS, "BLOG_CACHE_ALIAS", "blog.E001"
+    )
@@ -0,0 +1,119 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Post
+
+
+def comment_added(comment):
+    """bump the denormalized counters of the post ``comment`` belongs to"""
+    created = Value(comment.created)
+    Post.objects.filter(pk=comment.post_id).update(
+        comment_count=F("comment_count") + 1,
+        version=F("version") + 1,
+        last_commented_at=Greatest(Coalesce("last_commented_at", created), created),
+    )
+
+
+def comments_removed(post_id, count=1):
+    """drop ``count`` comments from a post and recompute its latest comment"""
+    latest = (
+        Comment.objects.filter(post=OuterRef("pk"))
+        .order_by("-created")
+        .values("created")[:1]
+    )
+    Post.objects.filter(pk=post_id).update(
+        comment_count=Greatest(F("comment_count") - count, Value(0)),
+        version=F("version") + 1,
+        last_commented_at=Subquery(latest),
+    )
+
+
+def comment_changed(comment):
+    """mark the post of an edited comment as changed, its preview may show it"""
+    Post.objects.filter(pk=comment.post_id).update(version=F("version") + 1)
+
+
+def author_renamed(user_id, post_ids):
+    """
+    mark everything showing a user's name as changed after a rename
+
+    That is the user's posts and comments, and the posts in ``post_ids``
+    whose comment previews may show the user.
+    """
+    Post.objects.filter(Q(author=user_id) | Q(pk__in=post_ids)).update(
+        version=F("version") + 1
+    )
+    Comment.objects.filter(author=user_id).update(version=F("version") + 1)
+
+
+def recount_comments(post_ids):
+    """recompute the counters of many posts in one UPDATE, for bulk writes"""
+    comments = Comment.objects.filter(post=OuterRef("pk")).order_by()
+    count = comments.values("post").annotate(n=Count("id")).values("n")
+    latest = comments.order_by("-created").values("created")[:1]
+    Post.objects.filter(pk__in=post_ids).update(
+        comment_count=Coalesce(Subquery(count), Value(0)),
+        version=F("version") + 1,
+        last_commented_at=Subquery(latest),
+    )
+
+
+def _bump_user(user_id, counter, created):
+    created = Value(created)
+    get_user_model().objects.filter(pk=user_id).update(
+        **{counter: F(counter) + 1},
+        last_active_at=Greatest(Coalesce("last_active_at", created), created),
+    )
+
+
+def post_added(post):
+    """count a new post towards its author's stats"""
+    _bump_user(post.author_id, "post_count", post.created)
+
+
+def user_comment_added(comment):
+    """count a new comment towards its author's stats"""
+    _bump_user(comment.author_id, "comment_count", comment.created)
+
+
+def recount_users(user_ids):
+    """recompute the stats of many users in one UPDATE, after deletions"""
+    posts = Post.objects.filter(author=OuterRef("pk")).order_by()
+    comments = Comment.objects.filter(author=OuterRef("pk")).order_by()
+    post_count = posts.values("author").annotate(n=Count("id")).values("n")
+    comment_count = comments.values("author").annotate(n=Count("id")).values("n")
+    latest_post = Subquery(posts.order_by("-created").values("created")[:1])
+    latest_comment = Subquery(comments.order_by("-created").values("created")[:1])
+    get_user_model().objects.filter(pk__in=user_ids).update(
+        post_count=Coalesce(Subquery(post_count), Value(0)),
+        comment_count=Coalesce(Subquery(comment_count), Value(0)),
+        # GREATEST is NULL on SQLite if either side is, coalesce both ways
+        last_active_at=Greatest(
+            Coalesce(latest_post, latest_comment),
+            Coalesce(latest_comment, latest_post),
+        ),
+    )
+
+
+def get_user_stats():
+    """
+    ``{user id: (posts, comments, last activity)}`` for every user with any
+
+    One GROUP BY per table, for repairing the stats of all users at once.
+    """
+    stats = {}
+    for model, index in ((Post, 0), (Comment, 1)):
+        rows = (
+            model.objects.order_by()
+            .values("author")
+            .annotate(n=Count("id"), latest=Max("created"))
+            .values_list("author", "n", "latest")
+        )
+        for author_id, count, latest in rows:
+            entry = stats.setdefault(author_id, [0, 0, None])
+            entry[index] = count
+            if entry[2] is None or latest > entry[2]:
+                entry[2] = latest
+
+    return {author_id: tuple(entry) for author_id, entry in stats.items()}
@@ -0,0 +1,71 @@
+import uuid
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Comment, Post
+from .serializers import CommentSerializer, PostExportSerializer
+
+EXPORTS = {
+    "posts": (Post, PostExportSerializer),
+    "comments": (Comment, CommentSerializer),
+}
+
+OUTPUTS = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def parse_after(after):
+    """the resume cursor, the id of the last record already received"""
+    if after in (None, ""):
+        return None
+
+    try:
+        return uuid.UUID(str(after))
+    except ValueError:
+        raise ValidationError("Invalid resume cursor.")
+
+
+def export_records(kind, after=None, chunk_size=None):
+    """
+    yield serialized records of ``kind`` in primary key order, a batch at a time
+
+    Rows are streamed from the database with ``iterator()`` and serialized
+    per batch through the serializer's values plan, so memory is bounded
+    by ``chunk_size`` whatever the table size. ``after`` resumes past the
+    record with that id.
+    """
+    model, serializer_class = EXPORTS[kind]
+    chunk_size = chunk_size or settings.BLOG_EXPORT_CHUNK_SIZE
+    plan = serializer_class().get_values_plan()
+
+    queryset = model.objects.order_by("pk")
+    if after is not None:
+        queryset = queryset.filter(pk__gt=after)
+    rows = queryset.values(*sorted(plan.lookups)).iterator(chunk_size=chunk_size)
+
+    while True:
+        batch = list(islice(rows, chunk_size))
+        if not batch:
+            return
+        yield from plan.serialize(batch)
+
+
+def render_records(records, output="json"):
+    """encode records as one JSON array or as newline-delimited JSON, lazily"""
+    encoder = JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+    if output == "ndjson":
+        for record in records:
+            yield encoder.encode(record) + "\n"
+        return
+
+    separator = "[\n"
+    for record in records:
+        yield separator + encoder.encode(record)
+        separator = ",\n"
+    yield "[]\n" if separator == "[\n" else "\n]\n"
@@ -0,0 +1,122 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from blog.models import Post
+from core.handlers import ASGIHandler
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare cached blog reads through the WSGI handler on a thread pool "
+        "against the ASGI handler on one event loop, at the same concurrency. "
+        "Sample rows are committed, as the database pool threads have to see "
+        "them, and deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests", type=int, default=2000, help="Requests per case."
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=8,
+            help="WSGI threads, in-flight ASGI requests and ASYNC_DB_WORKERS.",
+        )
+
+    def handle(self, *args, **options):
+        total, concurrency = options["requests"], options["concurrency"]
+        user = get_user_model().objects.create_user(
+            username="bench-asgi", email="bench-asgi@example.com"
+        )
+        try:
+            post = Post.objects.create(author=user, title="Bench", body="..." * 50)
+            cases = [
+                ("list", reverse("blog:post-list")),
+                ("detail", reverse("blog:post-detail", kwargs={"post_pk": post.pk})),
+            ]
+            with override_settings(ASYNC_DB_WORKERS=concurrency):
+                for name, path in cases:
+                    wsgi = self.time_wsgi(path, total, concurrency)
+                    asgi = asyncio.run(self.time_asgi(path, total, concurrency))
+                    self.stdout.write(
+                        f"{name:<8} wsgi {total / wsgi:8.0f} req/s  "
+                        f"asgi {total / asgi:8.0f} req/s  ({wsgi / asgi:.1f}x)"
+                    )
+        finally:
+            # cascades to the post
+            user.delete()
+
+    def time_wsgi(self, path, total, concurrency):
+        handler = WSGIHandler()
+        environ = RequestFactory()._base_environ(PATH_INFO=path, HTTP_HOST="localhost")
+
+        def get():
+            response = handler(dict(environ), lambda status, headers: None)
+            # sends request_finished, which closes the connection
+            response.close()
+            return response.status_code
+
+        # the first request fills the cache
+        get()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            statuses = list(executor.map(lambda _: get(), range(total)))
+        elapsed = time.perf_counter() - start
+        self.check_statuses(statuses)
+
+        return elapsed
+
+    async def time_asgi(self, path, total, concurrency):
+        handler = ASGIHandler()
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "query_string": b"",
+            "headers": [(b"host", b"localhost")],
+            "server": ("localhost", 80),
+            "client": ("127.0.0.1", 0),
+        }
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def get():
+            statuses = []
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    statuses.append(message["status"])
+
+            await handler(dict(scope), receive, send)
+            return statuses[0]
+
+        await get()
+        remaining = iter(range(total))
+
+        async def worker():
+            return [await get() for _ in remaining]
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        self.check_statuses([code for statuses in results for code in statuses])
+
+        return elapsed
+
+    def check_statuses(self, statuses):
+        failed = [code for code in statuses if code != 200]
+        if failed:
+            self.stderr.write(f"{len(failed)} requests failed, first {failed[0]}")
@@ -0,0 +1,88 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from blog.models import Comment, Post
+from blog.serializers import CommentSerializer, PostSerializer
+from core.mixins import optimize_for_serializer
+from users.serializers import UserListSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Time list serialization per row, instances through DRF fields "
+        "against values() rows through the compiled plan. Sample rows are "
+        "written in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000, help="Rows per list.")
+        parser.add_argument(
+            "--repeat", type=int, default=5, help="Runs per case, the best counts."
+        )
+
+    def handle(self, *args, **options):
+        rows, repeat = options["rows"], options["repeat"]
+        request = Request(APIRequestFactory().get("/"))
+
+        with transaction.atomic():
+            post = self.create_rows(rows)
+            cases = [
+                ("posts", PostSerializer, Post.objects.all()),
+                ("comments", CommentSerializer, Comment.objects.filter(post=post)),
+                ("users", UserListSerializer, get_user_model().objects.all()),
+            ]
+            for name, serializer_class, queryset in cases:
+                serializer = serializer_class(
+                    queryset, many=True, context={"request": request}
+                )
+                instances = optimize_for_serializer(
+                    queryset, serializer, required_fields=()
+                )
+                plan = serializer.child.get_values_plan()
+                values = queryset.values(*plan.lookups)
+
+                slow = self.best(
+                    repeat,
+                    lambda: serializer_class(
+                        list(instances), many=True, context={"request": request}
+                    ).data,
+                )
+                fast = self.best(repeat, lambda: plan.serialize(values))
+                count = queryset.count()
+                self.stdout.write(
+                    f"{name:<10} {count:>6} rows  "
+                    f"serializer {slow / count * 1e6:8.1f} us/row  "
+                    f"values plan {fast / count * 1e6:8.1f} us/row  "
+                    f"({slow / fast:.1f}x)"
+                )
+
+            transaction.set_rollback(True)
+
+    def create_rows(self, rows):
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(username=f"bench{i}", email=f"bench{i}@example.com")
+            for i in range(rows)
+        )
+        posts = Post.objects.bulk_create(
+            Post(author=user, title=f"Post {i}", body="..." * 50)
+            for i, user in enumerate(users)
+        )
+        Comment.objects.bulk_create(
+            Comment(author=user, post=posts[0], body="So?") for user in users
+        )
+
+        return posts[0]
+
+    def best(self, repeat, run):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+
+        return min(timings)
@@ -0,0 +1,117 @@
+import os
+import tempfile
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections, transaction
+from django.db.models import F
+
+from blog.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Create comments from many threads on a SQLite file, with Django's "
+        "SQLite backend and with core.db.backends.sqlite3, and count the "
+        "commits and the 'database is locked' errors of each. Both databases "
+        "hold only the tables of users, posts and comments, in a temporary "
+        "directory."
+    )
+
+    backends = [
+        ("django", "django.db.backends.sqlite3"),
+        ("tuned", "core.db.backends.sqlite3"),
+    ]
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument(
+            "--comments", type=int, default=100, help="Comments per thread."
+        )
+
+    def handle(self, *args, **options):
+        threads, comments = options["threads"], options["comments"]
+        with tempfile.TemporaryDirectory() as directory:
+            for name, engine in self.backends:
+                alias = f"bench-{name}"
+                connections.settings[alias] = {
+                    **connection.settings_dict,
+                    "ENGINE": engine,
+                    "NAME": os.path.join(directory, f"{name}.sqlite3"),
+                    "OPTIONS": {},
+                    "POOL": {"MAX_SIZE": threads},
+                }
+                try:
+                    self.create_tables(alias)
+                    created, locked, elapsed = self.run(alias, threads, comments)
+                finally:
+                    connections[alias].close()
+                    del connections[alias]
+                    del connections.settings[alias]
+
+                self.stdout.write(
+                    f"{name:<8} {created:>6} comments  {locked:>6} locked  "
+                    f"{created / elapsed:8.0f} commits/s"
+                )
+
+    def create_tables(self, alias):
+        # not migrate, some third-party migrations only know the default alias
+        with connections[alias].schema_editor() as editor:
+            for model in [get_user_model(), Post, Comment]:
+                editor.create_model(model)
+
+    def run(self, alias, threads, comments):
+        # bulk_create skips the search index, which lives on the default alias
+        User = get_user_model()
+        (author,) = User.objects.using(alias).bulk_create(
+            [User(username="bench", email="bench@example.com")]
+        )
+        (post,) = Post.objects.using(alias).bulk_create(
+            [Post(author=author, title="Bench", body="")]
+        )
+        results = []
+        lock = threading.Lock()
+
+        def write():
+            created = locked = 0
+            for _ in range(comments):
+                try:
+                    self.add_comment(alias, post, author)
+                except OperationalError:
+                    locked += 1
+                else:
+                    created += 1
+            connections[alias].close()
+            with lock:
+                results.append((created, locked))
+
+        workers = [threading.Thread(target=write) for _ in range(threads)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+
+        return (
+            sum(created for created, _ in results),
+            sum(locked for _, locked in results),
+            elapsed,
+        )
+
+    def add_comment(self, alias, post, author):
+        """what creating a comment through the API writes, after a read"""
+        with transaction.atomic(using=alias):
+            Post.objects.using(alias).filter(pk=post.pk).exists()
+            comment = Comment.objects.using(alias).create(
+                author=author, post=post, body="So?"
+            )
+            Post.objects.using(alias).filter(pk=post.pk).update(
+                comment_count=F("comment_count") + 1, version=F("version") + 1
+            )
+            get_user_model().objects.using(alias).filter(pk=author.pk).update(
+                comment_count=F("comment_count") + 1,
+                last_active_at=comment.created,
+            )
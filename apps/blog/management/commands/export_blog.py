@@ -0,0 +1,38 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.export import EXPORTS, OUTPUTS, export_records, parse_after, render_records
+
+
+class Command(BaseCommand):
+    help = "Stream every post or comment as JSON or NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("export", choices=sorted(EXPORTS))
+        parser.add_argument("--output", choices=sorted(OUTPUTS), default="ndjson")
+        parser.add_argument("--after", help="Resume past the record with this id.")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            help="Rows read and serialized per batch.",
+        )
+        parser.add_argument("--file", help="Write to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        try:
+            after = parse_after(options["after"])
+        except ValidationError as error:
+            raise CommandError(error.messages[0])
+
+        records = export_records(
+            options["export"], after=after, chunk_size=options["chunk_size"]
+        )
+        chunks = render_records(records, options["output"])
+        if options["file"] is None:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+
+        with open(options["file"], "w", encoding="utf-8") as output:
+            for chunk in chunks:
+                output.write(chunk)
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from blog.search import get_search_backend, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index of posts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Posts read and indexed per batch.",
+        )
+
+    def handle(self, *args, **options):
+        if get_search_backend() is None:
+            raise CommandError("This database has no full-text search backend.")
+
+        with transaction.atomic():
+            count = rebuild_index(chunk_size=options["chunk_size"])
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} posts."))
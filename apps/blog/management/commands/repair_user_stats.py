@@ -0,0 +1,49 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.counters import get_user_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute every user's post count, comment count and last activity"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Users read and updated per batch.",
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        stats = get_user_stats()
+        fields = ("post_count", "comment_count", "last_active_at")
+        users = User.objects.order_by("pk").only("pk", *fields)
+
+        checked = repaired = 0
+        last_pk = None
+        while True:
+            batch = users if last_pk is None else users.filter(pk__gt=last_pk)
+            batch = list(batch[: options["batch_size"]])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+
+            changed = []
+            for user in batch:
+                expected = stats.get(user.pk, (0, 0, None))
+                if tuple(getattr(user, field) for field in fields) != expected:
+                    for field, value in zip(fields, expected):
+                        setattr(user, field, value)
+                    changed.append(user)
+            with transaction.atomic():
+                User.objects.bulk_update(changed, fields)
+
+            checked += len(batch)
+            repaired += len(changed)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Checked {checked} users, repaired {repaired}.")
+        )
@@ -0,0 +1,38 @@
+# Generated by Django 4.0.4 on 2026-10-18 18:06
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Comment = apps.get_model('blog', 'Comment')
+    Post = apps.get_model('blog', 'Post')
+    db = schema_editor.connection.alias
+
+    comments = Comment.objects.using(db).filter(post=OuterRef('pk')).order_by().values('post')
+    Post.objects.using(db).update(
+        comment_count=Coalesce(Subquery(comments.annotate(n=Count('id')).values('n')), Value(0)),
+        last_commented_at=Subquery(comments.annotate(last=Max('created')).values('last')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='last_commented_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
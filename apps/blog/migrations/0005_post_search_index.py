@@ -0,0 +1,42 @@
+# Generated by Django 4.0.4 on 2026-10-18 18:31
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from blog.search import get_search_backend
+
+    backend = get_search_backend(schema_editor.connection)
+    if backend is None:
+        return
+
+    backend.create()
+    Post = apps.get_model('blog', 'Post')
+    posts = Post.objects.using(schema_editor.connection.alias).only('id', 'title', 'body')
+    chunk = []
+    for post in posts.iterator(chunk_size=1000):
+        chunk.append(post)
+        if len(chunk) == 1000:
+            backend.index(chunk)
+            chunk = []
+    if chunk:
+        backend.index(chunk)
+
+
+def drop_search_index(apps, schema_editor):
+    from blog.search import get_search_backend
+
+    backend = get_search_backend(schema_editor.connection)
+    if backend is not None:
+        backend.drop()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
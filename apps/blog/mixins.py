@@ -0,0 +1,98 @@
+from core.db.routers import get_used_replica
+from django.conf import settings
+from django.http import Http404
+from django.utils.http import parse_etags, urlencode
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache import (
+    bumped_within,
+    get_cached_detail,
+    get_cached_list,
+    get_generation,
+    get_version_token,
+    make_etag,
+    make_version_token,
+    set_cached_detail,
+    set_cached_list,
+)
+
+
+class CacheVariantMixin:
+    def get_cache_variant(self):
+        """what besides the data shapes a response: host, format and query"""
+        query = urlencode(sorted(self.request.query_params.lists()), doseq=True)
+        return (
+            f"{self.request.get_host()}"
+            f"|{self.request.accepted_renderer.format}?{query}"
+        )
+
+
+class CachedRetrieveMixin(CacheVariantMixin):
+    """
+    conditional GET and response caching for detail views
+
+    Reads answer ``If-None-Match`` from a version lookup alone and reuse
+    serialized data cached per row version. Object permissions are not
+    checked on this path, which is fine for read-only-for-all views.
+    """
+
+    def get_required_fields(self):
+        return super().get_required_fields() | {"updated", "version"}
+
+    def retrieve(self, request, *args, **kwargs):
+        model = self.queryset.model
+        pk = self.kwargs[self.lookup_url_kwarg]
+        variant = self.get_cache_variant()
+
+        token = get_version_token(model, pk)
+        if token is None:
+            raise Http404
+
+        etag = make_etag(token, variant)
+        if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+        if etag in if_none_match or "*" in if_none_match:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        data = get_cached_detail(model, pk, token, variant)
+        if data is None:
+            instance = self.get_object()
+            data = self.get_serializer(instance).data
+            # label the data with the version it was actually built from
+            token = make_version_token(instance.updated, instance.version)
+            etag = make_etag(token, variant)
+            set_cached_detail(model, pk, token, variant, data)
+
+        return Response(data, headers={"ETag": etag})
+
+
+class CachedListMixin(CacheVariantMixin):
+    """
+    response caching for list views, keyed by query and collection generation
+
+    Writes bump the generation of the collections they touch, which
+    orphans every cached page at once; orphans age out with the TTL.
+    Misses read from a replica like any other read. A replica may not
+    have a write yet for ``REPLICA_PIN_SECONDS`` after its bump, so
+    pages read from one in that window are served but not cached.
+    """
+
+    cache_collection = None
+
+    def get_cache_collection(self):
+        return self.cache_collection
+
+    def list(self, request, *args, **kwargs):
+        collection = self.get_cache_collection()
+        variant = self.get_cache_variant()
+
+        generation = get_generation(collection)
+        data = get_cached_list(collection, variant, generation)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            if get_used_replica(request._request) is None or not bumped_within(
+                collection, settings.REPLICA_PIN_SECONDS
+            ):
+                set_cached_list(collection, variant, generation, data)
+
+        return Response(data)
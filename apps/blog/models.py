@@ -12,11 +12,18 @@ class TimeStampedModel(models.Model):
 
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
+    # bumped on every change to the representation, feeds the ETag
+    version = models.PositiveIntegerField(default=1, editable=False)
 
     class Meta:
         abstract = True
         ordering = ["-created"]
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version += 1
+        super().save(*args, **kwargs)
+
 
 class Post(TimeStampedModel):
     """creates a model for posts"""
@@ -27,10 +34,31 @@ class Post(TimeStampedModel):
     )
     title = models.CharField(max_length=100)
     body = models.TextField()
+    # denormalized from comments, see blog.counters
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    last_commented_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    COUNTER_FIELDS = ("comment_count", "last_commented_at")
+
+    class Meta(TimeStampedModel.Meta):
+        indexes = [
+            # keyset pagination on (created, id)
+            models.Index(fields=["created", "id"], name="blog_post_created_id_idx"),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # never write back stale counters over concurrent F() updates
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
 
 class Comment(TimeStampedModel):
     """creates a model for comments"""
@@ -42,5 +70,13 @@ class Comment(TimeStampedModel):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="comments")
     body = models.TextField()
 
+    class Meta(TimeStampedModel.Meta):
+        indexes = [
+            # keyset pagination on (created, id) within a post
+            models.Index(
+                fields=["post", "created", "id"], name="blog_comment_post_created_idx"
+            ),
+        ]
+
     def __str__(self):
         return f"{self.author} on {self.post}"
@@ -8,4 +8,5 @@ class IsAuthorOrReadOnly(permissions.BasePermission):
             return True
 
         # Write permissions are only allowed to the owner user
-        return obj.author == request.user
+        # compare keys, loading ``obj.author`` would cost a query
+        return obj.author_id == request.user.pk
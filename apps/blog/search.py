@@ -0,0 +1,259 @@
+import json
+import re
+import uuid
+
+from django.db import connection
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+from rest_framework.response import Response
+
+from .models import Post
+
+
+class SearchUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Search is not available on this database."
+    default_code = "search_unavailable"
+
+
+class SQLiteSearchBackend:
+    """
+    FTS5 index over post titles and bodies
+
+    Rows are keyed by the first 64 bits of the post UUID so updates and
+    deletes hit the index rowid directly. Scores are bm25, lower is better.
+    """
+
+    table = "blog_post_fts"
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+                "post_id UNINDEXED, title, body, tokenize='porter unicode61')"
+            )
+
+    def drop(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def rowid(self, post_id):
+        return int.from_bytes(uuid.UUID(str(post_id)).bytes[:8], "big", signed=True)
+
+    def index(self, posts):
+        # a post listed twice would be inserted twice under one rowid
+        posts = {post.pk: post for post in posts}.values()
+        rows = [
+            (self.rowid(post.pk), str(post.pk), post.title, post.body) for post in posts
+        ]
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {self.table} WHERE rowid = %s", [row[:1] for row in rows]
+            )
+            cursor.executemany(
+                f"INSERT INTO {self.table} (rowid, post_id, title, body) "
+                "VALUES (%s, %s, %s, %s)",
+                rows,
+            )
+
+    def remove(self, post_ids):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {self.table} WHERE rowid = %s",
+                [(self.rowid(post_id),) for post_id in post_ids],
+            )
+
+    def clear(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+
+    def search(self, query, after, limit):
+        terms = re.findall(r"\w+", query)
+        if not terms:
+            return []
+
+        match = " ".join(f'"{term}"' for term in terms)
+        sql = (
+            f"SELECT post_id, bm25({self.table}, 0.0, 2.0, 1.0) AS score "
+            f"FROM {self.table} WHERE {self.table} MATCH %s"
+        )
+        params = [match]
+        if after is not None:
+            sql = f"SELECT * FROM ({sql}) WHERE score > %s OR (score = %s AND post_id > %s)"
+            params += [after[0], after[0], after[1]]
+
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"{sql} ORDER BY score, post_id LIMIT %s", params + [limit])
+            return cursor.fetchall()
+
+
+class PostgreSQLSearchBackend:
+    """
+    tsvector index over post titles (weight A) and bodies (weight B)
+
+    The vectors live in a side table with a GIN index and cascade with
+    their post. Scores are negated ts_rank so lower is better here too.
+    """
+
+    table = "blog_post_search"
+    document = (
+        "setweight(to_tsvector('english', p.title), 'A') || "
+        "setweight(to_tsvector('english', p.body), 'B')"
+    )
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "post_id uuid PRIMARY KEY REFERENCES blog_post (id) "
+                "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+                "document tsvector NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_document_idx "
+                f"ON {self.table} USING gin (document)"
+            )
+
+    def drop(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def index(self, posts):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {self.table} (post_id, document) "
+                f"SELECT p.id, {self.document} FROM blog_post p WHERE p.id = ANY(%s) "
+                "ON CONFLICT (post_id) DO UPDATE SET document = EXCLUDED.document",
+                [list({post.pk for post in posts})],
+            )
+
+    def remove(self, post_ids):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.table} WHERE post_id = ANY(%s)", [list(post_ids)]
+            )
+
+    def clear(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {self.table}")
+
+    def search(self, query, after, limit):
+        sql = (
+            "SELECT post_id, score FROM ("
+            "SELECT s.post_id, -ts_rank(s.document, q) AS score "
+            f"FROM {self.table} s, websearch_to_tsquery('english', %s) q "
+            "WHERE s.document @@ q) hits"
+        )
+        params = [query]
+        if after is not None:
+            sql += " WHERE score > %s OR (score = %s AND post_id > %s)"
+            params += [after[0], after[0], after[1]]
+
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"{sql} ORDER BY score, post_id LIMIT %s", params + [limit])
+            return cursor.fetchall()
+
+
+BACKENDS = {
+    "sqlite": SQLiteSearchBackend,
+    "postgresql": PostgreSQLSearchBackend,
+}
+
+
+def get_search_backend(using=None):
+    """search backend for a connection, None if its database has no full-text index"""
+    using = using or connection
+    backend_class = BACKENDS.get(using.vendor)
+    if backend_class is None:
+        return None
+
+    return backend_class(using)
+
+
+def index_posts(posts):
+    backend = get_search_backend()
+    if backend is not None:
+        backend.index(posts)
+
+
+def unindex_posts(post_ids):
+    backend = get_search_backend()
+    if backend is not None:
+        backend.remove(post_ids)
+
+
+def rebuild_index(using=None, chunk_size=1000):
+    """reindex every post, returns the number of posts indexed"""
+    backend = get_search_backend(using)
+    backend.clear()
+
+    count = 0
+    chunk = []
+    for post in Post.objects.only("id", "title", "body").iterator(
+        chunk_size=chunk_size
+    ):
+        chunk.append(post)
+        if len(chunk) == chunk_size:
+            backend.index(chunk)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        backend.index(chunk)
+        count += len(chunk)
+
+    return count
+
+
+class SearchPagination(CursorPagination):
+    """
+    forward-only cursor pagination over ranked hits
+
+    The cursor holds the (score, post id) of the last hit, so every page
+    is a ranked index query with a row-value bound instead of an OFFSET.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_search(self, backend, query, request):
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+
+        after = None
+        if self.cursor is not None and self.cursor.position is not None:
+            try:
+                score, post_id = json.loads(self.cursor.position)
+                after = (float(score), str(uuid.UUID(post_id)))
+            except (TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+
+        hits = [
+            (uuid.UUID(str(post_id)), score)
+            for post_id, score in backend.search(query, after, self.page_size + 1)
+        ]
+        self.page = hits[: self.page_size]
+        self.has_next = len(hits) > self.page_size
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        post_id, score = self.page[-1]
+        position = json.dumps([repr(score), str(post_id)])
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        return None
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
@@ -1,13 +1,18 @@
+from core.serializers import SparseFieldsetsMixin, ValuesSerializerMixin
+from django.conf import settings
+from django.db.models import OuterRef, Prefetch, Subquery
 from rest_framework import serializers
 
 from .models import Comment, Post
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(
+    SparseFieldsetsMixin, ValuesSerializerMixin, serializers.ModelSerializer
+):
     """creates a serializer for posts"""
 
     author = serializers.ReadOnlyField(source="author.username")
-    comments = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+    recent_comments = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
@@ -17,11 +22,125 @@ class PostSerializer(serializers.ModelSerializer):
             "title",
             "body",
             "created",
-            "comments",
+            "comment_count",
+            "last_commented_at",
+            "recent_comments",
         ]
 
+    def get_fields(self):
+        fields = super().get_fields()
 
-class CommentSerializer(serializers.ModelSerializer):
+        # ?include=comments embeds a longer, separately capped comment list
+        if "comments" in self.get_includes() and self.is_field_requested("comments"):
+            fields["comments"] = serializers.SerializerMethodField()
+
+        return fields
+
+    def get_includes(self):
+        request = self.context.get("request")
+        if request is None:
+            return set()
+
+        return set(request.query_params.get("include", "").split(","))
+
+    def get_comment_limit(self):
+        if "comments" in self.get_includes():
+            return max(
+                settings.BLOG_COMMENT_PREVIEW_LIMIT, settings.BLOG_COMMENT_INCLUDE_LIMIT
+            )
+
+        return settings.BLOG_COMMENT_PREVIEW_LIMIT
+
+    def optimize_queryset(self, queryset):
+        """prefetch the newest comments of every post on the page in one query"""
+        if "recent_comments" not in self.fields and "comments" not in self.fields:
+            return queryset
+
+        comments = self.get_newest_comments_queryset().select_related("author")
+        return queryset.prefetch_related(
+            Prefetch("comments", queryset=comments, to_attr="newest_comments")
+        )
+
+    def get_newest_comments_queryset(self):
+        """the newest comments of each post, capped per post in the database"""
+        newest = (
+            Comment.objects.filter(post=OuterRef("post"))
+            .order_by("-created", "-id")
+            .values("id")[: self.get_comment_limit()]
+        )
+
+        return Comment.objects.filter(id__in=Subquery(newest)).order_by(
+            "-created", "-id"
+        )
+
+    def get_newest_comments(self, obj):
+        if hasattr(obj, "newest_comments"):
+            return obj.newest_comments
+        if not obj.comment_count:
+            return []
+
+        return list(
+            obj.comments.select_related("author").order_by("-created", "-id")[
+                : self.get_comment_limit()
+            ]
+        )
+
+    def get_recent_comments(self, obj):
+        comments = self.get_newest_comments(obj)[: settings.BLOG_COMMENT_PREVIEW_LIMIT]
+        return RecentCommentSerializer(comments, many=True).data
+
+    def get_comments(self, obj):
+        comments = self.get_newest_comments(obj)[: settings.BLOG_COMMENT_INCLUDE_LIMIT]
+        return RecentCommentSerializer(comments, many=True).data
+
+    def get_newest_comment_rows(self, rows):
+        """serialized newest comments for each of ``rows``, one query per batch"""
+        post_ids = [row["id"] for row in rows]
+        cached = getattr(self, "_newest_comment_rows", None)
+        if cached is not None and cached[0] == post_ids:
+            return cached[1]
+
+        plan = RecentCommentSerializer().get_values_plan()
+        comments = self.get_newest_comments_queryset().filter(post__in=post_ids)
+        by_post = {post_id: [] for post_id in post_ids}
+        for row in comments.values(*sorted(plan.lookups | {"post"})):
+            by_post[row["post"]].append(row)
+
+        newest = [plan.serialize(by_post[post_id]) for post_id in post_ids]
+        self._newest_comment_rows = (post_ids, newest)
+        return newest
+
+    def values_recent_comments(self, rows):
+        limit = settings.BLOG_COMMENT_PREVIEW_LIMIT
+        return [comments[:limit] for comments in self.get_newest_comment_rows(rows)]
+
+    def values_comments(self, rows):
+        limit = settings.BLOG_COMMENT_INCLUDE_LIMIT
+        return [comments[:limit] for comments in self.get_newest_comment_rows(rows)]
+
+
+class PostExportSerializer(ValuesSerializerMixin, serializers.ModelSerializer):
+    """creates a serializer for post exports, comments are exported on their own"""
+
+    author = serializers.ReadOnlyField(source="author.username")
+
+    class Meta:
+        model = Post
+        fields = [
+            "id",
+            "author",
+            "title",
+            "body",
+            "created",
+            "updated",
+            "comment_count",
+            "last_commented_at",
+        ]
+
+
+class CommentSerializer(
+    SparseFieldsetsMixin, ValuesSerializerMixin, serializers.ModelSerializer
+):
     """creates a serializer for comments"""
 
     author = serializers.ReadOnlyField(source="author.username")
@@ -30,3 +149,19 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ["id", "author", "post", "body", "created"]
+
+
+class CommentBulkCreateSerializer(CommentSerializer):
+    """creates a serializer for comments created in bulk, across posts"""
+
+    post = serializers.UUIDField(source="post_id")
+
+
+class RecentCommentSerializer(ValuesSerializerMixin, serializers.ModelSerializer):
+    """creates a serializer for comments embedded in a post"""
+
+    author = serializers.ReadOnlyField(source="author.username")
+
+    class Meta:
+        model = Comment
+        fields = ["id", "author", "body", "created"]
@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cache import comments_changed, invalidate_detail, posts_changed
+from .counters import author_renamed, recount_comments, recount_users
+from .models import Comment, Post
+from .search import index_posts, unindex_posts
+
+# Cached details are checked against the row version on every read, so
+# invalidating them only frees memory early. Comment deletions are
+# reported by the views, the admin and the receivers on users below
+# instead: a post_delete receiver on Comment would stop Django from
+# fast-deleting the comments of a deleted post.
+
+
+@receiver(post_save, sender=Post)
+def invalidate_post(sender, instance, **kwargs):
+    invalidate_detail(Post, instance.pk)
+    posts_changed()
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post(sender, instance, **kwargs):
+    invalidate_detail(Post, instance.pk)
+    comments_changed(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    index_posts([instance])
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    unindex_posts([instance.pk])
+
+
+@receiver(post_save, sender=Comment)
+def invalidate_comment(sender, instance, **kwargs):
+    invalidate_detail(Comment, instance.pk)
+    invalidate_detail(Post, instance.post_id)
+    comments_changed(instance.post_id)
+
+
+@receiver(pre_delete, sender=Post)
+def collect_post_users(sender, instance, **kwargs):
+    # the post's comments are gone by post_delete, note whose they were
+    instance._commenter_ids = set(
+        Comment.objects.filter(post=instance.pk)
+        .order_by()
+        .values_list("author_id", flat=True)
+        .distinct()
+    )
+
+
+@receiver(post_delete, sender=Post)
+def recount_post_users(sender, instance, **kwargs):
+    # deleting a user or a post cascades to others' stats, not only the views'
+    recount_users({instance.author_id, *getattr(instance, "_commenter_ids", ())})
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def collect_commented_posts(sender, instance, **kwargs):
+    # the user's comments on others' posts cascade away without signals
+    instance._commented_post_ids = set(
+        Comment.objects.filter(author=instance.pk)
+        .exclude(post__author=instance.pk)
+        .order_by()
+        .values_list("post_id", flat=True)
+        .distinct()
+    )
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def recount_commented_posts(sender, instance, **kwargs):
+    post_ids = getattr(instance, "_commented_post_ids", None)
+    if post_ids:
+        recount_comments(post_ids)
+        comments_changed(*post_ids)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_renamed_user(sender, instance, created, **kwargs):
+    # details and list pages show usernames, a rename must change both
+    loaded = getattr(instance, "_loaded_username", None)
+    if created or loaded is None or loaded == instance.username:
+        return
+
+    instance._loaded_username = instance.username
+    post_ids = set(
+        Comment.objects.filter(author=instance.pk)
+        .order_by()
+        .values_list("post_id", flat=True)
+        .distinct()
+    )
+    author_renamed(instance.pk, post_ids)
+    comments_changed(*post_ids)
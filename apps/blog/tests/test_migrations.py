@@ -0,0 +1,29 @@
+from core.testing import MigrationTestMixin
+from django.test import TransactionTestCase
+
+
+# test the counter backfill on a database written before the counters
+class CommentCountersMigrationTests(MigrationTestMixin, TransactionTestCase):
+    """Tests on blog 0003 migrating posts with and without comments"""
+
+    app = "blog"
+    migrate_from = "0002_keyset_indexes"
+
+    def test_backfill(self):
+        User = self.apps.get_model("users", "User")
+        Post = self.apps.get_model("blog", "Post")
+        Comment = self.apps.get_model("blog", "Comment")
+        user = User.objects.create(username="testuser", email="testemail@gmail.com")
+        commented = Post.objects.create(author=user, title="Hello", body="World")
+        uncommented = Post.objects.create(author=user, title="Hello", body="Again")
+        for body in ("first", "second"):
+            Comment.objects.create(author=user, post=commented, body=body)
+
+        Post = self.migrate("0003_post_comment_counters").get_model("blog", "Post")
+
+        commented = Post.objects.get(pk=commented.pk)
+        self.assertEqual(commented.comment_count, 2)
+        self.assertIsNotNone(commented.last_commented_at)
+        uncommented = Post.objects.get(pk=uncommented.pk)
+        self.assertEqual(uncommented.comment_count, 0)
+        self.assertIsNone(uncommented.last_commented_at)
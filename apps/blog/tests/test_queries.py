@@ -0,0 +1,392 @@
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import blog.urls
+from blog.cache import set_cached_list
+from blog.checks import check_blog_cache
+from blog.models import Comment, Post
+from blog.serializers import CommentSerializer, PostSerializer
+from blog.views import PostListView
+from core.middleware import QueryBudgetExceeded
+from core.testing import QueryCountSnapshotMixin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+User = get_user_model()
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
+
+# test query counts stay flat however many rows a page holds
+@override_settings(CACHES=LOCMEM_CACHES)
+class BlogQueryCountAPITests(APITestCase):
+    """APITests on the number of queries per endpoint"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # create a handful of authors, posts and comments
+        authors = [
+            User.objects.create_user(
+                username=f"testuser{i}",
+                email=f"testemail{i}@gmail.com",
+                password="abcde12345",
+            )
+            for i in range(4)
+        ]
+        cls.posts = []
+        for i, author in enumerate(authors):
+            post = Post.objects.create(author=author, title=f"Post {i}", body="...")
+            for commenter in authors:
+                Comment.objects.create(author=commenter, post=post, body="So?")
+            cls.posts.append(post)
+        cls.comment = Comment.objects.filter(post=cls.posts[0]).first()
+
+    def setUp(self):
+        cache.clear()
+
+    def assertQueriesFor(self, num, url, **headers):
+        client = APIClient()
+        with self.assertNumQueries(num):
+            response = client.get(url, format="json", **headers)
+        return response
+
+    def test_post_list(self):
+        """posts joined with authors, comment previews in one prefetch"""
+        response = self.assertQueriesFor(2, reverse("blog:post-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # served from the cache until a write bumps the generation
+        self.assertQueriesFor(0, reverse("blog:post-list"))
+
+    def test_post_list_include_comments(self):
+        self.assertQueriesFor(2, reverse("blog:post-list") + "?include=comments")
+
+    def test_post_detail(self):
+        """version lookup, post with author, comment previews"""
+        url = reverse("blog:post-detail", kwargs={"post_pk": self.posts[0].id})
+        response = self.assertQueriesFor(3, url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # served from the cache after the version lookup
+        self.assertQueriesFor(1, url)
+
+        # the version lookup alone answers a conditional request
+        response = self.assertQueriesFor(1, url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_comment_list(self):
+        """comments joined with authors and posts"""
+        url = reverse("blog:comment-list", kwargs={"post_pk": self.posts[0].id})
+        response = self.assertQueriesFor(1, url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertQueriesFor(0, url)
+
+    def test_comment_detail(self):
+        url = reverse(
+            "blog:comment-detail",
+            kwargs={"post_pk": self.posts[0].id, "comment_pk": self.comment.id},
+        )
+        self.assertQueriesFor(2, url)
+        self.assertQueriesFor(1, url)
+
+
+# test cached list pages are never served after a write
+@override_settings(CACHES=LOCMEM_CACHES)
+class ListCacheGenerationTests(APITestCase):
+    """APITests on generation bumps"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # create user and post
+        cls.testuser = User.objects.create_user(
+            username="testuser",
+            email="testemail@gmail.com",
+            password="abcde12345",
+        )
+        cls.post = Post.objects.create(author=cls.testuser, title="Hello", body="...")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_post_save_bumps_posts(self):
+        url = reverse("blog:post-list")
+        self.client.get(url, format="json")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(author=self.testuser, title="Second", body="...")
+
+        with self.assertNumQueries(2):
+            response = self.client.get(url, format="json")
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_comment_save_bumps_posts_and_comments(self):
+        posts_url = reverse("blog:post-list")
+        comments_url = reverse("blog:comment-list", kwargs={"post_pk": self.post.id})
+        self.client.get(posts_url, format="json")
+        self.client.get(comments_url, format="json")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(author=self.testuser, post=self.post, body="So?")
+
+        response = self.client.get(comments_url, format="json")
+        self.assertEqual(len(response.data["results"]), 1)
+        response = self.client.get(posts_url, format="json")
+        self.assertEqual(len(response.data["results"][0]["recent_comments"]), 1)
+
+    def test_write_during_miss(self):
+        """a page read before a bump is not cached under the new generation"""
+        url = reverse("blog:post-list")
+        store = set_cached_list
+
+        def write_then_store(*args):
+            with self.captureOnCommitCallbacks(execute=True):
+                Post.objects.create(author=self.testuser, title="Second", body="...")
+            store(*args)
+
+        # the write is the test's, not the view's
+        patch = mock.patch("blog.mixins.set_cached_list", write_then_store)
+        with patch, self.settings(QUERY_BUDGET_ACTION="log"):
+            with self.assertLogs("core.middleware", "WARNING"):
+                response = self.client.get(url, format="json")
+        self.assertEqual(len(response.data["results"]), 1)
+
+        response = self.client.get(url, format="json")
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_rename_bumps_posts_and_comments(self):
+        Comment.objects.create(author=self.testuser, post=self.post, body="So?")
+        posts_url = reverse("blog:post-list")
+        comments_url = reverse("blog:comment-list", kwargs={"post_pk": self.post.id})
+        self.client.get(posts_url, format="json")
+        self.client.get(comments_url, format="json")
+
+        user = User.objects.get(pk=self.testuser.pk)
+        user.username = "renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+
+        response = self.client.get(posts_url, format="json")
+        self.assertEqual(response.data["results"][0]["author"], "renamed")
+        response = self.client.get(comments_url, format="json")
+        self.assertEqual(response.data["results"][0]["author"], "renamed")
+
+    def test_shared_cache_check(self):
+        """list caches kept per process are refused"""
+        self.assertEqual([error.id for error in check_blog_cache(None)], ["blog.E001"])
+
+        shared = {
+            **LOCMEM_CACHES,
+            "shared": {
+                "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+                "LOCATION": "shared_cache",
+            },
+        }
+        with self.settings(CACHES=shared, BLOG_CACHE_ALIAS="shared"):
+            self.assertEqual(check_blog_cache(None), [])
+
+    def test_other_post_comments_stay_cached(self):
+        other = Post.objects.create(author=self.testuser, title="Other", body="...")
+        comments_url = reverse("blog:comment-list", kwargs={"post_pk": other.id})
+        self.client.get(comments_url, format="json")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(author=self.testuser, post=self.post, body="So?")
+
+        with self.assertNumQueries(0):
+            self.client.get(comments_url, format="json")
+
+
+# test sparse fieldsets narrow both the output and the columns read
+class SparseFieldsetsAPITests(APITestCase):
+    """APITests on ?fields= and ?omit="""
+
+    @classmethod
+    def setUpTestData(cls):
+        # create user, posts and a comment
+        testuser = User.objects.create_user(
+            username="testuser",
+            email="testemail@gmail.com",
+            password="abcde12345",
+        )
+        cls.post = Post.objects.create(author=testuser, title="Hello", body="x" * 1000)
+        Post.objects.create(author=testuser, title="Again", body="y" * 1000)
+        Comment.objects.create(author=testuser, post=cls.post, body="So?")
+
+    def get(self, url):
+        client = APIClient()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, " ".join(query["sql"] for query in queries)
+
+    def test_post_list_fields(self):
+        """title-only feeds skip bodies and comment previews entirely"""
+        response, sql = self.get(reverse("blog:post-list") + "?fields=id,title")
+
+        self.assertEqual(set(response.data["results"][0]), {"id", "title"})
+        self.assertNotIn('"blog_post"."body"', sql)
+        self.assertNotIn("blog_comment", sql)
+
+    def test_post_list_omit(self):
+        response, sql = self.get(
+            reverse("blog:post-list") + "?omit=body,recent_comments"
+        )
+
+        self.assertNotIn("body", response.data["results"][0])
+        self.assertIn("author", response.data["results"][0])
+        self.assertNotIn('"blog_post"."body"', sql)
+
+    def test_post_detail_fields(self):
+        url = reverse("blog:post-detail", kwargs={"post_pk": self.post.id})
+        response, sql = self.get(url + "?fields=title,comment_count")
+
+        self.assertEqual(response.data, {"title": "Hello", "comment_count": 0})
+        self.assertNotIn('"blog_post"."body"', sql)
+
+    def test_comment_list_fields(self):
+        url = reverse("blog:comment-list", kwargs={"post_pk": self.post.id})
+        response, sql = self.get(url + "?fields=id,author")
+
+        self.assertEqual(set(response.data["results"][0]), {"id", "author"})
+        self.assertNotIn('"blog_comment"."body"', sql)
+
+
+# test the values() fast path renders exactly what the serializers render
+class ValuesListAPITests(APITestCase):
+    """APITests comparing list output with and without the values plan"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # create authors, posts with and without comments
+        authors = [
+            User.objects.create_user(
+                username=f"testuser{i}",
+                email=f"testemail{i}@gmail.com",
+                password="abcde12345",
+            )
+            for i in range(3)
+        ]
+        cls.post = Post.objects.create(author=authors[0], title="Busy", body="...")
+        Post.objects.create(author=authors[1], title="Quiet", body="...")
+        for i in range(6):
+            Comment.objects.create(
+                author=authors[i % 3], post=cls.post, body=f"Comment {i}"
+            )
+
+    def assertSameOutput(self, url, serializer_class):
+        client = APIClient()
+        fast = client.get(url, format="json")
+        with mock.patch.object(serializer_class, "get_values_plan", return_value=None):
+            slow = client.get(url, format="json")
+
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast.content, slow.content)
+
+    def test_post_list(self):
+        self.assertSameOutput(reverse("blog:post-list"), PostSerializer)
+
+    def test_post_list_include_comments(self):
+        url = reverse("blog:post-list") + "?include=comments&page_size=1"
+        self.assertSameOutput(url, PostSerializer)
+
+    def test_post_list_fields(self):
+        url = reverse("blog:post-list") + "?fields=id,author,recent_comments"
+        self.assertSameOutput(url, PostSerializer)
+
+    def test_comment_list(self):
+        url = reverse("blog:comment-list", kwargs={"post_pk": self.post.id})
+        self.assertSameOutput(url, CommentSerializer)
+
+
+# test no endpoint runs more queries than recorded in query_counts.json
+class BlogQuerySnapshotTests(QueryCountSnapshotMixin, APITestCase):
+    """APITests on the query counts of every blog endpoint"""
+
+    urlconf = blog.urls
+    snapshot_path = Path(__file__).with_name("query_counts.json")
+    extra_requests = (
+        ("GET", "post-search", {"q": "Hello"}),
+        ("POST", "post-list", {"title": "New", "body": "..."}),
+        ("PATCH", "post-detail", {"title": "Renamed"}),
+        ("POST", "post-bulk", [{"title": "Bulk", "body": "..."}] * 3),
+        ("POST", "comment-list", {"body": "So?"}),
+        ("PATCH", "comment-detail", {"body": "Edited"}),
+        ("DELETE", "comment-detail", None),
+        ("DELETE", "post-detail", None),
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        # create an author with posts and comments
+        cls.author = User.objects.create_user(
+            username="testuser", email="testemail@gmail.com", password="abcde12345"
+        )
+        cls.post = Post.objects.create(author=cls.author, title="Hello", body="...")
+        for i in range(3):
+            Post.objects.create(author=cls.author, title=f"Post {i}", body="...")
+            Comment.objects.create(author=cls.author, post=cls.post, body="So?")
+        cls.comment = Comment.objects.filter(post=cls.post).first()
+
+    def get_client(self):
+        client = APIClient()
+        client.force_authenticate(self.author)
+        return client
+
+    def get_url_kwargs(self):
+        return {"post_pk": self.post.pk, "comment_pk": self.comment.pk}
+
+    def test_new_endpoint_fails(self):
+        """an endpoint without an entry fails, the snapshot file is left alone"""
+        stored = json.loads(self.snapshot_path.read_text())
+        del stored["GET blog:post-list"]
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "query_counts.json")
+            path.write_text(json.dumps(stored))
+            self.snapshot_path = path
+
+            with self.assertRaisesMessage(
+                AssertionError, "GET blog:post-list: not in the snapshot"
+            ):
+                self.test_query_count_snapshots()
+            self.assertEqual(json.loads(path.read_text()), stored)
+
+
+# test views over their query budget are reported
+class QueryBudgetMiddlewareTests(APITestCase):
+    """APITests on QueryBudgetMiddleware"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # create post
+        author = User.objects.create_user(
+            username="testuser", email="testemail@gmail.com", password="abcde12345"
+        )
+        Post.objects.create(author=author, title="Hello", body="...")
+
+    def test_raise(self):
+        with mock.patch.object(PostListView, "query_budget", {"GET": 1}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(reverse("blog:post-list"))
+
+    @override_settings(QUERY_BUDGET_ACTION="log")
+    def test_log(self):
+        with mock.patch.object(PostListView, "query_budget", {"GET": 1}):
+            with self.assertLogs("core.middleware", "WARNING") as logs:
+                response = self.client.get(reverse("blog:post-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("over its budget of 1", logs.output[0])
+
+    def test_within_budget(self):
+        response = self.client.get(reverse("blog:post-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -1,9 +1,23 @@
 import datetime
+import json
+import uuid
+from io import StringIO
+from unittest import mock
 
+from asgiref.sync import sync_to_async
+from blog.async_views import render_sync_view
 from blog.models import Comment, Post
+from blog.search import index_posts
+from core.handlers import ASGIHandler
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from oauth2_provider.models import AccessToken, get_application_model
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
@@ -290,6 +304,13 @@ class CommentListViewAPITests(APITestCase):
         # anyone can see a comment list, including anonymous users
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_list_invalid_post(self):
+        """a post id that is not a UUID is not found, not a server error"""
+        url = reverse("blog:comment-list", kwargs={"post_pk": "garbage"})
+        response = APIClient().get(url, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_create(self):
         """check post method on comment list"""
         # get user
@@ -499,3 +520,816 @@ class CommentDetailViewAPITests(APITestCase):
         response = client.delete(url)
 
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+
+# test keyset pagination on list views
+class KeysetPaginationAPITests(APITestCase):
+    """APITests on cursor pages"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # create user
+        testuser = User.objects.create_user(
+            username="testuser",
+            email="testemail@gmail.com",
+            about="stupid",
+            password="abcde12345",
+        )
+        # create posts, the first three sharing one timestamp
+        created = timezone.now()
+        cls.posts = [
+            Post.objects.create(author=testuser, title=f"Post {i}", body="...")
+            for i in range(7)
+        ]
+        Post.objects.filter(id__in=[post.id for post in cls.posts[:3]]).update(
+            created=created
+        )
+        # create comments on the first post only
+        for i in range(3):
+            Comment.objects.create(author=testuser, post=cls.posts[0], body=f"{i}")
+        Comment.objects.create(author=testuser, post=cls.posts[1], body="other")
+
+    def test_walk_pages(self):
+        """following next links visits every post once, newest first"""
+        client = APIClient()
+
+        url = reverse("blog:post-list") + "?page_size=2"
+        seen = []
+        pages = 0
+        while url:
+            response = client.get(url, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen += [item["id"] for item in response.data["results"]]
+            url = response.data["next"]
+            pages += 1
+
+        expected = Post.objects.order_by("-created", "-id").values_list("id", flat=True)
+        self.assertEqual(seen, [str(pk) for pk in expected])
+        self.assertEqual(pages, 4)
+
+    def test_previous_page(self):
+        """the previous link of the second page returns the first page"""
+        client = APIClient()
+
+        url = reverse("blog:post-list") + "?page_size=3"
+        first = client.get(url, format="json")
+        second = client.get(first.data["next"], format="json")
+        back = client.get(second.data["previous"], format="json")
+
+        self.assertIsNone(first.data["previous"])
+        self.assertEqual(back.data["results"], first.data["results"])
+
+    def test_leading_bound(self):
+        """the cursor bounds the leading column on its own, for index range scans"""
+        client = APIClient()
+
+        url = reverse("blog:post-list") + "?page_size=2"
+        following = client.get(url, format="json").data["next"]
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(following, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sql = next(
+            query["sql"] for query in queries if 'FROM "blog_post"' in query["sql"]
+        )
+        self.assertIn('"blog_post"."created" <= ', sql)
+
+    def test_invalid_cursor(self):
+        """garbage cursors are rejected"""
+        client = APIClient()
+
+        url = reverse("blog:post-list") + "?cursor=cD1ub3Bl"
+        response = client.get(url, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_comments_scoped_to_post(self):
+        """comment list only pages through the comments of its post"""
+        client = APIClient()
+
+        url = reverse("blog:comment-list", kwargs={"post_pk": self.posts[0].id})
+        response = client.get(url + "?page_size=2", format="json")
+        following = client.get(response.data["next"], format="json")
+
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertEqual(len(following.data["results"]), 1)
+        self.assertIsNone(following.data["next"])
+
+
+# test denormalized comment counters on posts
+class CommentCounterAPITests(APITestCase):
+    """APITests on comment_count, last_commented_at and previews"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # create user
+        testuser = User.objects.create_user(
+            username="testuser",
+            email="testemail@gmail.com",
+            about="stupid",
+            password="abcde12345",
+        )
+        # create application for authentication
+        application = Application.objects.create(
+            name="Test Application",
+            redirect_uris="http://127.0.0.1:8000/noexist/callback",
+            user=testuser,
+            client_type="Application.CLIENT_CONFIDENTIAL",
+            authorization_grant_type="Application.GRANT_PASSWORD",
+        )
+        # create user token
+        AccessToken.objects.create(
+            user=testuser,
+            token="1234567890",
+            application=application,
+            expires=timezone.now() + datetime.timedelta(days=1),
+        )
+        # create post
+        cls.post = Post.objects.create(
+            author=testuser,
+            title="Hello World!",
+            body="How to hack NASA with html",
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer 1234567890")
+
+    def test_create_and_delete(self):
+        """counters follow comments created and deleted through the api"""
+        url = reverse("blog:comment-list", kwargs={"post_pk": self.post.id})
+        for body in ["one", "two", "three", "four"]:
+            response = self.client.post(url, {"body": body}, format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        post = Post.objects.get(id=self.post.id)
+        newest = Comment.objects.order_by("-created").first()
+        self.assertEqual(post.comment_count, 4)
+        self.assertEqual(post.last_commented_at, newest.created)
+
+        url = reverse(
+            "blog:comment-detail",
+            kwargs={"post_pk": self.post.id, "comment_pk": newest.id},
+        )
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        post = Post.objects.get(id=self.post.id)
+        newest = Comment.objects.order_by("-created").first()
+        self.assertEqual(post.comment_count, 3)
+        self.assertEqual(post.last_commented_at, newest.created)
+
+    def test_preview_and_include(self):
+        """posts embed a capped preview, ?include=comments a longer list"""
+        url = reverse("blog:comment-list", kwargs={"post_pk": self.post.id})
+        for body in ["one", "two", "three", "four"]:
+            self.client.post(url, {"body": body}, format="json")
+
+        url = reverse("blog:post-detail", kwargs={"post_pk": self.post.id})
+        response = self.client.get(url, format="json")
+        self.assertEqual(response.data["comment_count"], 4)
+        self.assertEqual(
+            [comment["body"] for comment in response.data["recent_comments"]],
+            ["four", "three", "two"],
+        )
+        self.assertNotIn("comments", response.data)
+
+        response = self.client.get(url + "?include=comments", format="json")
+        self.assertEqual(len(response.data["comments"]), 4)
+
+    def test_etag_follows_changes(self):
+        """new comments and edits change the post ETag"""
+        url = reverse("blog:post-detail", kwargs={"post_pk": self.post.id})
+        etag = self.client.get(url, format="json")["ETag"]
+
+        response = self.client.get(url, format="json", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        comments_url = reverse("blog:comment-list", kwargs={"post_pk": self.post.id})
+        self.client.post(comments_url, {"body": "one"}, format="json")
+        response = self.client.get(url, format="json", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["comment_count"], 1)
+
+        etag = response["ETag"]
+        self.client.patch(url, {"title": "Edited"}, format="json")
+        response = self.client.get(url, format="json", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["title"], "Edited")
+
+    def test_etag_follows_rename(self):
+        """renaming the author or a commenter changes the ETags"""
+        commenter = User.objects.create_user(
+            username="dev_user", email="devemail@gmail.com", password="abcde12345"
+        )
+        comment = Comment.objects.create(author=commenter, post=self.post, body="one")
+        url = reverse("blog:post-detail", kwargs={"post_pk": self.post.id})
+        comment_url = reverse(
+            "blog:comment-detail",
+            kwargs={"post_pk": self.post.id, "comment_pk": comment.id},
+        )
+        post_etag = self.client.get(url, format="json")["ETag"]
+        comment_etag = self.client.get(comment_url, format="json")["ETag"]
+
+        commenter = User.objects.get(pk=commenter.pk)
+        commenter.username = "dev"
+        commenter.save()
+        response = self.client.get(url, format="json", HTTP_IF_NONE_MATCH=post_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["recent_comments"][0]["author"], "dev")
+        response = self.client.get(
+            comment_url, format="json", HTTP_IF_NONE_MATCH=comment_etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["author"], "dev")
+
+        post_etag = self.client.get(url, format="json")["ETag"]
+        user_url = reverse("users:user-detail", kwargs={"user_pk": self.post.author_id})
+        response = self.client.patch(user_url, {"username": "alicia"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(url, format="json", HTTP_IF_NONE_MATCH=post_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["author"], "alicia")
+
+    def test_update_keeps_counters(self):
+        """editing a post does not write back stale counters"""
+        post = Post.objects.get(id=self.post.id)
+        url = reverse("blog:comment-list", kwargs={"post_pk": self.post.id})
+        self.client.post(url, {"body": "one"}, format="json")
+
+        post.title = "Edited"
+        post.save()
+
+        self.assertEqual(Post.objects.get(id=self.post.id).comment_count, 1)
+
+    def test_commenter_deleted(self):
+        """deleting a user recounts the posts their comments cascade from"""
+        url = reverse("blog:comment-list", kwargs={"post_pk": self.post.id})
+        self.client.post(url, {"body": "mine"}, format="json")
+        commenter = User.objects.create_user(
+            username="dev_user", email="devemail@gmail.com", password="abcde12345"
+        )
+        self.client.force_authenticate(commenter)
+        self.client.post(url, {"body": "first"}, format="json")
+        self.client.post(url, {"body": "second"}, format="json")
+        self.assertEqual(Post.objects.get(id=self.post.id).comment_count, 3)
+
+        commenter.delete()
+
+        post = Post.objects.get(id=self.post.id)
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(post.last_commented_at, Comment.objects.get(post=post).created)
+
+    def test_admin_delete(self):
+        """comments deleted from the admin's changelist are uncounted"""
+        url = reverse("blog:comment-list", kwargs={"post_pk": self.post.id})
+        for body in ["one", "two"]:
+            self.client.post(url, {"body": body}, format="json")
+        admin = User.objects.create_superuser(
+            username="admin", email="admin@gmail.com", password="abcde12345"
+        )
+        self.client.force_login(admin)
+
+        response = self.client.post(
+            reverse("admin:blog_comment_changelist"),
+            {
+                "action": "delete_selected",
+                "_selected_action": [
+                    str(pk) for pk in Comment.objects.values_list("pk", flat=True)
+                ],
+                "post": "yes",
+            },
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertFalse(Comment.objects.exists())
+        post = Post.objects.get(id=self.post.id)
+        self.assertEqual(post.comment_count, 0)
+        self.assertIsNone(post.last_commented_at)
+        self.assertEqual(User.objects.get(username="testuser").comment_count, 0)
+
+
+# test denormalized post and comment stats on users
+class UserStatsAPITests(APITestCase):
+    """APITests on post_count, comment_count and last_active_at"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # create users
+        cls.author = User.objects.create_user(
+            username="testuser", email="testemail@gmail.com", password="abcde12345"
+        )
+        cls.reader = User.objects.create_user(
+            username="dev_user", email="devemail@gmail.com", password="abcde12345"
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def get_stats(self, user):
+        url = reverse("users:user-detail", kwargs={"user_pk": user.id})
+        response = self.client.get(url, format="json")
+        last_active_at = response.data["last_active_at"]
+        return [
+            response.data["post_count"],
+            response.data["comment_count"],
+            last_active_at and parse_datetime(last_active_at),
+        ]
+
+    def test_create_and_delete(self):
+        """stats follow posts and comments created and deleted through the api"""
+        self.client.force_authenticate(self.author)
+        response = self.client.post(
+            reverse("blog:post-list"), {"title": "Hi", "body": "There"}, format="json"
+        )
+        post = Post.objects.get(id=response.data["id"])
+        self.client.force_authenticate(self.reader)
+        url = reverse("blog:comment-list", kwargs={"post_pk": post.id})
+        for body in ["one", "two"]:
+            self.client.post(url, {"body": body}, format="json")
+
+        self.assertEqual(self.get_stats(self.author)[:2], [1, 0])
+        post_count, comment_count, last_active_at = self.get_stats(self.reader)
+        self.assertEqual([post_count, comment_count], [0, 2])
+        newest = Comment.objects.order_by("-created").first()
+        self.assertEqual(last_active_at, newest.created)
+
+        newest_url = reverse(
+            "blog:comment-detail", kwargs={"post_pk": post.id, "comment_pk": newest.id}
+        )
+        self.client.delete(newest_url)
+        self.assertEqual(self.get_stats(self.reader)[1], 1)
+
+        # deleting the post takes the remaining comment from its author too
+        self.client.force_authenticate(self.author)
+        self.client.delete(reverse("blog:post-detail", kwargs={"post_pk": post.id}))
+        self.assertEqual(self.get_stats(self.author), [0, 0, None])
+        self.assertEqual(self.get_stats(self.reader), [0, 0, None])
+
+    def test_detail_reads_no_counts(self):
+        """the profile reads the stored stats, without COUNT queries"""
+        url = reverse("users:user-detail", kwargs={"user_pk": self.author.id})
+        with self.assertNumQueries(1):
+            self.client.get(url, format="json")
+
+    def test_repair(self):
+        """the repair command recomputes drifted stats"""
+        post = Post.objects.create(author=self.author, title="Hi", body="There")
+        comment = Comment.objects.create(author=self.reader, post=post, body="Hey")
+        User.objects.filter(pk=self.reader.pk).update(post_count=5, comment_count=0)
+
+        out = StringIO()
+        call_command("repair_user_stats", "--batch-size", "1", stdout=out)
+
+        self.assertEqual(self.get_stats(self.author)[:2], [1, 0])
+        self.assertEqual(
+            self.get_stats(self.reader),
+            [0, 1, comment.created],
+        )
+        self.assertIn("Checked 2 users, repaired 2.", out.getvalue())
+
+
+# test full-text search
+class PostSearchAPITests(APITestCase):
+    """APITests on the search endpoint"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # create user
+        testuser = User.objects.create_user(
+            username="testuser",
+            email="testemail@gmail.com",
+            about="stupid",
+            password="abcde12345",
+        )
+        # create posts, indexed as they are saved
+        cls.nasa = Post.objects.create(
+            author=testuser, title="Hacking NASA", body="with html and css"
+        )
+        cls.html = Post.objects.create(
+            author=testuser, title="Hello World!", body="learning html today"
+        )
+        cls.other = Post.objects.create(
+            author=testuser, title="Gardening", body="tomatoes and basil"
+        )
+
+    def search(self, query, **params):
+        client = APIClient()
+        url = reverse("blog:post-search")
+        return client.get(url, {"q": query, **params}, format="json")
+
+    def test_ranked_results(self):
+        """title matches rank above body matches"""
+        response = self.search("nasa html")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [post["id"] for post in response.data["results"]], [str(self.nasa.id)]
+        )
+
+        response = self.search("html")
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_stemming(self):
+        response = self.search("hack")
+        self.assertEqual(response.data["results"][0]["id"], str(self.nasa.id))
+
+    def test_pages(self):
+        """the cursor continues after the last hit"""
+        first = self.search("html", page_size=1)
+        self.assertEqual(len(first.data["results"]), 1)
+
+        second = APIClient().get(first.data["next"], format="json")
+        self.assertEqual(len(second.data["results"]), 1)
+        self.assertIsNone(second.data["next"])
+        self.assertNotEqual(
+            first.data["results"][0]["id"], second.data["results"][0]["id"]
+        )
+
+    def test_index_follows_writes(self):
+        """edits and deletes update the index"""
+        post = Post.objects.get(id=self.other.id)
+        post.body = "tomatoes and html"
+        post.save()
+        self.assertEqual(len(self.search("html").data["results"]), 3)
+
+        post.delete()
+        self.assertEqual(len(self.search("tomatoes").data["results"]), 0)
+
+    def test_index_repeated_post(self):
+        """a post listed twice is indexed once"""
+        index_posts([self.nasa, self.nasa])
+        self.assertEqual(len(self.search("nasa").data["results"]), 1)
+
+    def test_missing_query(self):
+        response = self.search("")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unavailable(self):
+        """databases without full-text search answer 503, not 500"""
+        with mock.patch("blog.views.get_search_backend", return_value=None):
+            response = self.search("html")
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response.data["detail"].code, "search_unavailable")
+
+
+class BulkWriteAPITests(APITestCase):
+    """APITests on the bulk post and comment endpoints"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # create users
+        cls.testuser = User.objects.create_user(
+            username="testuser",
+            email="testemail@gmail.com",
+            about="stupid",
+            password="abcde12345",
+        )
+        cls.otheruser = User.objects.create_user(
+            username="otheruser",
+            email="otheremail@gmail.com",
+            about="stupid",
+            password="abcde12345",
+        )
+        # create application for authentication
+        application = Application.objects.create(
+            name="Test Application",
+            redirect_uris="http://127.0.0.1:8000/noexist/callback",
+            user=cls.testuser,
+            client_type="Application.CLIENT_CONFIDENTIAL",
+            authorization_grant_type="Application.GRANT_PASSWORD",
+        )
+        # create user token
+        AccessToken.objects.create(
+            user=cls.testuser,
+            token="1234567890",
+            application=application,
+            expires=timezone.now() + datetime.timedelta(days=1),
+        )
+        # create posts
+        cls.post = Post.objects.create(
+            author=cls.testuser, title="Hello World!", body="How to hack NASA with html"
+        )
+        cls.other_post = Post.objects.create(
+            author=cls.otheruser, title="Not yours", body="Hands off"
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer 1234567890")
+
+    def test_anonymous(self):
+        """bulk writes need authentication"""
+        self.client.credentials()
+        response = self.client.post(reverse("blog:post-bulk"), [], format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_create_posts(self):
+        """posts are created in one request"""
+        data = [{"title": f"Post {i}", "body": "bulk"} for i in range(5)]
+        response = self.client.post(reverse("blog:post-bulk"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 5)
+        self.assertEqual(
+            Post.objects.filter(author=self.testuser, body="bulk").count(), 5
+        )
+
+    def test_create_invalid_writes_nothing(self):
+        """one invalid item fails the whole request with per-item results"""
+        data = [{"title": "Fine", "body": "bulk"}, {"body": "no title"}]
+        response = self.client.post(reverse("blog:post-bulk"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0]["status"], status.HTTP_424_FAILED_DEPENDENCY)
+        self.assertEqual(response.data[1]["status"], status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Post.objects.filter(body="bulk").exists())
+
+    def test_not_a_list(self):
+        """the body must be a list"""
+        response = self.client.post(
+            reverse("blog:post-bulk"), {"title": "x", "body": "y"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_patch_posts(self):
+        """posts are updated and their version bumped"""
+        version = self.post.version
+        data = [{"id": str(self.post.id), "title": "Renamed"}]
+        response = self.client.patch(reverse("blog:post-bulk"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.title, "Renamed")
+        self.assertEqual(self.post.version, version + 1)
+
+    def test_patch_other_users_post(self):
+        """a post of another user fails the request and nothing is written"""
+        data = [
+            {"id": str(self.post.id), "title": "Renamed"},
+            {"id": str(self.other_post.id), "title": "Taken"},
+        ]
+        response = self.client.patch(reverse("blog:post-bulk"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[1]["status"], status.HTTP_403_FORBIDDEN)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.title, "Hello World!")
+
+    def test_patch_bare_ids(self):
+        """items that are not objects fail on their own, with a 400 result"""
+        data = [{"id": str(self.post.id), "title": "Renamed"}, 1, str(self.post.id)]
+        response = self.client.patch(reverse("blog:post-bulk"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            [result["status"] for result in response.data],
+            [status.HTTP_424_FAILED_DEPENDENCY, 400, 400],
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.title, "Hello World!")
+
+    def test_repeated_ids(self):
+        """an id listed twice fails the request instead of writing twice"""
+        url = reverse("blog:post-bulk")
+        data = [
+            {"id": str(self.post.id), "title": "Renamed"},
+            {"id": str(self.post.id), "title": "Renamed again"},
+        ]
+        response = self.client.patch(url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            [result["status"] for result in response.data],
+            [status.HTTP_424_FAILED_DEPENDENCY, 400],
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.title, "Hello World!")
+
+        response = self.client.delete(url, [str(self.post.id)] * 2, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[1]["status"], 400)
+        self.assertTrue(Post.objects.filter(id=self.post.id).exists())
+
+    def test_delete_posts(self):
+        """posts are deleted by id, unknown ids are reported"""
+        extra = Post.objects.create(author=self.testuser, title="Extra", body="gone")
+        url = reverse("blog:post-bulk")
+        response = self.client.delete(url, [str(uuid.uuid4())], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0]["status"], status.HTTP_404_NOT_FOUND)
+
+        response = self.client.delete(
+            url, [str(self.post.id), str(extra.id)], format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Post.objects.filter(author=self.testuser).exists())
+
+    def test_comments_update_counters(self):
+        """bulk comment writes keep the post counters right"""
+        url = reverse("blog:comment-bulk")
+        data = [
+            {"post": str(self.post.id), "body": "one"},
+            {"post": str(self.post.id), "body": "two"},
+            {"post": str(self.other_post.id), "body": "three"},
+        ]
+        response = self.client.post(url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.post.refresh_from_db()
+        self.other_post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 2)
+        self.assertEqual(self.other_post.comment_count, 1)
+        self.assertIsNotNone(self.post.last_commented_at)
+
+        response = self.client.delete(
+            url, [item["id"] for item in response.data[:2]], format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+        self.assertIsNone(self.post.last_commented_at)
+
+    def test_comments_unknown_post(self):
+        """a comment on a missing post fails the request"""
+        data = [{"post": str(uuid.uuid4()), "body": "lost"}]
+        response = self.client.post(reverse("blog:comment-bulk"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0]["status"], status.HTTP_404_NOT_FOUND)
+        self.assertFalse(Comment.objects.exists())
+
+
+class ExportAPITests(APITestCase):
+    """APITests on the streaming post and comment exports"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # create users
+        cls.admin = User.objects.create_superuser(
+            username="admin", email="admin@gmail.com", password="abcde12345"
+        )
+        cls.testuser = User.objects.create_user(
+            username="testuser", email="testemail@gmail.com", password="abcde12345"
+        )
+        # create posts and comments
+        cls.posts = [
+            Post.objects.create(author=cls.testuser, title=f"Post {i}", body="...")
+            for i in range(5)
+        ]
+        for post in cls.posts[:2]:
+            Comment.objects.create(author=cls.admin, post=post, body="So?")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def read(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_admin_only(self):
+        """exports are for staff"""
+        self.client.force_authenticate(self.testuser)
+        response = self.client.get(reverse("blog:post-export"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_json(self):
+        """one JSON array holding every post"""
+        response = self.client.get(reverse("blog:post-export"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/json")
+        records = json.loads(self.read(response))
+        self.assertEqual(
+            [record["id"] for record in records],
+            sorted(str(post.id) for post in self.posts),
+        )
+        self.assertEqual(records[0]["author"], "testuser")
+
+    def test_ndjson_resume(self):
+        """one record per line, ?after= picks up past the last id received"""
+        url = reverse("blog:comment-export") + "?output=ndjson"
+        lines = self.read(self.client.get(url)).splitlines()
+        self.assertEqual(len(lines), 2)
+
+        first = json.loads(lines[0])
+        response = self.client.get(url + f"&after={first['id']}")
+        self.assertEqual(
+            [json.loads(line) for line in self.read(response).splitlines()],
+            [json.loads(lines[1])],
+        )
+
+    def test_empty(self):
+        response = self.client.get(reverse("blog:post-export") + f"?after={'f' * 32}")
+        self.assertEqual(json.loads(self.read(response)), [])
+
+    def test_invalid_params(self):
+        response = self.client.get(reverse("blog:post-export") + "?output=xml")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse("blog:post-export") + "?after=nope")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_command(self):
+        """the management command writes the same records in small chunks"""
+        out = StringIO()
+        call_command("export_blog", "posts", "--chunk-size", "2", stdout=out)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(records), 5)
+
+
+# test the async fronts the ASGI entry point routes cached reads to
+@override_settings(
+    ROOT_URLCONF="config.asgi_urls",
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+)
+class AsyncReadAPITests(TransactionTestCase):
+    """tests on the async list and detail views, their pool runs other threads"""
+
+    def setUp(self):
+        cache.clear()
+        self.testuser = User.objects.create_user(
+            username="testuser", email="testemail@gmail.com", password="abcde12345"
+        )
+        self.post = Post.objects.create(
+            author=self.testuser, title="Hello World!", body="How to hack NASA"
+        )
+        self.list_url = reverse("blog:post-list")
+        self.detail_url = reverse("blog:post-detail", kwargs={"post_pk": self.post.id})
+        # the sync views fill the cache
+        with self.settings(ROOT_URLCONF="config.urls"):
+            self.cached = {
+                url: self.client.get(url) for url in [self.list_url, self.detail_url]
+            }
+
+    async def test_cache_hits_skip_the_pool(self):
+        with mock.patch("blog.async_views.arun_in_executor") as run:
+            response = await self.async_client.get(self.list_url)
+        run.assert_not_called()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, self.cached[self.list_url].content)
+        self.assertEqual(response["Allow"], self.cached[self.list_url]["Allow"])
+
+    async def test_handler(self):
+        """the entry point in config.asgi, without Django's thread per request"""
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": self.list_url,
+            "query_string": b"",
+            "headers": [(b"host", b"testserver")],
+        }
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        async def send(message):
+            messages.append(message)
+
+        # Django's own middleware adapts itself onto a thread
+        with self.settings(MIDDLEWARE=["core.middleware.QueryBudgetMiddleware"]):
+            handler = ASGIHandler()
+        with mock.patch("asgiref.sync.SyncToAsync.__call__") as hop:
+            await handler(scope, receive, send)
+        hop.assert_not_called()
+
+        self.assertEqual(messages[0]["status"], status.HTTP_200_OK)
+        self.assertEqual(messages[1]["body"], self.cached[self.list_url].content)
+
+    async def test_detail(self):
+        cached = self.cached[self.detail_url]
+        response = await self.async_client.get(self.detail_url)
+
+        self.assertEqual(response.content, cached.content)
+        self.assertEqual(response["ETag"], cached["ETag"])
+
+        response = await self.async_client.get(
+            self.detail_url, **{"If-None-Match": cached["ETag"]}
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_fallback(self):
+        """misses, other formats and credentials get the DRF view"""
+        url = reverse("blog:comment-list", kwargs={"post_pk": self.post.id})
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"], [])
+
+        response = await self.async_client.get(self.list_url, accept="text/html")
+        self.assertContains(response, "<html", status_code=status.HTTP_200_OK)
+
+        with mock.patch(
+            "blog.async_views.render_sync_view", wraps=render_sync_view
+        ) as render:
+            response = await self.async_client.get(
+                self.list_url, authorization="Bearer nope"
+            )
+        render.assert_called_once()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = await self.async_client.get(
+            reverse("blog:post-detail", kwargs={"post_pk": uuid.uuid4()})
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_write(self):
+        await sync_to_async(self.async_client.force_login)(self.testuser)
+        response = await self.async_client.post(
+            self.list_url,
+            {"title": "Async", "body": "Through the pool"},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
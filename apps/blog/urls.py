@@ -1,11 +1,23 @@
 from django.urls import path
 
-from .views import CommentDetailView, CommentListView, PostDetailView, PostListView
+from .views import (
+    CommentBulkView,
+    CommentDetailView,
+    CommentListView,
+    ExportView,
+    PostBulkView,
+    PostDetailView,
+    PostListView,
+    PostSearchView,
+)
 
 app_name = "blog"
 
 urlpatterns = [
     path("posts/", PostListView.as_view(), name="post-list"),
+    path("posts/search/", PostSearchView.as_view(), name="post-search"),
+    path("posts/bulk/", PostBulkView.as_view(), name="post-bulk"),
+    path("posts/export/", ExportView.as_view(export="posts"), name="post-export"),
     path("posts/<post_pk>/", PostDetailView.as_view(), name="post-detail"),
     path("posts/<post_pk>/comments/", CommentListView.as_view(), name="comment-list"),
     path(
@@ -13,4 +25,10 @@ urlpatterns = [
         CommentDetailView.as_view(),
         name="comment-detail",
     ),
+    path("comments/bulk/", CommentBulkView.as_view(), name="comment-bulk"),
+    path(
+        "comments/export/",
+        ExportView.as_view(export="comments"),
+        name="comment-export",
+    ),
 ]
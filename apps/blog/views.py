@@ -1,37 +1,223 @@
+import uuid
+
+from core.mixins import OptimizedQuerysetMixin, ValuesListMixin
+from django.db import transaction
+from django.core.exceptions import ValidationError
+from django.db.models import F
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from rest_framework import generics, permissions
+from rest_framework import exceptions, generics, permissions, views
 
+from .bulk import BulkWriteView
+from .cache import comments_changed, posts_changed
+from .counters import (
+    comment_added,
+    comment_changed,
+    comments_removed,
+    post_added,
+    recount_comments,
+    recount_users,
+    user_comment_added,
+)
+from .export import OUTPUTS, export_records, parse_after, render_records
+from .mixins import CachedListMixin, CachedRetrieveMixin
 from .models import Comment, Post
 from .permissions import IsAuthorOrReadOnly
-from .serializers import CommentSerializer, PostSerializer
+from .search import (
+    SearchPagination,
+    SearchUnavailable,
+    get_search_backend,
+    index_posts,
+)
+from .serializers import (
+    CommentBulkCreateSerializer,
+    CommentSerializer,
+    PostSerializer,
+)
 
 
-class PostListView(generics.ListCreateAPIView):
+class PostListView(
+    CachedListMixin,
+    ValuesListMixin,
+    OptimizedQuerysetMixin,
+    generics.ListCreateAPIView,
+):
     queryset = Post.objects.all()
     serializer_class = PostSerializer
+    cache_collection = "posts"
+    query_budget = {"GET": 3, "POST": 7}
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        with transaction.atomic():
+            post = serializer.save(author=self.request.user)
+            post_added(post)
+
+
+class PostBulkView(BulkWriteView):
+    """Create, update or delete many posts in one transaction"""
+
+    queryset = Post.objects.all()
+    serializer_class = PostSerializer
+
+    def after_create(self, objects):
+        recount_users({obj.author_id for obj in objects})
+        index_posts(objects)
+        posts_changed()
+
+    def after_update(self, objects, fields):
+        if fields & {"title", "body"}:
+            index_posts(objects)
+        posts_changed()
 
 
-class PostDetailView(generics.RetrieveUpdateDestroyAPIView):
+class PostSearchView(OptimizedQuerysetMixin, generics.GenericAPIView):
+    """Ranked full-text search over post titles and bodies"""
+
+    queryset = Post.objects.all()
+    serializer_class = PostSerializer
+    pagination_class = SearchPagination
+    query_budget = {"GET": 4}
+
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            raise exceptions.ValidationError({"q": "This query parameter is required."})
+
+        backend = get_search_backend()
+        if backend is None:
+            raise SearchUnavailable()
+
+        hits = self.paginator.paginate_search(backend, query, request)
+        posts = self.get_queryset().in_bulk([post_id for post_id, _ in hits])
+        ranked = [posts[post_id] for post_id, _ in hits if post_id in posts]
+        serializer = self.get_serializer(ranked, many=True)
+
+        return self.get_paginated_response(serializer.data)
+
+
+class PostDetailView(
+    CachedRetrieveMixin, OptimizedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView
+):
     queryset = Post.objects.all()
     serializer_class = PostSerializer
     permission_classes = (IsAuthorOrReadOnly,)
     lookup_url_kwarg = "post_pk"
+    query_budget = {"GET": 4, "PUT": 6, "PATCH": 6, "DELETE": 8}
 
 
-class CommentListView(generics.ListCreateAPIView):
+class CommentListView(
+    CachedListMixin,
+    ValuesListMixin,
+    OptimizedQuerysetMixin,
+    generics.ListCreateAPIView,
+):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
+    query_budget = {"GET": 2, "POST": 7}
+
+    def get_cache_collection(self):
+        return f"comments:{self.kwargs.get('post_pk')}"
+
+    def get_post_id(self):
+        """the post id from the URL, 404 if it is not a UUID"""
+        try:
+            return uuid.UUID(str(self.kwargs.get("post_pk")))
+        except ValueError:
+            raise exceptions.NotFound()
+
+    def get_queryset(self):
+        return super().get_queryset().filter(post_id=self.get_post_id())
 
     def perform_create(self, serializer):
-        post = get_object_or_404(Post, pk=self.kwargs.get("post_pk"))
-        serializer.save(author=self.request.user, post=post)
+        post = get_object_or_404(Post, pk=self.get_post_id())
+        with transaction.atomic():
+            comment = serializer.save(author=self.request.user, post=post)
+            comment_added(comment)
+            user_comment_added(comment)
 
 
-class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
+class CommentDetailView(
+    CachedRetrieveMixin, OptimizedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView
+):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
     permission_classes = (IsAuthorOrReadOnly,)
     lookup_url_kwarg = "comment_pk"
+    query_budget = {"GET": 3, "PUT": 6, "PATCH": 6, "DELETE": 7}
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            comment = serializer.save()
+            comment_changed(comment)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            comments_removed(instance.post_id)
+            recount_users([instance.author_id])
+            comments_changed(instance.post_id)
+
+
+class CommentBulkView(BulkWriteView):
+    """Create, update or delete many comments, across posts, in one transaction"""
+
+    queryset = Comment.objects.all()
+
+    def get_serializer_class(self):
+        if self.request.method == "POST":
+            return CommentBulkCreateSerializer
+        return CommentSerializer
+
+    def check_create(self, pending):
+        post_ids = {obj.post_id for obj, _ in pending}
+        existing = set(
+            Post.objects.filter(pk__in=post_ids).values_list("pk", flat=True)
+        )
+        for obj, result in pending:
+            if obj.post_id not in existing:
+                result.update(status=404, errors={"post": ["Post not found."]})
+
+    def after_create(self, objects):
+        post_ids = {obj.post_id for obj in objects}
+        recount_comments(post_ids)
+        recount_users({obj.author_id for obj in objects})
+        comments_changed(*post_ids)
+
+    def after_update(self, objects, fields):
+        post_ids = {obj.post_id for obj in objects}
+        Post.objects.filter(pk__in=post_ids).update(version=F("version") + 1)
+        comments_changed(*post_ids)
+
+    def after_delete(self, objects):
+        post_ids = {obj.post_id for obj in objects}
+        recount_comments(post_ids)
+        recount_users({obj.author_id for obj in objects})
+        comments_changed(*post_ids)
+
+
+class ExportView(views.APIView):
+    """Stream every post or comment as JSON or NDJSON, resumable with ?after=<id>"""
+
+    permission_classes = (permissions.IsAdminUser,)
+    export = None
+
+    def get(self, request):
+        output = request.query_params.get("output", "json")
+        if output not in OUTPUTS:
+            raise exceptions.ValidationError(
+                {"output": f"Choose one of: {', '.join(OUTPUTS)}."}
+            )
+        try:
+            after = parse_after(request.query_params.get("after"))
+        except ValidationError as error:
+            raise exceptions.ValidationError({"after": error.messages})
+
+        records = export_records(self.export, after=after)
+        response = StreamingHttpResponse(
+            render_records(records, output), content_type=OUTPUTS[output]
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{self.export}.{output}"'
+        )
+
+        return response
@@ -0,0 +1,103 @@
+from django.conf import settings
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, Warning, register
+from django.core.checks.security import base as security
+from django.core.checks.security import csrf
+from django.test.utils import override_settings
+from django.utils.module_loading import import_string
+
+# Django's security checks find its middleware by dotted path only, so
+# they miss the core.middleware subclasses of these
+STOCK_MIDDLEWARE = (
+    "django.middleware.security.SecurityMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+)
+
+# the checks that report a missing middleware, silenced in the settings
+# and reported again here under these ids
+PRESENCE_CHECKS = {
+    security.check_security_middleware: "core.W001",
+    security.check_xframe_options_middleware: "core.W002",
+    csrf.check_csrf_middleware: "core.W003",
+}
+
+# the checks that only run while the middleware is there
+SETTINGS_CHECKS = (
+    security.check_sts,
+    security.check_sts_include_subdomains,
+    security.check_sts_preload,
+    security.check_content_type_nosniff,
+    security.check_ssl_redirect,
+    security.check_xframe_deny,
+    security.check_referrer_policy,
+    security.check_cross_origin_opener_policy,
+    csrf.check_csrf_cookie_secure,
+)
+
+
+def check_shared_cache(alias, setting, id):
+    """
+    errors for a ``setting`` naming a cache that is missing or per process
+
+    For state every worker must see at once, such as revocations or replica
+    pins, which a local memory cache would keep to the process that wrote
+    them.
+    """
+    config = settings.CACHES.get(alias)
+    if config is None:
+        return [Error(f"{setting} names the cache {alias!r}, not in CACHES.", id=id)]
+
+    if issubclass(import_string(config["BACKEND"]), (LocMemCache, DummyCache)):
+        return [
+            Error(
+                f"{setting} names the cache {alias!r}, which is not shared "
+                "between processes.",
+                hint="Use a cache all processes reach: database, memcached or Redis.",
+                id=id,
+            )
+        ]
+
+    return []
+
+
+@register(Tags.caches)
+def check_replica_pin_cache(app_configs, **kwargs):
+    """pins kept per process would let other workers read from a stale replica"""
+    if not settings.DATABASE_REPLICAS:
+        return []
+
+    return check_shared_cache(
+        settings.REPLICA_PIN_CACHE_ALIAS, "REPLICA_PIN_CACHE_ALIAS", "core.E001"
+    )
+
+
+def get_stock_middleware(path):
+    """the Django middleware in STOCK_MIDDLEWARE ``path`` extends, or ``path``"""
+    middleware = import_string(path)
+    for stock in STOCK_MIDDLEWARE:
+        if issubclass(middleware, import_string(stock)):
+            return stock
+
+    return path
+
+
+@register(Tags.security, deploy=True)
+def check_middleware_security(app_configs, **kwargs):
+    """Django's middleware security checks, run as if MIDDLEWARE named its own"""
+    middleware = [get_stock_middleware(path) for path in settings.MIDDLEWARE]
+    # with Django's own paths in MIDDLEWARE its checks already ran
+    subclassed = middleware != list(settings.MIDDLEWARE)
+    with override_settings(MIDDLEWARE=middleware):
+        messages = [
+            Warning(message.msg, hint=message.hint, id=id)
+            for check, id in PRESENCE_CHECKS.items()
+            for message in check(app_configs)
+        ]
+        if subclassed:
+            messages += [
+                message for check in SETTINGS_CHECKS for message in check(app_configs)
+            ]
+
+    return messages
@@ -0,0 +1,31 @@
+from django.db.backends.postgresql.base import DatabaseWrapper as BaseDatabaseWrapper
+from psycopg2 import extensions
+
+from core.db.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, BaseDatabaseWrapper):
+    """the PostgreSQL backend, with connections from a per-process pool"""
+
+    def configure_pooled_connection(self, connection):
+        # Django reads the level from the wrapper, which it sets on connect
+        self.isolation_level = self.settings_dict["OPTIONS"].get(
+            "isolation_level", connection.isolation_level
+        )
+
+    def check_pooled_connection(self, connection):
+        if connection.closed:
+            return False
+
+        return super().check_pooled_connection(connection)
+
+    def reset_pooled_connection(self, connection):
+        if connection.closed:
+            return False
+        status = connection.get_transaction_status()
+        if status == extensions.TRANSACTION_STATUS_IDLE:
+            return True
+        if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+
+        return super().reset_pooled_connection(connection)
@@ -0,0 +1,74 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3.base import DatabaseWrapper as BaseDatabaseWrapper
+
+from core.db.pool import PooledDatabaseWrapperMixin
+
+# applied in this order to every new connection, OPTIONS["pragmas"] overrides
+PRAGMAS = {
+    # readers no longer block the writer, nor the writer readers
+    "journal_mode": "WAL",
+    # wait for the write lock, in ms, instead of failing with "locked"
+    "busy_timeout": 5000,
+    # WAL stays consistent, only a power loss may undo the last commits
+    "synchronous": "NORMAL",
+    "mmap_size": 128 * 1024 * 1024,
+    # negative is in KiB, per connection
+    "cache_size": -20000,
+}
+
+TRANSACTION_MODES = ("DEFERRED", "IMMEDIATE", "EXCLUSIVE")
+
+
+class TunedDatabaseWrapper(BaseDatabaseWrapper):
+    """
+    the SQLite backend with pragmas for concurrent use and IMMEDIATE writes
+
+    ``atomic()`` starts transactions with ``BEGIN IMMEDIATE``, taking the
+    write lock up front, through the busy timeout. A deferred transaction
+    that reads and then writes cannot wait for it: SQLite answers "database
+    is locked" at once, as waiting could deadlock two such writers. The
+    OPTIONS ``transaction_mode`` picks another mode, ``pragmas`` overrides
+    or adds pragmas, a None value leaves one at SQLite's default.
+    """
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        kwargs.pop("pragmas", None)
+        kwargs.pop("transaction_mode", None)
+        return kwargs
+
+    def get_pragmas(self):
+        pragmas = {**PRAGMAS, **self.settings_dict["OPTIONS"].get("pragmas", {})}
+        return {name: value for name, value in pragmas.items() if value is not None}
+
+    def get_transaction_mode(self):
+        mode = self.settings_dict["OPTIONS"].get("transaction_mode", "IMMEDIATE")
+        if mode.upper() not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"transaction_mode must be one of {', '.join(TRANSACTION_MODES)}"
+            )
+
+        return mode.upper()
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in self.get_pragmas().items():
+            connection.execute(f"PRAGMA {name} = {value}")
+
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f"BEGIN {self.get_transaction_mode()}")
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, TunedDatabaseWrapper):
+    """
+    the tuned SQLite backend, with connections from a per-process pool
+
+    Opening one is cheap but registers Django's dozens of SQL functions and
+    runs the pragmas. In-memory databases are never pooled, each
+    connection is a database.
+    """
+
+    def pooling_enabled(self):
+        return super().pooling_enabled() and not self.is_in_memory_db()
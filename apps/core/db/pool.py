@@ -0,0 +1,284 @@
+import os
+import threading
+import time
+from collections import deque
+
+from django.db.utils import OperationalError
+
+_pools = {}
+_lock = threading.Lock()
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class ConnectionPool:
+    """
+    process-wide pool of open DBAPI connections to one database
+
+    Checkouts take the most recently returned idle connection, so a quiet
+    process keeps few of them warm, and open a new one while fewer than
+    ``max_size`` are open; past that they wait up to ``timeout`` seconds
+    and raise PoolTimeout. A connection idle for ``health_check_interval``
+    seconds is checked before it is handed out, one older than
+    ``max_lifetime`` is replaced.
+    """
+
+    def __init__(
+        self,
+        max_size=10,
+        timeout=10.0,
+        health_check_interval=30.0,
+        max_lifetime=None,
+        key=None,
+    ):
+        # what the connections were opened with
+        self.key = key
+        self.closed = False
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.max_lifetime = max_lifetime
+        self._condition = threading.Condition()
+        # (connection, opened at, returned at), most recently returned last
+        self._idle = deque()
+        self._opened_at = {}
+        self._size = 0
+        self.checkouts = self.created = self.discarded = 0
+        self.waits = self.timeouts = self.errors = self.health_check_failures = 0
+        self.wait_time = 0.0
+
+    def checkout(self, connect, is_usable):
+        """
+        an open connection, from ``connect()`` if none is idle
+
+        ``is_usable(connection)`` is the health check, it returns False for a
+        connection that has to be thrown away.
+        """
+        started = time.monotonic()
+        waited = False
+        while True:
+            with self._condition:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = started + self.timeout - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        self.wait_time += time.monotonic() - started
+                        raise PoolTimeout(
+                            f"no database connection free after {self.timeout}s, "
+                            f"all {self.max_size} are in use"
+                        )
+                    waited = True
+                    self._condition.wait(remaining)
+                entry = self._idle.pop() if self._idle else None
+                if entry is None:
+                    # hold the slot while connecting, outside the lock
+                    self._size += 1
+
+            if entry is None:
+                connection = self._open(connect)
+                break
+
+            connection, opened_at, returned_at = entry
+            now = time.monotonic()
+            if self.max_lifetime is not None and now - opened_at > self.max_lifetime:
+                self._discard(connection)
+                continue
+            if now - returned_at > self.health_check_interval and not is_usable(
+                connection
+            ):
+                with self._condition:
+                    self.health_check_failures += 1
+                self._discard(connection)
+                continue
+            break
+
+        with self._condition:
+            self.checkouts += 1
+            if waited:
+                self.waits += 1
+                self.wait_time += time.monotonic() - started
+
+        return connection
+
+    def checkin(self, connection, reusable=True):
+        """give ``connection`` back, or close it when it is not ``reusable``"""
+        with self._condition:
+            reusable = reusable and not self.closed
+        if not reusable:
+            self._discard(connection)
+            return
+
+        with self._condition:
+            opened_at = self._opened_at.get(id(connection), time.monotonic())
+            self._idle.append((connection, opened_at, time.monotonic()))
+            self._condition.notify()
+
+    def close(self):
+        """close the idle connections, checked out ones close on checkin"""
+        with self._condition:
+            self.closed = True
+            idle, self._idle = self._idle, deque()
+        for connection, _, _ in idle:
+            self._discard(connection)
+
+    def stats(self):
+        with self._condition:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "checkouts": self.checkouts,
+                "created": self.created,
+                "discarded": self.discarded,
+                "waits": self.waits,
+                "wait_time": self.wait_time,
+                "timeouts": self.timeouts,
+                "errors": self.errors,
+                "health_check_failures": self.health_check_failures,
+            }
+
+    def _open(self, connect):
+        try:
+            connection = connect()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self.errors += 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._opened_at[id(connection)] = time.monotonic()
+            self.created += 1
+
+        return connection
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self._condition:
+            self._opened_at.pop(id(connection), None)
+            self._size -= 1
+            self.discarded += 1
+            self._condition.notify()
+
+
+def get_pool(alias, settings_dict, key=None):
+    """
+    the pool of the database ``alias``, created from its ``POOL`` settings
+
+    ``key`` stands for the connection parameters, a pool of connections
+    opened with others, as before the test runner renames the database,
+    is closed and replaced.
+    """
+    pool = _pools.get(alias)
+    if pool is None or pool.key != key:
+        with _lock:
+            pool = _pools.get(alias)
+            if pool is None or pool.key != key:
+                if pool is not None:
+                    pool.close()
+                options = settings_dict.get("POOL") or {}
+                pool = ConnectionPool(
+                    max_size=options.get("MAX_SIZE", 10),
+                    timeout=options.get("TIMEOUT", 10.0),
+                    health_check_interval=options.get("HEALTH_CHECK_INTERVAL", 30.0),
+                    max_lifetime=options.get("MAX_LIFETIME"),
+                    key=key,
+                )
+                _pools[alias] = pool
+
+    return pool
+
+
+def get_pool_stats():
+    """``{alias: stats}`` of the pools this process opened"""
+    return {alias: pool.stats() for alias, pool in list(_pools.items())}
+
+
+def _forget_pools():
+    # a forked child must not share its parent's sockets
+    _pools.clear()
+
+
+os.register_at_fork(after_in_child=_forget_pools)
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    ``DatabaseWrapper`` mixin taking connections from a ConnectionPool
+
+    Closing a connection, which Django does at the end of each request
+    when ``CONN_MAX_AGE`` is 0, rolls back what it left open and returns it
+    to the pool of its alias, configured by the ``POOL`` dict of the
+    database settings. ``"POOL": False`` turns pooling off.
+    """
+
+    def pooling_enabled(self):
+        return self.settings_dict.get("POOL") is not False
+
+    def get_pool(self, conn_params=None):
+        if conn_params is None:
+            conn_params = self.get_connection_params()
+        key = repr(sorted(conn_params.items()))
+        return get_pool(self.alias, self.settings_dict, key)
+
+    def pool_stats(self):
+        return self.get_pool().stats()
+
+    def get_new_connection(self, conn_params):
+        if not self.pooling_enabled():
+            return super().get_new_connection(conn_params)
+
+        # closing gives the connection back to the pool it came from
+        self._pool = self.get_pool(conn_params)
+        connection = self._pool.checkout(
+            lambda: super(PooledDatabaseWrapperMixin, self).get_new_connection(
+                conn_params
+            ),
+            self.check_pooled_connection,
+        )
+        self.configure_pooled_connection(connection)
+        return connection
+
+    def configure_pooled_connection(self, connection):
+        """set what ``get_new_connection`` sets on the wrapper, for reused ones"""
+
+    def check_pooled_connection(self, connection):
+        """the health check, one round trip"""
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+            finally:
+                cursor.close()
+        except self.Database.Error:
+            return False
+
+        return True
+
+    def reset_pooled_connection(self, connection):
+        """leave ``connection`` as a new one, False if that is not possible"""
+        try:
+            connection.rollback()
+        except self.Database.Error:
+            return False
+
+        return True
+
+    def _close(self):
+        if not self.pooling_enabled():
+            return super()._close()
+
+        connection = self.connection
+        # closed inside atomic() the wrapper keeps its connection around until
+        # the block exits, so this one cannot be handed to another thread
+        reusable = not self.in_atomic_block
+        if reusable and self.errors_occurred:
+            reusable = self.is_usable()
+        reusable = reusable and self.reset_pooled_connection(connection)
+        self._pool.checkin(connection, reusable)
@@ -0,0 +1,140 @@
+import contextvars
+import hashlib
+import random
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# the request being served, set by ReplicaPinningMiddleware
+_request = contextvars.ContextVar("replica_request", default=None)
+_primary = contextvars.ContextVar("replica_primary", default=False)
+
+
+@contextmanager
+def use_primary():
+    """send the reads in the block to the primary, whatever the request"""
+    token = _primary.set(True)
+    try:
+        yield
+    finally:
+        _primary.reset(token)
+
+
+@contextmanager
+def routing_request(request):
+    token = _request.set(request)
+    try:
+        yield
+    finally:
+        _request.reset(token)
+
+
+def get_pin_cache():
+    return caches[settings.REPLICA_PIN_CACHE_ALIAS]
+
+
+def get_pin_cache_key(request):
+    """bearer clients may drop cookies, their pin is kept under their token"""
+    authorization = request.META.get("HTTP_AUTHORIZATION")
+    if not authorization:
+        return None
+
+    digest = hashlib.sha256(authorization.encode()).hexdigest()
+    return f"replica-pin:{digest}"
+
+
+def pin_to_primary(request, response):
+    """send the client's reads to the primary for ``REPLICA_PIN_SECONDS``"""
+    seconds = settings.REPLICA_PIN_SECONDS
+    response.set_cookie(
+        settings.REPLICA_PIN_COOKIE,
+        str(int(time.time() + seconds)),
+        max_age=seconds,
+        httponly=True,
+        samesite="Lax",
+    )
+    key = get_pin_cache_key(request)
+    if key is not None:
+        get_pin_cache().set(key, True, seconds)
+
+
+def is_pinned(request):
+    try:
+        if int(request.COOKIES.get(settings.REPLICA_PIN_COOKIE, 0)) > time.time():
+            return True
+    except ValueError:
+        pass
+
+    key = get_pin_cache_key(request)
+    return key is not None and get_pin_cache().get(key, False)
+
+
+def get_replica(request):
+    """
+    the replica alias for the reads of ``request``, None for the primary
+
+    Safe requests to the URL namespaces in ``REPLICA_APPS`` get one picked
+    at random and kept for the whole request, unless the client wrote
+    recently. The answer is worked out once the URL is resolved.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    if hasattr(request, "_replica"):
+        return request._replica
+
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+    replica = None
+    if set(match.namespaces) & set(settings.REPLICA_APPS) and not is_pinned(request):
+        replica = random.choice(settings.DATABASE_REPLICAS)
+    request._replica = replica
+
+    return replica
+
+
+def get_used_replica(request):
+    """the replica the reads of ``request`` went to, None for the primary"""
+    return getattr(request, "_replica", None)
+
+
+class ReplicaRouter:
+    """
+    reads of the ``REPLICA_APPS`` models from ``DATABASE_REPLICAS``
+
+    Only reads made while ReplicaPinningMiddleware serves a safe request
+    to one of those apps' views go to a replica; commands, writes, atomic
+    blocks and ``use_primary()`` read the primary. Writes always go to
+    the primary, also for instances loaded from a replica.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not settings.DATABASE_REPLICAS or _primary.get():
+            return None
+        if model._meta.app_label not in settings.REPLICA_APPS:
+            return None
+        # what the transaction wrote is only on the primary
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+
+        return get_replica(_request.get())
+
+    def db_for_write(self, model, **hints):
+        # Django writes instances back where they were read from
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db in settings.DATABASE_REPLICAS:
+            return DEFAULT_DB_ALIAS
+
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+
+        return None
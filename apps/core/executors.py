@@ -0,0 +1,45 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+_executors = {}
+_lock = threading.Lock()
+
+
+def get_executor(name, max_workers):
+    """
+    the process-wide thread pool ``name``, created on first use
+
+    Work that releases the GIL, like hashing in C, runs on at most
+    ``max_workers`` threads however many requests submit it, so a burst
+    queues up instead of taking every core of the worker.
+    """
+    executor = _executors.get(name)
+    if executor is None:
+        with _lock:
+            executor = _executors.get(name)
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=max_workers, thread_name_prefix=name
+                )
+                _executors[name] = executor
+
+    return executor
+
+
+def run_in_executor(name, max_workers, fn, *args, **kwargs):
+    """run ``fn`` on the pool ``name`` and wait for its result"""
+    return get_executor(name, max_workers).submit(fn, *args, **kwargs).result()
+
+
+async def arun_in_executor(name, max_workers, fn, *args, **kwargs):
+    """await ``fn`` on the pool ``name`` without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    # run_in_executor does not carry context variables over, unlike asgiref
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        get_executor(name, max_workers),
+        functools.partial(context.run, fn, *args, **kwargs),
+    )
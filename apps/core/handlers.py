@@ -0,0 +1,107 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signals
+from django.core.handlers.asgi import ASGIHandler as BaseASGIHandler
+from django.core.handlers.asgi import RequestAborted
+from django.http import FileResponse
+from django.urls import Resolver404, get_resolver, set_script_prefix
+
+
+class ASGIHandler(BaseASGIHandler):
+    """
+    resolves requests against ``ASGI_ROOT_URLCONF``, where reads are async
+
+    Django sends ``request_started`` and closes the response, which sends
+    ``request_finished``, on the request's thread-sensitive thread. Their
+    receivers close that thread's database connections, the ones sync
+    views open there. Async views never use it, they reach the database
+    through the ``ASYNC_DB_WORKERS`` pool, which closes its own. For them
+    both run on the loop, and a request whose middleware and view are
+    async does not touch a thread.
+    """
+
+    async def handle(self, scope, receive, send):
+        try:
+            body_file = await self.read_body(receive)
+        except RequestAborted:
+            return
+
+        set_script_prefix(self.get_script_prefix(scope))
+        request, error_response = self.create_request(scope, body_file)
+        on_loop = request is not None and self.is_async_view(request)
+        await self.run(
+            on_loop, signals.request_started.send, sender=self.__class__, scope=scope
+        )
+        if request is None:
+            await self.send_response(error_response, send)
+            return
+
+        response = await self.get_response_async(request)
+        response._handler_class = self.__class__
+        if isinstance(response, FileResponse):
+            response.block_size = self.chunk_size
+        await self.send_response(response, send, on_loop)
+
+    async def run(self, on_loop, fn, *args, **kwargs):
+        """call ``fn`` on the loop, or where Django would for a sync view"""
+        if on_loop:
+            return fn(*args, **kwargs)
+
+        return await sync_to_async(fn, thread_sensitive=True)(*args, **kwargs)
+
+    def is_async_view(self, request):
+        try:
+            match = get_resolver(request.urlconf).resolve(request.path_info)
+        except Resolver404:
+            return False
+
+        return asyncio.iscoroutinefunction(match.func)
+
+    async def send_response(self, response, send, on_loop=False):
+        headers = [
+            (str(header).encode("ascii"), str(value).encode("latin1"))
+            for header, value in response.items()
+        ]
+        headers.extend(
+            (b"Set-Cookie", cookie.output(header="").encode("ascii").strip())
+            for cookie in response.cookies.values()
+        )
+        try:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": response.status_code,
+                    "headers": headers,
+                }
+            )
+            if response.streaming:
+                for part in response:
+                    for chunk, _ in self.chunk_bytes(part):
+                        await send(
+                            {
+                                "type": "http.response.body",
+                                "body": chunk,
+                                "more_body": True,
+                            }
+                        )
+                await send({"type": "http.response.body"})
+            else:
+                for chunk, last in self.chunk_bytes(response.content):
+                    await send(
+                        {
+                            "type": "http.response.body",
+                            "body": chunk,
+                            "more_body": not last,
+                        }
+                    )
+        finally:
+            await self.run(on_loop, response.close)
+
+    def create_request(self, scope, body_file):
+        request, error_response = super().create_request(scope, body_file)
+        if request is not None:
+            request.urlconf = settings.ASGI_ROOT_URLCONF
+
+        return request, error_response
@@ -0,0 +1,151 @@
+import asyncio
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+from core.handlers import ASGIHandler
+from core.middleware import SkipForBearerAPIMixin
+from users.tokens import make_signed_token
+
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class Command(BaseCommand):
+    help = (
+        "Time bearer token GETs of the cached post list through MIDDLEWARE "
+        "and through the same list with Django's own session, CSRF, auth, "
+        "message and clickjacking middleware, one request at a time, and "
+        "print what the lean stack saves per request. The sample user is "
+        "committed and deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests", type=int, default=1000, help="Requests per round."
+        )
+        parser.add_argument(
+            "--rounds", type=int, default=5, help="Rounds per case, the best counts."
+        )
+
+    def handle(self, *args, **options):
+        total, rounds = options["requests"], options["rounds"]
+        provider = {**settings.OAUTH2_PROVIDER, "SIGNED_ACCESS_TOKENS": True}
+        user = get_user_model().objects.create_user(
+            username="bench-middleware", email="bench-middleware@example.com"
+        )
+        try:
+            # the cached list, so the view does little besides the middleware
+            path = reverse("blog:post-list")
+            token = make_signed_token(user.pk, ["read", "write"], 3600)
+            stacks = {
+                "django": self.get_django_middleware(),
+                "lean": settings.MIDDLEWARE,
+            }
+            with override_settings(OAUTH2_PROVIDER=provider, CACHES=CACHES):
+                for handler in ["wsgi", "asgi"]:
+                    best = dict.fromkeys(stacks, float("inf"))
+                    # alternated, so drift hits both stacks alike
+                    for _ in range(rounds):
+                        for name, middleware in stacks.items():
+                            with override_settings(MIDDLEWARE=middleware):
+                                elapsed = self.time(handler, path, token, total)
+                            best[name] = min(best[name], elapsed / total * 1e6)
+
+                    for name, us in best.items():
+                        self.stdout.write(f"{handler} {name:<8} {us:8.1f} us/request")
+                    saved = best["django"] - best["lean"]
+                    self.stdout.write(f"{handler} saved    {saved:8.1f} us/request")
+        finally:
+            user.delete()
+
+    def time(self, handler, path, token, total):
+        if handler == "wsgi":
+            return self.time_wsgi(path, token, total)
+
+        return asyncio.run(self.time_asgi(path, token, total))
+
+    def get_django_middleware(self):
+        """MIDDLEWARE with Django's classes in place of core.middleware's"""
+        middleware = []
+        for path in settings.MIDDLEWARE:
+            cls = import_string(path)
+            if issubclass(cls, SkipForBearerAPIMixin):
+                (base,) = (b for b in cls.__bases__ if b is not SkipForBearerAPIMixin)
+                path = f"{base.__module__}.{base.__qualname__}"
+            middleware.append(path)
+
+        return middleware
+
+    def time_wsgi(self, path, token, total):
+        handler = WSGIHandler()
+        environ = RequestFactory()._base_environ(
+            PATH_INFO=path,
+            HTTP_HOST="localhost",
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+
+        def get():
+            response = handler(dict(environ), lambda status, headers: None)
+            # sends request_finished, which closes the connection
+            response.close()
+            return response.status_code
+
+        # the first request fills the cache
+        get()
+        start = time.perf_counter()
+        statuses = [get() for _ in range(total)]
+        elapsed = time.perf_counter() - start
+        self.check_statuses(statuses)
+
+        return elapsed
+
+    async def time_asgi(self, path, token, total):
+        handler = ASGIHandler()
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "query_string": b"",
+            "headers": [
+                (b"host", b"localhost"),
+                (b"authorization", f"Bearer {token}".encode()),
+            ],
+            "server": ("localhost", 80),
+            "client": ("127.0.0.1", 0),
+        }
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def get():
+            statuses = []
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    statuses.append(message["status"])
+
+            await handler(dict(scope), receive, send)
+            return statuses[0]
+
+        await get()
+        start = time.perf_counter()
+        statuses = [await get() for _ in range(total)]
+        elapsed = time.perf_counter() - start
+        self.check_statuses(statuses)
+
+        return elapsed
+
+    def check_statuses(self, statuses):
+        failed = [code for code in statuses if code != 200]
+        if failed:
+            self.stderr.write(f"{len(failed)} requests failed, first {failed[0]}")
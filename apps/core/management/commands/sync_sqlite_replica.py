@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the SQLite primary over the SQLite files standing in for "
+        "DATABASE_REPLICAS, for trying out replica routing locally. Run it "
+        "again, or on a timer, to play replication with lag."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "replicas",
+            nargs="*",
+            help="Replica aliases to refresh, all of DATABASE_REPLICAS by default.",
+        )
+
+    def handle(self, *args, **options):
+        replicas = options["replicas"] or settings.DATABASE_REPLICAS
+        if not replicas:
+            raise CommandError("DATABASE_REPLICAS is empty.")
+
+        primary = connections[DEFAULT_DB_ALIAS]
+        for alias in replicas:
+            if alias not in settings.DATABASE_REPLICAS:
+                raise CommandError(f"{alias} is not in DATABASE_REPLICAS.")
+            replica = connections[alias]
+            if primary.vendor != "sqlite" or replica.vendor != "sqlite":
+                raise CommandError("Only SQLite databases can be copied.")
+
+            primary.ensure_connection()
+            replica.ensure_connection()
+            # the online backup API, consistent while the primary is written
+            primary.connection.backup(replica.connection)
+            self.stdout.write(f"Copied {primary.alias} to {alias}.")
@@ -0,0 +1,189 @@
+import mimetypes
+import os
+import posixpath
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from django.views import View
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# other names may be reused for new content, clients revalidate each time
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def make_etag(stat_result):
+    """strong ETag from modification time and size, like nginx's"""
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def is_immutable(path):
+    """whether ``path`` is content-addressed, see ``MEDIA_IMMUTABLE_PATTERNS``"""
+    return any(
+        re.search(pattern, path)
+        for pattern in getattr(settings, "MEDIA_IMMUTABLE_PATTERNS", ())
+    )
+
+
+def parse_range(header, size):
+    """
+    ``(start, end)`` inclusive of a single-range ``Range`` header
+
+    None means serve the whole file, for a missing, malformed or multiple
+    range header; ValueError means the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.replace(" ", ""))
+    if match is None:
+        return None
+
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        # the final ``last`` bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError
+
+    return start, end
+
+
+def if_range_matches(request, etag, mtime):
+    """a range only applies while ``If-Range`` names the current version"""
+    if_range = request.headers.get("If-Range")
+    if if_range is None:
+        return True
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return etag in parse_etags(if_range)
+
+    return parse_http_date_safe(if_range) == int(mtime)
+
+
+def read_range(path, start, length, chunk_size=64 * 1024):
+    with open(path, "rb") as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(chunk_size, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+def sendfile_response(path, name):
+    """
+    an empty response the front server fills with the file
+
+    ``MEDIA_SENDFILE`` is ``"x-sendfile"`` for Apache's mod_xsendfile and
+    lighttpd, or ``"x-accel-redirect"`` for nginx, which serves the file
+    from the internal location ``MEDIA_ACCEL_REDIRECT_PREFIX``. Either way
+    the server answers Range requests itself. Paths are percent-encoded,
+    which both servers decode; Django would MIME-encode non-ASCII names.
+    """
+    content_type, _ = mimetypes.guess_type(name)
+    response = HttpResponse(content_type=content_type or "application/octet-stream")
+    if settings.MEDIA_SENDFILE == "x-accel-redirect":
+        prefix = settings.MEDIA_ACCEL_REDIRECT_PREFIX
+        response["X-Accel-Redirect"] = quote(prefix.rstrip("/") + "/" + name)
+    else:
+        response["X-Sendfile"] = quote(path)
+
+    return response
+
+
+class MediaView(View):
+    """
+    serves uploads from MEDIA_ROOT with validators, ranges and offload
+
+    Answers conditional requests with 304 from a stat of the file alone,
+    sends single byte ranges as 206 and whole files through FileResponse,
+    which uses the server's ``wsgi.file_wrapper``. With ``MEDIA_SENDFILE``
+    set the front server sends the bytes instead.
+    """
+
+    query_budget = 0
+
+    def get(self, request, path):
+        name = posixpath.normpath(path).lstrip("/")
+        try:
+            full_path = safe_join(settings.MEDIA_ROOT, name)
+            stat_result = os.stat(full_path)
+        except (SuspiciousFileOperation, OSError):
+            raise Http404
+        if not stat.S_ISREG(stat_result.st_mode):
+            raise Http404
+
+        etag = make_etag(stat_result)
+        mtime = stat_result.st_mtime
+        headers = {
+            "ETag": etag,
+            "Last-Modified": http_date(mtime),
+            "Cache-Control": (
+                IMMUTABLE_CACHE_CONTROL
+                if is_immutable(name)
+                else REVALIDATE_CACHE_CONTROL
+            ),
+            "Accept-Ranges": "bytes",
+        }
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=int(mtime)
+        )
+        if response is None:
+            response = self.get_file_response(request, full_path, name, stat_result)
+        for header, value in headers.items():
+            response.headers.setdefault(header, value)
+
+        return response
+
+    def get_file_response(self, request, full_path, name, stat_result):
+        if getattr(settings, "MEDIA_SENDFILE", None):
+            return sendfile_response(full_path, name)
+
+        size = stat_result.st_size
+        byte_range = None
+        if "Range" in request.headers and if_range_matches(
+            request, make_etag(stat_result), stat_result.st_mtime
+        ):
+            try:
+                byte_range = parse_range(request.headers["Range"], size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response["Content-Range"] = f"bytes */{size}"
+                return response
+
+        if byte_range is None:
+            return FileResponse(open(full_path, "rb"))
+
+        start, end = byte_range
+        content_type, encoding = mimetypes.guess_type(name)
+        response = StreamingHttpResponse(
+            read_range(full_path, start, end - start + 1),
+            status=206,
+            content_type=content_type or "application/octet-stream",
+        )
+        if encoding:
+            response["Content-Encoding"] = encoding
+        response["Content-Length"] = str(end - start + 1)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+        return response
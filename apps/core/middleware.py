@@ -0,0 +1,281 @@
+import asyncio
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import sync_to_async
+from core.db.routers import SAFE_METHODS, pin_to_primary, routing_request
+from corsheaders import middleware as cors
+from corsheaders.signals import check_request_enabled
+from django.conf import settings
+from django.contrib.auth import middleware as auth
+from django.contrib.messages import middleware as messages
+from django.contrib.sessions import middleware as sessions
+from django.db import connections
+from django.middleware import clickjacking, common, csrf, security
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryCounter:
+    """``execute_wrapper`` that counts queries and the time spent in them"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+def get_query_budget(view_func, method):
+    """the ``query_budget`` a view declares for ``method``, or None"""
+    view = (
+        getattr(view_func, "view_class", None)
+        or getattr(view_func, "cls", None)
+        or view_func
+    )
+    budget = getattr(view, "query_budget", None)
+    if isinstance(budget, dict):
+        budget = budget.get(method)
+
+    return budget
+
+
+class QueryBudgetMiddleware:
+    """
+    counts the queries and database time of each request against its view's budget
+
+    Views declare ``query_budget``, a number or a dict of numbers per HTTP
+    method. Going over it logs a warning, or raises QueryBudgetExceeded
+    when ``QUERY_BUDGET_ACTION`` is ``"raise"``. Queries made while a
+    streaming response is consumed are not counted.
+
+    Under ASGI the middleware steps aside rather than force the chain into
+    a thread: async views run their queries on pool threads, out of reach
+    of a connection wrapper installed here.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.get_response(request)
+
+        counter = QueryCounter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+
+        match = getattr(request, "resolver_match", None)
+        budget = None
+        if match is not None:
+            budget = get_query_budget(match.func, request.method)
+        if budget is not None and counter.count > budget:
+            message = (
+                f"{request.method} {request.path} ran {counter.count} queries "
+                f"in {counter.duration * 1000:.1f} ms, over its budget of {budget}"
+            )
+            if getattr(settings, "QUERY_BUDGET_ACTION", "log") == "raise":
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        else:
+            logger.debug(
+                "%s %s ran %d queries in %.1f ms",
+                request.method,
+                request.path,
+                counter.count,
+                counter.duration * 1000,
+            )
+
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """
+    lets ReplicaRouter see the request, and pins writers to the primary
+
+    After an unsafe request the client reads from the primary for
+    ``REPLICA_PIN_SECONDS``, so it sees its own writes however far the
+    replicas lag behind.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        with routing_request(request):
+            response = self.get_response(request)
+
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        with routing_request(request):
+            response = await self.get_response(request)
+
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if settings.DATABASE_REPLICAS and request.method not in SAFE_METHODS:
+            pin_to_primary(request, response)
+
+        return response
+
+
+def is_bearer_api_request(request):
+    """a token client of the API, which has no use for sessions or CSRF"""
+    scheme = request.META.get("HTTP_AUTHORIZATION", "").split(" ", 1)[0]
+    return scheme.lower() == "bearer" and request.path_info.startswith(
+        settings.LEAN_API_PREFIX
+    )
+
+
+class SkipForBearerAPIMixin:
+    """
+    makes one of Django's middleware pass bearer requests to the API on
+
+    It does nothing for them, not even under ASGI, where it would
+    otherwise hop to a thread for each of its hooks, nor returns them a
+    coroutine of its own.
+    Everything else, the admin and the browsable API included, goes
+    through it as before.
+    """
+
+    def __call__(self, request):
+        if is_bearer_api_request(request):
+            return self.get_response(request)
+
+        return super().__call__(request)
+
+
+class LoopHooksMixin:
+    """
+    runs the hooks of one of Django's middleware on the event loop under ASGI
+
+    MiddlewareMixin hops to the request's thread for every hook, though
+    most of them only read headers, cookies and settings. Only the calls
+    ``hook_blocks`` says may reach the database hop here.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        # Django would hop for a sync process_view in an async chain
+        if asyncio.iscoroutinefunction(get_response) and hasattr(self, "process_view"):
+            process_view = self.process_view
+
+            async def aprocess_view(request, *args):
+                return await self.run_hook(process_view, request, *args)
+
+            self.process_view = aprocess_view
+
+    async def __acall__(self, request):
+        response = None
+        if hasattr(self, "process_request"):
+            response = await self.run_hook(self.process_request, request)
+        response = response or await self.get_response(request)
+        if hasattr(self, "process_response"):
+            response = await self.run_hook(self.process_response, request, response)
+
+        return response
+
+    async def run_hook(self, hook, request, *args):
+        if self.hook_blocks(hook.__name__, request):
+            return await sync_to_async(hook, thread_sensitive=True)(request, *args)
+
+        return hook(request, *args)
+
+    def hook_blocks(self, name, request):
+        """whether the hook ``name`` may do I/O for ``request``"""
+        return False
+
+
+class SecurityMiddleware(LoopHooksMixin, security.SecurityMiddleware):
+    pass
+
+
+class CorsMiddleware(LoopHooksMixin, cors.CorsMiddleware):
+    def hook_blocks(self, name, request):
+        # its receivers may look origins up in the database
+        return check_request_enabled.has_listeners()
+
+
+class CommonMiddleware(LoopHooksMixin, common.CommonMiddleware):
+    pass
+
+
+class SessionMiddleware(
+    SkipForBearerAPIMixin, LoopHooksMixin, sessions.SessionMiddleware
+):
+    def hook_blocks(self, name, request):
+        # sessions load lazily, the response saves the ones that were used
+        session = getattr(request, "session", None)
+        return (
+            name == "process_response"
+            and session is not None
+            and (session.accessed or settings.SESSION_SAVE_EVERY_REQUEST)
+        )
+
+
+class CsrfViewMiddleware(
+    SkipForBearerAPIMixin, LoopHooksMixin, csrf.CsrfViewMiddleware
+):
+    def hook_blocks(self, name, request):
+        # unsafe requests have their body read for the token
+        return settings.CSRF_USE_SESSIONS or (
+            name == "process_view" and request.method not in SAFE_METHODS
+        )
+
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        if is_bearer_api_request(request):
+            return None
+
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class AuthenticationMiddleware(
+    SkipForBearerAPIMixin, LoopHooksMixin, auth.AuthenticationMiddleware
+):
+    """DRF authenticates these requests from their token, not the session"""
+
+
+class MessageMiddleware(
+    SkipForBearerAPIMixin, LoopHooksMixin, messages.MessageMiddleware
+):
+    def hook_blocks(self, name, request):
+        # storing messages may load the session
+        storage = getattr(request, "_messages", None)
+        return (
+            name == "process_response"
+            and storage is not None
+            and (storage.used or storage.added_new)
+        )
+
+
+class XFrameOptionsMiddleware(
+    SkipForBearerAPIMixin, LoopHooksMixin, clickjacking.XFrameOptionsMiddleware
+):
+    pass
@@ -0,0 +1,213 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import mixins, permissions, relations, serializers
+from rest_framework.response import Response
+
+
+def optimize_for_serializer(queryset, serializer, required_fields=None):
+    """
+    add the select_related/prefetch_related calls ``serializer`` needs
+
+    Forward relations read through dotted sources or nested serializers
+    are joined, reverse and many-to-many relations are prefetched, so
+    serializing a page costs a fixed number of queries. Serializers can
+    add an ``optimize_queryset(queryset)`` method for needs their fields
+    do not describe.
+
+    With ``required_fields`` the columns are narrowed with ``only()`` to
+    what the fields read plus those fields, unless a field reads a source
+    that is not a model field.
+    """
+    select, prefetch = set(), {}
+    _collect_relations(queryset.model, serializer, "", select, prefetch)
+
+    if select:
+        queryset = queryset.select_related(*sorted(select))
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch.values())
+
+    if required_fields is not None:
+        columns = _collect_columns(queryset.model, serializer, "")
+        if columns is not None:
+            columns.add(queryset.model._meta.pk.name)
+            columns.update(required_fields)
+            queryset = queryset.only(*sorted(columns))
+
+    child = getattr(serializer, "child", serializer)
+    if hasattr(child, "optimize_queryset"):
+        queryset = child.optimize_queryset(queryset)
+
+    return queryset
+
+
+def _collect_relations(model, serializer, prefix, select, prefetch, prefetched=False):
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == "*":
+            continue
+
+        # a lone primary key related field reads ``<fk>_id`` off the row
+        if isinstance(field, relations.PrimaryKeyRelatedField):
+            continue
+
+        current, path = model, []
+        for attr in field.source.split("."):
+            try:
+                model_field = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                break
+            if not model_field.is_relation:
+                break
+
+            path.append(attr)
+            lookup = prefix + "__".join(path)
+
+            if model_field.many_to_many or model_field.one_to_many:
+                prefetch[lookup] = _prefetch_for(field, model_field, lookup)
+                if isinstance(
+                    field, (serializers.Serializer, serializers.ListSerializer)
+                ):
+                    _collect_relations(
+                        model_field.related_model,
+                        field,
+                        lookup + "__",
+                        select,
+                        prefetch,
+                        prefetched=True,
+                    )
+                break
+
+            # below a prefetch, joins have to ride along with the prefetch
+            if prefetched:
+                prefetch.setdefault(lookup, lookup)
+            else:
+                select.add(lookup)
+            current = model_field.related_model
+        else:
+            if path and isinstance(field, serializers.Serializer):
+                _collect_relations(
+                    current, field, lookup + "__", select, prefetch, prefetched
+                )
+
+
+def _collect_columns(model, serializer, prefix):
+    """columns the serializer reads, or None if they cannot be worked out"""
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+
+    columns = set(getattr(getattr(serializer, "Meta", None), "required_fields", ()))
+    for field in serializer.fields.values():
+        # method fields rely on prefetches or declare Meta.required_fields
+        if field.write_only or field.source == "*":
+            continue
+
+        current, path = model, []
+        for attr in field.source.split("."):
+            try:
+                model_field = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                # properties and methods may read any column
+                if not path:
+                    return None
+                break
+
+            if model_field.many_to_many or model_field.one_to_many:
+                break
+
+            path.append(attr)
+            columns.add(prefix + "__".join(path))
+            if not model_field.is_relation:
+                break
+            current = model_field.related_model
+        else:
+            if path and isinstance(field, serializers.Serializer):
+                nested = _collect_columns(
+                    current, field, prefix + "__".join(path) + "__"
+                )
+                if nested is None:
+                    return None
+                columns.update(nested)
+
+    return columns
+
+
+def _prefetch_for(field, model_field, lookup):
+    related_model = model_field.related_model
+    child = getattr(field, "child_relation", None)
+
+    # a list of primary keys needs nothing but the key and the join column
+    if isinstance(child, relations.PrimaryKeyRelatedField) and model_field.one_to_many:
+        queryset = related_model._default_manager.only(
+            related_model._meta.pk.name, model_field.field.name
+        )
+        return Prefetch(lookup, queryset=queryset)
+
+    return lookup
+
+
+class OptimizedQuerysetMixin:
+    """
+    tunes ``get_queryset`` to the relations and columns the serializer reads
+
+    Columns are only narrowed for reads, writes save whole rows.
+    ``required_fields`` lists columns the view itself reads.
+    """
+
+    required_fields = ()
+
+    def get_required_fields(self):
+        fields = set(self.required_fields)
+
+        # list paginators read their ordering fields off every row
+        if isinstance(self, mixins.ListModelMixin):
+            ordering = getattr(self.paginator, "ordering", None) or ()
+            if isinstance(ordering, str):
+                ordering = (ordering,)
+            fields.update(order.lstrip("-") for order in ordering)
+
+        return fields
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        required_fields = None
+        if self.request.method in permissions.SAFE_METHODS:
+            required_fields = self.get_required_fields()
+
+        return optimize_for_serializer(
+            queryset, self.get_serializer(), required_fields=required_fields
+        )
+
+
+class ValuesListMixin:
+    """
+    lists from ``values()`` rows when the serializer compiles to a values plan
+
+    The page is read as dicts and serialized by the plan, skipping model
+    instances and per-field source resolution; the output is the same.
+    Serializers without ``get_values_plan`` or with fields the plan cannot
+    express take the normal ``list`` path.
+    """
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_serializer()
+        plan = None
+        if hasattr(serializer, "get_values_plan"):
+            plan = serializer.get_values_plan()
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        lookups = set(plan.lookups)
+        if hasattr(self, "get_required_fields"):
+            lookups.update(self.get_required_fields())
+
+        # prefetches cannot attach to dicts, the plan's hooks batch instead
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = queryset.prefetch_related(None).values(*sorted(lookups))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(plan.serialize(page))
+
+        return Response(plan.serialize(queryset))
@@ -0,0 +1,123 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, _reverse_ordering
+
+
+class KeysetPagination(CursorPagination):
+    """
+    cursor pagination keyed on every field of ``ordering``
+
+    The cursor carries the full position of the boundary row, so each page
+    is a single ``WHERE a <= x AND (a < x OR (a = x AND b < y)) ORDER BY
+    a, b LIMIT n`` query with no OFFSET and no COUNT(*), whatever the
+    depth. ``ordering`` must end with a unique field and be backed by a
+    matching composite index.
+    """
+
+    ordering = ("-created", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = self.cursor.position if self.cursor is not None else None
+
+        # walk backwards for "previous" cursors, then flip the page back
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(
+                self.get_position_filter(queryset.model, ordering, position)
+            )
+
+        # fetch one extra row to know whether another page follows
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        has_following = len(results) > self.page_size
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = position is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_position_filter(self, model, ordering, position):
+        """
+        the rows past ``(x, y)`` in ``ordering``, as a Q object
+
+        The ORM has no row values, so ``(a, b) > (x, y)`` is spelled
+        ``a > x OR (a = x AND b > y)``. The redundant ``a >= x`` in front
+        gives the planner a range on the leading index column to scan.
+        """
+        try:
+            values = json.loads(position)
+            if not isinstance(values, list) or len(values) != len(ordering):
+                raise ValueError
+            names = [order.lstrip("-") for order in ordering]
+            values = [
+                model._meta.get_field(name).to_python(value)
+                for name, value in zip(names, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        position_filter = Q()
+        for index, order in enumerate(ordering):
+            lookup = "lt" if order.startswith("-") else "gt"
+            clause = {name: value for name, value in zip(names[:index], values)}
+            clause[f"{names[index]}__{lookup}"] = values[index]
+            position_filter |= Q(**clause)
+
+        bound = "lte" if ordering[0].startswith("-") else "gte"
+        return Q(**{f"{names[0]}__{bound}": values[0]}) & position_filter
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        if self.page:
+            position = self._get_position_from_instance(self.page[-1], self.ordering)
+        else:
+            position = self.cursor.position
+
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+
+        if self.page:
+            position = self._get_position_from_instance(self.page[0], self.ordering)
+        else:
+            position = self.cursor.position
+
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            name = order.lstrip("-")
+            if isinstance(instance, dict):
+                values.append(str(instance[name]))
+            else:
+                values.append(str(getattr(instance, name)))
+
+        return json.dumps(values)
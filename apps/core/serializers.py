@@ -0,0 +1,167 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models.query_utils import DeferredAttribute
+from rest_framework import permissions, relations, serializers
+
+
+class SparseFieldsetsMixin:
+    """
+    lets read requests pick fields with ``?fields=a,b`` or drop them with ``?omit=c``
+
+    Fields are removed before serialization, so views that narrow their
+    queryset to the serializer's fields never read the dropped columns.
+    Unknown names are ignored and writes always see every field.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+
+        for name in list(fields):
+            if not self.is_field_requested(name):
+                del fields[name]
+
+        return fields
+
+    def get_sparse_params(self):
+        request = self.context.get("request")
+        if request is None or request.method not in permissions.SAFE_METHODS:
+            return None, set()
+
+        requested = request.query_params.get("fields")
+        if requested is not None:
+            requested = {name.strip() for name in requested.split(",") if name.strip()}
+        omitted = {
+            name.strip() for name in request.query_params.get("omit", "").split(",")
+        }
+
+        return requested, omitted
+
+    def is_field_requested(self, name):
+        requested, omitted = self.get_sparse_params()
+        if requested is not None and name not in requested:
+            return False
+
+        return name not in omitted
+
+
+class ValuesPlan:
+    """the compiled form of a serializer, applied to ``values()`` rows"""
+
+    def __init__(self, lookups, fields):
+        self.lookups = lookups
+        self.fields = fields
+
+    def serialize(self, rows):
+        rows = list(rows)
+
+        # method fields are filled for the whole batch at once
+        columns = {
+            name: hook(rows) for name, lookup, hook in self.fields if lookup is None
+        }
+
+        data = []
+        for index, row in enumerate(rows):
+            item = {}
+            for name, lookup, to_representation in self.fields:
+                if lookup is None:
+                    item[name] = columns[name][index]
+                    continue
+
+                value = row[lookup]
+                item[name] = None if value is None else to_representation(value)
+            data.append(item)
+
+        return data
+
+
+class ValuesSerializerMixin:
+    """
+    read-only fast path that serializes ``values()`` rows instead of instances
+
+    ``get_values_plan()`` compiles every field once into a ``values()``
+    lookup and the field's own ``to_representation``, so the output is the
+    same as ``.data`` without building model instances or resolving
+    sources per row. Method fields need a batch hook
+    ``values_<field_name>(rows)`` returning one value per row. Serializers
+    with a field that cannot be compiled get ``None``.
+    """
+
+    def get_values_plan(self):
+        model = self.Meta.model
+        lookups = {model._meta.pk.name}
+        fields = []
+
+        for name, field in self.fields.items():
+            if field.write_only:
+                continue
+
+            hook = getattr(self, f"values_{name}", None)
+            if hook is not None:
+                fields.append((name, None, hook))
+                continue
+
+            if (
+                isinstance(field, serializers.SerializerMethodField)
+                or field.source == "*"
+            ):
+                return None
+
+            lookup = _values_lookup(model, field.source_attrs)
+            if lookup is None:
+                return None
+
+            lookup, is_relation = lookup
+            if isinstance(field, relations.PrimaryKeyRelatedField):
+                to_representation = _pk_representation(field)
+            elif is_relation or isinstance(
+                field, (serializers.BaseSerializer, relations.RelatedField)
+            ):
+                return None
+            else:
+                to_representation = field.to_representation
+
+            lookups.add(lookup)
+            fields.append((name, lookup, to_representation))
+
+        return ValuesPlan(lookups, fields)
+
+
+def _values_lookup(model, source_attrs):
+    """``(lookup, is_relation)`` for a field source, or None"""
+    current, path = model, []
+    for index, attr in enumerate(source_attrs):
+        try:
+            model_field = current._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        if not model_field.concrete or model_field.many_to_many:
+            return None
+
+        path.append(attr)
+        remaining = source_attrs[index + 1 :]
+        if not remaining:
+            # files, countries and the like wrap the column in their descriptor
+            descriptor = getattr(current, attr)
+            if (
+                not model_field.is_relation
+                and type(descriptor) is not DeferredAttribute
+            ):
+                return None
+            return "__".join(path), model_field.is_relation
+
+        if not model_field.is_relation:
+            return None
+
+        # ``post.id`` is the foreign key column itself, no join needed
+        if remaining == [model_field.target_field.name]:
+            return "__".join(path), False
+
+        current = model_field.related_model
+
+    return None
+
+
+def _pk_representation(field):
+    def to_representation(value):
+        return field.to_representation(relations.PKOnlyObject(pk=value))
+
+    return to_representation
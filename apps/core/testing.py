@@ -0,0 +1,138 @@
+import json
+import os
+from pathlib import Path
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+
+
+class QueryCountSnapshotMixin:
+    """
+    records the query count of every URL in ``urlconf`` against a JSON snapshot
+
+    Each named pattern is requested with GET, plus ``extra_requests``, as
+    ``(method, url name, data)`` for writes. A count above the snapshot,
+    a changed status or an endpoint missing from it fails the test, so new
+    endpoints are reviewed before they are baselined. The file is only
+    written with ``UPDATE_QUERY_SNAPSHOTS=1``, from the current counts.
+    Requests go through ``get_client()``, the test client unless a
+    subclass authenticates one, and ``get_url_kwargs()`` gives the values
+    for the patterns' path converters.
+    """
+
+    urlconf = None
+    snapshot_path = None
+    extra_requests = ()
+
+    def get_client(self):
+        return self.client
+
+    def get_url_kwargs(self):
+        return {}
+
+    def get_requests(self):
+        namespace = self.urlconf.app_name
+        requests = [
+            ("GET", f"{namespace}:{pattern.name}", None)
+            for pattern in self.urlconf.urlpatterns
+            if isinstance(pattern, URLPattern) and pattern.name
+        ]
+        requests.extend(
+            (method, f"{namespace}:{name}", data)
+            for method, name, data in self.extra_requests
+        )
+
+        return requests
+
+    def reverse(self, name):
+        kwargs = self.get_url_kwargs()
+        pattern = next(
+            pattern
+            for pattern in self.urlconf.urlpatterns
+            if f"{self.urlconf.app_name}:{pattern.name}" == name
+        )
+        return reverse(
+            name, kwargs={key: kwargs[key] for key in pattern.pattern.converters}
+        )
+
+    def record_query_counts(self):
+        counts = {}
+        for method, name, data in self.get_requests():
+            client = self.get_client()
+            with CaptureQueriesContext(connection) as queries:
+                response = getattr(client, method.lower())(
+                    self.reverse(name), data, format="json"
+                )
+            # keep the status in view, a count for a 404 guards nothing
+            counts[f"{method} {name}"] = {
+                "queries": len(queries),
+                "status": response.status_code,
+            }
+
+        return counts
+
+    def compare_query_counts(self, counts, stored):
+        """what differs from the snapshot, as messages"""
+        problems = [
+            f"{key}: not in the snapshot" for key in sorted(counts.keys() - stored)
+        ]
+        problems += [
+            f"{key}: in the snapshot, not requested"
+            for key in sorted(stored.keys() - counts)
+        ]
+        problems += [
+            f"{key}: {stored[key]} -> {count}"
+            for key, count in counts.items()
+            if key in stored
+            and (
+                count["queries"] > stored[key]["queries"]
+                or count["status"] != stored[key]["status"]
+            )
+        ]
+
+        return problems
+
+    def test_query_count_snapshots(self):
+        counts = self.record_query_counts()
+        path = Path(self.snapshot_path)
+        if os.environ.get("UPDATE_QUERY_SNAPSHOTS") == "1":
+            path.write_text(json.dumps(counts, indent=2, sort_keys=True) + "\n")
+            return
+
+        stored = json.loads(path.read_text()) if path.exists() else {}
+        problems = self.compare_query_counts(counts, stored)
+        self.assertFalse(
+            problems,
+            "query counts went up, statuses changed or endpoints came and went, "
+            "run with UPDATE_QUERY_SNAPSHOTS=1 if intended",
+        )
+
+
+class MigrationTestMixin:
+    """
+    runs a test between two migrations of ``app``, for TransactionTestCase
+
+    ``setUp`` migrates the app back to ``migrate_from`` and puts the
+    historical apps in ``self.apps``; ``migrate(name)`` moves it and
+    returns the apps at ``name``. Other apps stay at their latest.
+    """
+
+    app = None
+    migrate_from = None
+
+    def setUp(self):
+        super().setUp()
+        self.leaf = MigrationExecutor(connection).loader.graph.leaf_nodes()
+        # a fresh executor, one made now would think nothing needs applying
+        self.addCleanup(lambda: MigrationExecutor(connection).migrate(self.leaf))
+        self.apps = self.migrate(self.migrate_from)
+
+    def migrate(self, name):
+        executor = MigrationExecutor(connection)
+        others = [node for node in self.leaf if node[0] != self.app]
+        targets = [*others, (self.app, name)]
+        executor.migrate(targets)
+
+        return executor.loader.project_state(targets).apps
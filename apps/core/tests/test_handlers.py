@@ -0,0 +1,94 @@
+import os
+import tempfile
+from unittest import mock
+
+from core.db.pool import get_pool_stats
+from core.handlers import ASGIHandler
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import SimpleTestCase, override_settings
+from django.urls import path
+
+
+def count_notes(request):
+    with connections["handler-test"].cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM note")
+        return HttpResponse(str(cursor.fetchone()[0]))
+
+
+async def hello(request):
+    return HttpResponse("hello")
+
+
+urlpatterns = [path("notes/", count_notes), path("hello/", hello)]
+
+
+# test the ASGI entry point gives sync views' connections back
+@override_settings(ASGI_ROOT_URLCONF=__name__)
+class ASGIHandlerTests(SimpleTestCase):
+    """tests on core.handlers.ASGIHandler with a pooled SQLite file"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        connections.settings["handler-test"] = {
+            **connection.settings_dict,
+            "ENGINE": "core.db.backends.sqlite3",
+            "NAME": os.path.join(directory.name, "handler.sqlite3"),
+            "POOL": {"MAX_SIZE": 2, "TIMEOUT": 0.1},
+        }
+        self.addCleanup(connections.settings.pop, "handler-test")
+        self.addCleanup(connections.__delitem__, "handler-test")
+        wrapper = connections["handler-test"]
+        self.addCleanup(lambda: wrapper.get_pool().close())
+        with wrapper.cursor() as cursor:
+            cursor.execute("CREATE TABLE note (body text)")
+        wrapper.close()
+
+    async def get(self, handler, path):
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": path,
+            "query_string": b"",
+            "headers": [(b"host", b"testserver")],
+        }
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        async def send(message):
+            messages.append(message)
+
+        await handler(scope, receive, send)
+        return messages
+
+    async def test_sync_view_connections_are_returned(self):
+        """a pool of two serves any number of requests to a sync view"""
+        handler = ASGIHandler()
+        for _ in range(5):
+            messages = await self.get(handler, "/notes/")
+            self.assertEqual(messages[0]["status"], 200)
+            self.assertEqual(messages[1]["body"], b"0")
+
+        stats = get_pool_stats()["handler-test"]
+        self.assertEqual(stats["in_use"], 0)
+        self.assertEqual(stats["timeouts"], 0)
+
+    async def test_async_view(self):
+        messages = await self.get(ASGIHandler(), "/hello/")
+
+        self.assertEqual(messages[0]["status"], 200)
+        self.assertEqual(messages[1]["body"], b"hello")
+
+    async def test_async_view_stays_on_loop(self):
+        """a cookie-less request through MIDDLEWARE to an async view never hops"""
+        hop = mock.Mock(side_effect=AssertionError("hopped to a thread"))
+        with mock.patch("django.utils.deprecation.sync_to_async", hop), mock.patch(
+            "django.core.handlers.base.sync_to_async", hop
+        ), mock.patch("core.middleware.sync_to_async", hop):
+            messages = await self.get(ASGIHandler(), "/hello/")
+
+        self.assertEqual(messages[0]["status"], 200)
+        hop.assert_not_called()
@@ -0,0 +1,118 @@
+import os
+import tempfile
+from urllib.parse import quote
+
+from django.test import TestCase, override_settings
+from django.utils.http import http_date
+
+
+# test uploads are served with validators, ranges and offload
+class MediaViewTests(TestCase):
+    """tests on the media view behind MEDIA_URL"""
+
+    content = bytes(range(256)) * 4
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        os.makedirs(os.path.join(media.name, "users", "variants", "a.png"))
+        self.path = os.path.join(media.name, "users", "a.png")
+        with open(self.path, "wb") as file:
+            file.write(self.content)
+
+    def test_get(self):
+        with self.assertNumQueries(0):
+            response = self.client.get("/media/users/a.png")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(response["Content-Length"], str(len(self.content)))
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(response["Cache-Control"], "public, no-cache")
+
+    def test_missing_and_traversal(self):
+        self.assertEqual(self.client.get("/media/users/b.png").status_code, 404)
+        self.assertEqual(self.client.get("/media/users/").status_code, 404)
+        self.assertEqual(self.client.get("/media/../manage.py").status_code, 404)
+
+    def test_not_modified(self):
+        response = self.client.get("/media/users/a.png")
+        etag = response["ETag"]
+
+        response = self.client.get("/media/users/a.png", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        since = http_date(os.stat(self.path).st_mtime)
+        response = self.client.get("/media/users/a.png", HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 304)
+
+    def test_range(self):
+        response = self.client.get("/media/users/a.png", HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), self.content[10:20])
+        self.assertEqual(response["Content-Range"], f"bytes 10-19/{len(self.content)}")
+        self.assertEqual(response["Content-Length"], "10")
+
+        # the final bytes
+        response = self.client.get("/media/users/a.png", HTTP_RANGE="bytes=-5")
+        self.assertEqual(b"".join(response.streaming_content), self.content[-5:])
+
+        response = self.client.get("/media/users/a.png", HTTP_RANGE="bytes=5000-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(self.content)}")
+
+    def test_stale_if_range(self):
+        """a range against another version gets the whole file"""
+        response = self.client.get(
+            "/media/users/a.png", HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"stale"'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+
+    def test_immutable(self):
+        name = "users/variants/a.png/64.0123456789abcdef.webp"
+        with open(self.path.replace("users/a.png", name), "wb") as file:
+            file.write(self.content)
+
+        response = self.client.get(f"/media/{name}")
+
+        self.assertIn("immutable", response["Cache-Control"])
+
+    @override_settings(MEDIA_SENDFILE="x-accel-redirect")
+    def test_accel_redirect(self):
+        response = self.client.get("/media/users/a.png")
+
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/users/a.png")
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertIn("ETag", response)
+
+    @override_settings(MEDIA_SENDFILE="x-accel-redirect")
+    def test_accel_redirect_non_ascii(self):
+        """non-ASCII names are percent-encoded, not MIME-encoded by Django"""
+        name = os.path.join(os.path.dirname(self.path), "ñandú 1.png")
+        with open(name, "wb") as file:
+            file.write(self.content)
+
+        response = self.client.get(f"/media/users/{quote('ñandú 1.png')}")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response["X-Accel-Redirect"],
+            "/protected-media/users/%C3%B1and%C3%BA%201.png",
+        )
+
+        with self.settings(MEDIA_SENDFILE="x-sendfile"):
+            response = self.client.get(f"/media/users/{quote('ñandú 1.png')}")
+        self.assertEqual(response["X-Sendfile"], quote(name))
+
+    @override_settings(MEDIA_SENDFILE="x-sendfile")
+    def test_sendfile(self):
+        response = self.client.get("/media/users/a.png")
+
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["X-Sendfile"], self.path)
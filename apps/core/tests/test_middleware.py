@@ -0,0 +1,145 @@
+import datetime
+
+from core.checks import check_middleware_security
+from core.middleware import (
+    CsrfViewMiddleware,
+    MessageMiddleware,
+    SessionMiddleware,
+    is_bearer_api_request,
+)
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from oauth2_provider.models import AccessToken, get_application_model
+from rest_framework import status
+from rest_framework.test import APIClient
+
+User = get_user_model()
+Application = get_application_model()
+
+
+# test the middleware bearer API requests skip
+class LeanAPIMiddlewareTests(TestCase):
+    """tests on the session, CSRF, auth, message and clickjacking middleware"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="testuser", email="testemail@gmail.com", password="abcde12345"
+        )
+        application = Application.objects.create(
+            name="Test Application",
+            redirect_uris="http://127.0.0.1:8000/noexist/callback",
+            user=cls.user,
+            client_type=Application.CLIENT_CONFIDENTIAL,
+            authorization_grant_type=Application.GRANT_PASSWORD,
+        )
+        cls.access_token = AccessToken.objects.create(
+            user=cls.user,
+            token="1234567890",
+            application=application,
+            expires=timezone.now() + datetime.timedelta(days=1),
+        )
+        cls.url = reverse("users:user-detail", kwargs={"user_pk": cls.user.pk})
+
+    def test_is_bearer_api_request(self):
+        factory = RequestFactory()
+
+        self.assertTrue(
+            is_bearer_api_request(factory.get(self.url, HTTP_AUTHORIZATION="Bearer a"))
+        )
+        self.assertTrue(
+            is_bearer_api_request(factory.get(self.url, HTTP_AUTHORIZATION="bearer a"))
+        )
+        self.assertFalse(is_bearer_api_request(factory.get(self.url)))
+        self.assertFalse(
+            is_bearer_api_request(factory.get(self.url, HTTP_AUTHORIZATION="Basic a"))
+        )
+        self.assertFalse(
+            is_bearer_api_request(factory.get("/admin/", HTTP_AUTHORIZATION="Bearer a"))
+        )
+
+    def test_bearer_request(self):
+        client = APIClient(enforce_csrf_checks=True)
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access_token}")
+
+        response = client.patch(self.url, {"about": "Nothing"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = client.get(self.url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["about"], "Nothing")
+        self.assertFalse(hasattr(response.wsgi_request, "session"))
+        self.assertFalse(hasattr(response.wsgi_request, "_messages"))
+        self.assertEqual(response.wsgi_request.user, self.user)
+        self.assertNotIn("X-Frame-Options", response)
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+
+    def test_session_request(self):
+        """the browsable API keeps the full stack"""
+        response = self.client.get(self.url, HTTP_ACCEPT="text/html")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(hasattr(response.wsgi_request, "session"))
+        self.assertTrue(hasattr(response.wsgi_request, "_messages"))
+        self.assertEqual(response["X-Frame-Options"], "DENY")
+
+    def test_admin(self):
+        response = self.client.get(
+            reverse("admin:login"), HTTP_AUTHORIZATION=f"Bearer {self.access_token}"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(hasattr(response.wsgi_request, "session"))
+        self.assertEqual(response["X-Frame-Options"], "DENY")
+        self.assertIn(settings.CSRF_COOKIE_NAME, response.cookies)
+
+    def test_hook_blocks(self):
+        """under ASGI only the hooks that may reach the database hop"""
+        request = RequestFactory().get("/")
+        sessions = SessionMiddleware(lambda request: HttpResponse())
+        sessions.process_request(request)
+        self.assertFalse(sessions.hook_blocks("process_response", request))
+        request.session.get("visits")
+        self.assertTrue(sessions.hook_blocks("process_response", request))
+
+        messages = MessageMiddleware(lambda request: HttpResponse())
+        messages.process_request(request)
+        self.assertFalse(messages.hook_blocks("process_response", request))
+        list(request._messages)
+        self.assertTrue(messages.hook_blocks("process_response", request))
+
+        csrf = CsrfViewMiddleware(lambda request: HttpResponse())
+        self.assertFalse(csrf.hook_blocks("process_view", request))
+        self.assertTrue(csrf.hook_blocks("process_view", RequestFactory().post("/")))
+
+    def test_deploy_checks(self):
+        """Django's middleware checks see the subclasses, or their absence"""
+        # the production settings, which leave HSTS off
+        with self.settings(CSRF_COOKIE_SECURE=True, SECURE_SSL_REDIRECT=True):
+            self.assertEqual(
+                [message.id for message in check_middleware_security(None)],
+                ["security.W004"],
+            )
+
+            with self.settings(X_FRAME_OPTIONS="SAMEORIGIN", CSRF_COOKIE_SECURE=False):
+                self.assertEqual(
+                    [message.id for message in check_middleware_security(None)],
+                    ["security.W004", "security.W019", "security.W016"],
+                )
+
+        middleware = [
+            path
+            for path in settings.MIDDLEWARE
+            if not path.endswith(
+                ("SecurityMiddleware", "XFrameOptionsMiddleware", "CsrfViewMiddleware")
+            )
+        ]
+        with self.settings(MIDDLEWARE=middleware):
+            self.assertEqual(
+                [message.id for message in check_middleware_security(None)],
+                ["core.W001", "core.W002", "core.W003"],
+            )
@@ -0,0 +1,180 @@
+import os
+import tempfile
+import threading
+from unittest import mock
+
+from core.db.backends.sqlite3.base import DatabaseWrapper
+from core.db.pool import ConnectionPool, PoolTimeout, get_pool_stats
+from django.db import connection
+from django.test import SimpleTestCase
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+# test the pool hands connections out, checks them and counts
+class ConnectionPoolTests(SimpleTestCase):
+    """tests on ConnectionPool with stand-in connections"""
+
+    def test_reuse(self):
+        pool = ConnectionPool(max_size=2)
+        first = pool.checkout(FakeConnection, lambda connection: True)
+        pool.checkin(first)
+        second = pool.checkout(FakeConnection, lambda connection: True)
+
+        self.assertIs(first, second)
+        self.assertEqual(pool.stats()["created"], 1)
+        self.assertEqual(pool.stats()["checkouts"], 2)
+        self.assertEqual(pool.stats()["in_use"], 1)
+
+    def test_not_reusable(self):
+        pool = ConnectionPool()
+        first = pool.checkout(FakeConnection, lambda connection: True)
+        pool.checkin(first, reusable=False)
+
+        self.assertTrue(first.closed)
+        self.assertIsNot(pool.checkout(FakeConnection, lambda c: True), first)
+        self.assertEqual(pool.stats()["discarded"], 1)
+        self.assertEqual(pool.stats()["size"], 1)
+
+    def test_health_check(self):
+        pool = ConnectionPool(health_check_interval=0)
+        first = pool.checkout(FakeConnection, lambda connection: True)
+        pool.checkin(first)
+        second = pool.checkout(FakeConnection, lambda connection: False)
+
+        self.assertIsNot(first, second)
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.stats()["health_check_failures"], 1)
+
+    def test_no_health_check_while_fresh(self):
+        pool = ConnectionPool(health_check_interval=60)
+        check = mock.Mock(return_value=True)
+        pool.checkin(pool.checkout(FakeConnection, check))
+        pool.checkout(FakeConnection, check)
+
+        check.assert_not_called()
+
+    def test_max_lifetime(self):
+        pool = ConnectionPool(max_lifetime=0)
+        first = pool.checkout(FakeConnection, lambda connection: True)
+        pool.checkin(first)
+
+        self.assertIsNot(pool.checkout(FakeConnection, lambda c: True), first)
+
+    def test_wait(self):
+        pool = ConnectionPool(max_size=1, timeout=5)
+        first = pool.checkout(FakeConnection, lambda connection: True)
+        timer = threading.Timer(0.05, pool.checkin, [first])
+        timer.start()
+        second = pool.checkout(FakeConnection, lambda connection: True)
+        timer.join()
+
+        self.assertIs(first, second)
+        self.assertEqual(pool.stats()["waits"], 1)
+        self.assertGreater(pool.stats()["wait_time"], 0)
+
+    def test_timeout(self):
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        pool.checkout(FakeConnection, lambda connection: True)
+
+        with self.assertRaises(PoolTimeout):
+            pool.checkout(FakeConnection, lambda connection: True)
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+    def test_connect_error(self):
+        pool = ConnectionPool(max_size=1)
+
+        with self.assertRaises(OSError):
+            pool.checkout(mock.Mock(side_effect=OSError), lambda c: True)
+        # the slot is free again
+        pool.checkout(FakeConnection, lambda connection: True)
+        self.assertEqual(pool.stats()["errors"], 1)
+
+    def test_closed(self):
+        pool = ConnectionPool()
+        first = pool.checkout(FakeConnection, lambda connection: True)
+        second = pool.checkout(FakeConnection, lambda connection: True)
+        pool.checkin(first)
+        pool.close()
+        pool.checkin(second)
+
+        self.assertTrue(first.closed)
+        self.assertTrue(second.closed)
+        self.assertEqual(pool.stats()["size"], 0)
+
+
+# test the pooled SQLite backend on a database file
+class PooledBackendTests(SimpleTestCase):
+    """tests on PooledDatabaseWrapperMixin through core.db.backends.sqlite3"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.settings_dict = {
+            **connection.settings_dict,
+            "ENGINE": "core.db.backends.sqlite3",
+            "NAME": os.path.join(directory.name, "pool.sqlite3"),
+            "POOL": {"MAX_SIZE": 2},
+        }
+        wrapper = self.make_wrapper()
+        with wrapper.cursor() as cursor:
+            cursor.execute("CREATE TABLE note (body text)")
+        self.addCleanup(wrapper.get_pool().close)
+        wrapper.close()
+
+    def make_wrapper(self):
+        return DatabaseWrapper(self.settings_dict, alias="pool-test")
+
+    def count_notes(self, wrapper):
+        with wrapper.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM note")
+            return cursor.fetchone()[0]
+
+    def test_close_returns_the_connection(self):
+        first = self.make_wrapper()
+        first.ensure_connection()
+        raw = first.connection
+        first.close()
+        second = self.make_wrapper()
+        second.ensure_connection()
+
+        self.assertIs(second.connection, raw)
+        self.assertEqual(get_pool_stats()["pool-test"]["created"], 1)
+        second.close()
+
+    def test_rolls_back_leftovers(self):
+        first = self.make_wrapper()
+        first.set_autocommit(False)
+        with first.cursor() as cursor:
+            cursor.execute("INSERT INTO note VALUES ('draft')")
+        first.close()
+
+        self.assertEqual(self.count_notes(self.make_wrapper()), 0)
+
+    def test_closed_inside_atomic(self):
+        """the wrapper still holds the connection, no one else may get it"""
+        first = self.make_wrapper()
+        first.ensure_connection()
+        first.in_atomic_block = True
+        raw = first.connection
+        first.close()
+        first.in_atomic_block = False
+
+        second = self.make_wrapper()
+        second.ensure_connection()
+        self.assertIsNot(second.connection, raw)
+        second.close()
+
+    def test_pooling_off(self):
+        self.settings_dict["POOL"] = False
+        wrapper = self.make_wrapper()
+        wrapper.ensure_connection()
+        wrapper.close()
+
+        self.assertEqual(wrapper.get_pool().stats()["checkouts"], 1)
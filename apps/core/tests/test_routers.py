@@ -0,0 +1,170 @@
+from io import StringIO
+
+from blog.models import Post
+from core.checks import check_replica_pin_cache
+from core.db.routers import (
+    ReplicaRouter,
+    pin_to_primary,
+    routing_request,
+    use_primary,
+)
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from django.urls import resolve, reverse
+from oauth2_provider.models import get_application_model
+from rest_framework import status
+
+User = get_user_model()
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
+
+# test reads go to the replica unless the client has to see its writes
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    tests on ReplicaRouter with a second SQLite database as the replica,
+    empty until ``sync_sqlite_replica`` copies the primary over
+    """
+
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="testemail@gmail.com", password="abcde12345"
+        )
+        self.post = Post.objects.create(
+            author=self.user, title="Hello World!", body="How to hack NASA"
+        )
+        self.detail_url = reverse("blog:post-detail", kwargs={"post_pk": self.post.pk})
+
+    def get_request(self, url, method="get", **extra):
+        request = getattr(RequestFactory(), method)(url, **extra)
+        request.resolver_match = resolve(url)
+        return request
+
+    def db_for_read(self, request, model=Post):
+        with routing_request(request):
+            return ReplicaRouter().db_for_read(model) or "default"
+
+    def test_router(self):
+        url = self.detail_url
+        self.assertEqual(self.db_for_read(self.get_request(url)), "replica")
+        self.assertEqual(self.db_for_read(self.get_request(url, "post")), "default")
+        # models and views of other apps
+        self.assertEqual(
+            self.db_for_read(self.get_request(url), get_application_model()),
+            "default",
+        )
+        self.assertEqual(self.db_for_read(self.get_request("/o/token/")), "default")
+        self.assertEqual(self.db_for_read(None), "default")
+
+        with use_primary():
+            self.assertEqual(self.db_for_read(self.get_request(url)), "default")
+
+        replica_post = Post(title="Hello World!")
+        replica_post._state.db = "replica"
+        self.assertEqual(
+            ReplicaRouter().db_for_write(Post, instance=replica_post), "default"
+        )
+
+    def test_pinned_by_cookie(self):
+        response = HttpResponse()
+        pin_to_primary(self.get_request(self.detail_url, "post"), response)
+        request = self.get_request(
+            self.detail_url, HTTP_COOKIE=response.cookies.output(header="", sep=";")
+        )
+
+        self.assertEqual(self.db_for_read(request), "default")
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_pinned_by_token(self):
+        pin_to_primary(
+            self.get_request(self.detail_url, "post", HTTP_AUTHORIZATION="Bearer a"),
+            HttpResponse(),
+        )
+
+        pinned = self.get_request(self.detail_url, HTTP_AUTHORIZATION="Bearer a")
+        self.assertEqual(self.db_for_read(pinned), "default")
+        other = self.get_request(self.detail_url, HTTP_AUTHORIZATION="Bearer b")
+        self.assertEqual(self.db_for_read(other), "replica")
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_list_cache(self):
+        """list misses read the replica, cached once it has the last write"""
+        cache.clear()
+        url = reverse("blog:post-list")
+        call_command("sync_sqlite_replica", stdout=StringIO())
+        Post.objects.create(author=self.user, title="Second", body="...")
+
+        # the replica lags behind the write, its pages are not kept
+        self.assertEqual(len(self.client.get(url).data["results"]), 1)
+        call_command("sync_sqlite_replica", stdout=StringIO())
+        self.assertEqual(len(self.client.get(url).data["results"]), 2)
+        with self.assertNumQueries(2, using="replica"):
+            self.client.get(url)
+
+        # past the lag bound, replica pages are cached
+        with self.settings(REPLICA_PIN_SECONDS=0):
+            self.client.get(url)
+        with self.assertNumQueries(0, using="replica"):
+            self.assertEqual(len(self.client.get(url).data["results"]), 2)
+
+    def test_pin_cache_check(self):
+        """replicas refuse pin caches kept per process"""
+        self.assertEqual(
+            [error.id for error in check_replica_pin_cache(None)], ["core.E001"]
+        )
+
+        with self.settings(REPLICA_PIN_CACHE_ALIAS="missing"):
+            self.assertEqual(
+                [error.id for error in check_replica_pin_cache(None)], ["core.E001"]
+            )
+
+        shared = {
+            **LOCMEM_CACHES,
+            "shared": {
+                "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+                "LOCATION": "shared_cache",
+            },
+        }
+        with self.settings(CACHES=shared, REPLICA_PIN_CACHE_ALIAS="shared"):
+            self.assertEqual(check_replica_pin_cache(None), [])
+        with self.settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(check_replica_pin_cache(None), [])
+
+    def test_read_your_writes(self):
+        # the replica has not caught up with setUp
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("blog:comment-list", kwargs={"post_pk": self.post.pk}),
+            {"body": "First!"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        pin = response.cookies[settings.REPLICA_PIN_COOKIE]
+
+        # the writer reads the primary, even logged out
+        self.client.logout()
+        self.client.cookies[pin.key] = pin.value
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["comment_count"], 1)
+
+        # other clients see the replica until it catches up
+        self.client.cookies.clear()
+        self.assertEqual(
+            self.client.get(self.detail_url).status_code, status.HTTP_404_NOT_FOUND
+        )
+        call_command("sync_sqlite_replica", stdout=StringIO())
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["comment_count"], 1)
@@ -0,0 +1,90 @@
+import os
+import tempfile
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError, connection, connections, transaction
+from django.test import SimpleTestCase
+
+
+# test the tuned SQLite backend on a database file
+class TunedSQLiteTests(SimpleTestCase):
+    """tests on the pragmas and transaction mode of core.db.backends.sqlite3"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "tuned.sqlite3")
+
+    def add_database(self, alias, **options):
+        connections.settings[alias] = {
+            **connection.settings_dict,
+            "ENGINE": "core.db.backends.sqlite3",
+            "NAME": self.path,
+            "OPTIONS": options,
+            "POOL": False,
+        }
+        self.addCleanup(connections.settings.pop, alias)
+        self.addCleanup(connections.__delitem__, alias)
+        self.addCleanup(connections[alias].close)
+
+        return connections[alias]
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_pragmas(self):
+        wrapper = self.add_database("tuned")
+
+        self.assertEqual(self.pragma(wrapper, "journal_mode"), "wal")
+        self.assertEqual(self.pragma(wrapper, "busy_timeout"), 5000)
+        # NORMAL
+        self.assertEqual(self.pragma(wrapper, "synchronous"), 1)
+        self.assertEqual(self.pragma(wrapper, "cache_size"), -20000)
+        self.assertEqual(self.pragma(wrapper, "foreign_keys"), 1)
+
+    def test_pragma_overrides(self):
+        wrapper = self.add_database(
+            "tuned", pragmas={"cache_size": -1000, "synchronous": None}
+        )
+
+        self.assertEqual(self.pragma(wrapper, "cache_size"), -1000)
+        # SQLite's default, FULL
+        self.assertEqual(self.pragma(wrapper, "synchronous"), 2)
+
+    def test_immediate_transactions(self):
+        """the second writer is turned away at BEGIN, before it reads anything"""
+        first = self.add_database("first")
+        second = self.add_database("second", pragmas={"busy_timeout": 0})
+        with first.cursor() as cursor:
+            cursor.execute("CREATE TABLE note (body text)")
+
+        with transaction.atomic(using="first"):
+            with self.assertRaisesMessage(OperationalError, "locked"):
+                with transaction.atomic(using="second"):
+                    pass
+
+    def test_deferred_transactions(self):
+        first = self.add_database("first")
+        second = self.add_database(
+            "second", transaction_mode="deferred", pragmas={"busy_timeout": 0}
+        )
+        with first.cursor() as cursor:
+            cursor.execute("CREATE TABLE note (body text)")
+
+        with transaction.atomic(using="first"):
+            with first.cursor() as cursor:
+                cursor.execute("INSERT INTO note VALUES ('first')")
+            # WAL readers see the last commit while the writer works
+            with transaction.atomic(using="second"):
+                with second.cursor() as cursor:
+                    cursor.execute("SELECT COUNT(*) FROM note")
+                    self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_bad_transaction_mode(self):
+        self.add_database("tuned", transaction_mode="eventually")
+
+        with self.assertRaises(ImproperlyConfigured):
+            with transaction.atomic(using="tuned"):
+                pass
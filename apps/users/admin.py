@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
-from .models import User
+from .models import OutboxMessage, User
 
 
 class UserAdmin(BaseUserAdmin):
@@ -16,6 +16,7 @@ class UserAdmin(BaseUserAdmin):
                     "about",
                     "country",
                     "image",
+                    "email_verified",
                 ),
             },
         ),
@@ -23,3 +24,13 @@ class UserAdmin(BaseUserAdmin):
 
 
 admin.site.register(User, UserAdmin)
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    """lets staff see what is queued, sent and failed"""
+
+    list_display = ("subject", "to", "created", "attempts", "sent_at", "failed_at")
+    list_filter = ("sent_at", "failed_at")
+    search_fields = ("to", "subject")
+    readonly_fields = ("last_error",)
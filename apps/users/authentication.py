@@ -0,0 +1,41 @@
+from rest_framework import authentication, exceptions
+
+from .tokens import (
+    InvalidToken,
+    SignedToken,
+    decode_signed_token,
+    get_token_user,
+    is_signed_token,
+    signed_tokens_enabled,
+)
+
+
+class SignedTokenAuthentication(authentication.BaseAuthentication):
+    """
+    authenticates signed bearer tokens from the signature alone, no queries
+
+    Opaque tokens, and every token while ``SIGNED_ACCESS_TOKENS`` is off,
+    are left to OAuth2Authentication. The user is known by id only, its
+    other fields load from the database on first access.
+    """
+
+    www_authenticate_realm = "api"
+
+    def authenticate(self, request):
+        header = authentication.get_authorization_header(request).split()
+        if len(header) != 2 or header[0].lower() != b"bearer":
+            return None
+
+        token = header[1].decode("latin-1")
+        if not signed_tokens_enabled() or not is_signed_token(token):
+            return None
+
+        try:
+            claims = decode_signed_token(token)
+        except InvalidToken as error:
+            raise exceptions.AuthenticationFailed(str(error))
+
+        return get_token_user(claims["sub"]), SignedToken(token, claims)
+
+    def authenticate_header(self, request):
+        return f'Bearer realm="{self.www_authenticate_realm}"'
@@ -0,0 +1,17 @@
+from core.checks import check_shared_cache
+from django.core.checks import Tags, register
+
+from .tokens import get_token_settings, signed_tokens_enabled
+
+
+@register(Tags.caches)
+def check_signed_token_cache(app_configs, **kwargs):
+    """revocations kept per process would let other workers accept the token"""
+    if not signed_tokens_enabled():
+        return []
+
+    return check_shared_cache(
+        get_token_settings().get("SIGNED_ACCESS_TOKEN_CACHE_ALIAS", "default"),
+        "OAUTH2_PROVIDER['SIGNED_ACCESS_TOKEN_CACHE_ALIAS']",
+        "users.E001",
+    )
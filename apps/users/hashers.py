@@ -0,0 +1,36 @@
+from core.executors import run_in_executor
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher
+
+
+class PooledArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2 with costs from settings, hashing on a bounded worker pool
+
+    Hashes and verifications run on ``PASSWORD_HASHING_WORKERS`` threads
+    per process. Changing ``ARGON2_TIME_COST``, ``ARGON2_MEMORY_COST`` or
+    ``ARGON2_PARALLELISM`` rehashes each password at its next successful
+    check, that is the user's next login.
+    """
+
+    @property
+    def time_cost(self):
+        return getattr(settings, "ARGON2_TIME_COST", Argon2PasswordHasher.time_cost)
+
+    @property
+    def memory_cost(self):
+        return getattr(settings, "ARGON2_MEMORY_COST", Argon2PasswordHasher.memory_cost)
+
+    @property
+    def parallelism(self):
+        return getattr(settings, "ARGON2_PARALLELISM", Argon2PasswordHasher.parallelism)
+
+    def run(self, fn, *args):
+        workers = getattr(settings, "PASSWORD_HASHING_WORKERS", 2)
+        return run_in_executor("password-hashing", workers, fn, *args)
+
+    def encode(self, password, salt):
+        return self.run(super().encode, password, salt)
+
+    def verify(self, password, encoded):
+        return self.run(super().verify, password, encoded)
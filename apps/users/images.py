@@ -0,0 +1,166 @@
+import hashlib
+import io
+import logging
+import posixpath
+
+from core.executors import get_executor
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Pillow format, file extension and save options per variant format
+FORMATS = {
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def get_variant_directory(name):
+    """variants of ``users/a.png`` live under ``users/variants/a.png/``"""
+    head, tail = posixpath.split(name)
+    return posixpath.join(head, "variants", tail)
+
+
+def get_variant_name(name, size, image_format, content):
+    """content-addressed, so the media view can serve it as immutable"""
+    digest = hashlib.sha256(content).hexdigest()[:16]
+    extension = FORMATS[image_format][1]
+    return posixpath.join(get_variant_directory(name), f"{size}.{digest}.{extension}")
+
+
+def encode(image, image_format):
+    pillow_format, _, options = FORMATS[image_format]
+    has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+    if pillow_format == "JPEG":
+        # JPEG has no alpha, flatten onto white rather than black
+        if has_alpha:
+            rgba = image.convert("RGBA")
+            image = Image.new("RGB", rgba.size, "white")
+            image.paste(rgba, mask=rgba.getchannel("A"))
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+    elif image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+    buffer = io.BytesIO()
+    image.save(buffer, pillow_format, **options)
+    return buffer.getvalue()
+
+
+def build_variants(name, storage):
+    """
+    resize and re-encode the image ``name``, ``{size: {format: name}}``
+
+    Every size in ``USER_IMAGE_VARIANT_SIZES`` bounds the longest side,
+    images are never upscaled. EXIF orientation is applied and the rest
+    of the metadata dropped.
+    """
+    with storage.open(name) as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+
+    variants = {}
+    for size in settings.USER_IMAGE_VARIANT_SIZES:
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.Resampling.LANCZOS)
+        for image_format in settings.USER_IMAGE_VARIANT_FORMATS:
+            content = encode(resized, image_format)
+            variant = get_variant_name(name, size, image_format, content)
+            # a rebuild with the same output keeps the file, and its URL
+            if not storage.exists(variant):
+                variant = storage.save(variant, ContentFile(content))
+            variants.setdefault(str(size), {})[image_format] = variant
+
+    return variants
+
+
+def delete_variants(name, storage, keep=()):
+    """delete the variants of the image ``name``, except the names in ``keep``"""
+    directory = get_variant_directory(name)
+    try:
+        _, files = storage.listdir(directory)
+    except FileNotFoundError:
+        return
+
+    for file_name in files:
+        variant = posixpath.join(directory, file_name)
+        if variant not in keep:
+            storage.delete(variant)
+
+
+def generate_user_variants(user_pk, name):
+    """
+    build the variants of a user's image and store them on the user
+
+    Nothing is stored if the image was replaced or removed meanwhile, the
+    variants just built are deleted instead.
+    """
+    User = get_user_model()
+    storage = User._meta.get_field("image").storage
+    try:
+        variants = build_variants(name, storage)
+    except FileNotFoundError:
+        # replaced and cleaned up before the job ran
+        return None
+    except (OSError, Image.DecompressionBombError):
+        logger.exception("Could not build the variants of %s", name)
+        delete_variants(name, storage)
+        return None
+
+    updated = User.objects.filter(pk=user_pk, image=name).update(
+        image_variants={"source": name, "sizes": variants}
+    )
+    if not updated:
+        delete_variants(name, storage)
+        return None
+
+    # a rebuild leaves the previous output behind
+    delete_variants(
+        name,
+        storage,
+        keep={variant for formats in variants.values() for variant in formats.values()},
+    )
+
+    return variants
+
+
+def _generate_in_worker(user_pk, name):
+    try:
+        generate_user_variants(user_pk, name)
+    finally:
+        # pool threads outlive requests, nothing else closes their connection
+        connection.close()
+
+
+def schedule_user_variants(user):
+    """build the variants of ``user.image`` on the image pool once committed"""
+    if not user.image:
+        return
+
+    user_pk, name = user.pk, user.image.name
+    transaction.on_commit(
+        lambda: get_executor("image-variants", settings.USER_IMAGE_WORKERS).submit(
+            _generate_in_worker, user_pk, name
+        )
+    )
+
+
+def get_variant_urls(user, request=None):
+    """``{size: {format: url}}`` for the current image, empty until built"""
+    variants = user.image_variants or {}
+    if not user.image or variants.get("source") != user.image.name:
+        return {}
+
+    storage = user.image.storage
+    urls = {}
+    for size, formats in variants.get("sizes", {}).items():
+        for image_format, name in formats.items():
+            url = storage.url(name)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            urls.setdefault(size, {})[image_format] = url
+
+    return urls
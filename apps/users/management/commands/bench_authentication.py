@@ -0,0 +1,86 @@
+import datetime
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+from oauth2_provider.contrib.rest_framework import OAuth2Authentication
+from oauth2_provider.models import get_access_token_model, get_application_model
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from users.authentication import SignedTokenAuthentication
+from users.oauth import access_token_cache
+from users.tokens import make_signed_token
+
+
+class Command(BaseCommand):
+    help = (
+        "Time bearer token authentication: opaque tokens from the database, "
+        "opaque tokens from the in-process cache and signed tokens. Sample "
+        "rows are written in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations", type=int, default=2000, help="Requests per case."
+        )
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        provider = {
+            **settings.OAUTH2_PROVIDER,
+            "SIGNED_ACCESS_TOKENS": True,
+            "ACCESS_TOKEN_CACHE_TIMEOUT": 60,
+            "ACCESS_TOKEN_CACHE_MAX_ENTRIES": 100,
+        }
+
+        with transaction.atomic(), override_settings(OAUTH2_PROVIDER=provider):
+            user = get_user_model().objects.create_user(
+                username="bench", email="bench@example.com"
+            )
+            application = get_application_model().objects.create(
+                name="bench",
+                user=user,
+                client_type="confidential",
+                authorization_grant_type="password",
+            )
+            get_access_token_model().objects.create(
+                user=user,
+                token="bench-opaque-token",
+                application=application,
+                expires=timezone.now() + datetime.timedelta(hours=1),
+                scope="read write",
+            )
+            signed = make_signed_token(user.pk, ["read", "write"], 3600)
+
+            cases = [
+                ("database", OAuth2Authentication(), "bench-opaque-token", True),
+                ("cached", OAuth2Authentication(), "bench-opaque-token", False),
+                ("signed", SignedTokenAuthentication(), signed, False),
+            ]
+            for name, authenticator, token, clear in cases:
+                access_token_cache.clear()
+                elapsed = self.time(authenticator, token, iterations, clear)
+                self.stdout.write(
+                    f"{name:<10} {elapsed / iterations * 1e6:8.1f} us/request"
+                )
+
+            transaction.set_rollback(True)
+
+    def time(self, authenticator, token, iterations, clear):
+        factory = APIRequestFactory()
+        requests = [
+            Request(factory.get("/", HTTP_AUTHORIZATION=f"Bearer {token}"))
+            for _ in range(iterations)
+        ]
+
+        start = time.perf_counter()
+        for request in requests:
+            if clear:
+                access_token_cache.clear()
+            assert authenticator.authenticate(request) is not None
+        return time.perf_counter() - start
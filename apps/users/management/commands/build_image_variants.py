@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from users.images import generate_user_variants
+
+
+class Command(BaseCommand):
+    help = "Build the resized variants of profile pictures that have none yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Rebuild every user's variants, after changing sizes or formats.",
+        )
+
+    def handle(self, *args, **options):
+        users = (
+            get_user_model()
+            .objects.exclude(image="")
+            .only("pk", "image", "image_variants")
+        )
+        built = failed = 0
+        for user in users.iterator():
+            current = (user.image_variants or {}).get("source") == user.image.name
+            if current and not options["all"]:
+                continue
+            if generate_user_variants(user.pk, user.image.name) is None:
+                failed += 1
+            else:
+                built += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Built variants for {built} users, {failed} failed.")
+        )
@@ -0,0 +1,103 @@
+import os
+import statistics
+import time
+
+from argon2.low_level import Type, hash_secret
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Time Argon2 on this machine and suggest the time and memory costs "
+        "that hash a password closest to a target latency"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target-ms",
+            type=float,
+            default=250,
+            help="Wanted time to hash one password, in milliseconds.",
+        )
+        parser.add_argument(
+            "--memory-cost",
+            type=int,
+            action="append",
+            help="Memory cost to try in KiB, repeatable.",
+        )
+        parser.add_argument(
+            "--parallelism", type=int, default=settings.ARGON2_PARALLELISM
+        )
+        parser.add_argument("--max-time-cost", type=int, default=10)
+        parser.add_argument(
+            "--samples", type=int, default=3, help="Hashes timed per setting."
+        )
+
+    def handle(self, *args, **options):
+        target = options["target_ms"] / 1000
+        memory_costs = options["memory_cost"] or [19456, 47104, 65536, 102400, 262144]
+        parallelism = options["parallelism"]
+
+        current = (
+            settings.ARGON2_TIME_COST,
+            settings.ARGON2_MEMORY_COST,
+            settings.ARGON2_PARALLELISM,
+        )
+        elapsed = self.measure(*current, options["samples"])
+        self.stdout.write(
+            "current: time_cost={} memory_cost={} parallelism={}".format(*current)
+            + f" ({elapsed * 1000:.0f} ms)"
+        )
+
+        best = None
+        for memory_cost in sorted(memory_costs):
+            fitting = None
+            for time_cost in range(1, options["max_time_cost"] + 1):
+                elapsed = self.measure(
+                    time_cost, memory_cost, parallelism, options["samples"]
+                )
+                self.stdout.write(
+                    f"  time_cost={time_cost:<3} memory_cost={memory_cost:<7} "
+                    f"{elapsed * 1000:8.1f} ms"
+                )
+                if elapsed > target:
+                    break
+                fitting = (time_cost, memory_cost, elapsed)
+
+            # prefer more memory, then more passes, within the target
+            if fitting is not None:
+                best = fitting
+
+        if best is None:
+            self.stdout.write(
+                self.style.WARNING("No setting hashes within the target latency.")
+            )
+            return
+
+        time_cost, memory_cost, elapsed = best
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Suggested ({elapsed * 1000:.0f} ms on {os.cpu_count()} CPUs):\n"
+                f"ARGON2_TIME_COST = {time_cost}\n"
+                f"ARGON2_MEMORY_COST = {memory_cost}\n"
+                f"ARGON2_PARALLELISM = {parallelism}"
+            )
+        )
+
+    def measure(self, time_cost, memory_cost, parallelism, samples):
+        timings = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            hash_secret(
+                b"calibration password",
+                os.urandom(16),
+                time_cost=time_cost,
+                memory_cost=memory_cost,
+                parallelism=parallelism,
+                hash_len=32,
+                type=Type.ID,
+            )
+            timings.append(time.perf_counter() - start)
+
+        return statistics.median(timings)
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.purge import get_purge_querysets, purge
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired grants and tokens and accounts never activated, "
+        "in small batches that are safe to run against the live database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows deleted per transaction.",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            help="Most rows deleted per second, unlimited by default.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count what would be deleted.",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        for label, queryset in get_purge_querysets():
+            if options["dry_run"]:
+                self.stdout.write(f"Would delete {queryset.count()} {label}.")
+                continue
+
+            total = 0
+            for count in purge(queryset, options["batch_size"], options["rate"]):
+                total += count
+                if options["verbosity"] > 1:
+                    self.stdout.write(f"Deleted {total} {label} so far.")
+            self.stdout.write(self.style.SUCCESS(f"Deleted {total} {label}."))
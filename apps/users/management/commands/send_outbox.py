@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.outbox import drain
+
+
+class Command(BaseCommand):
+    help = "Send queued emails from the outbox, in batches over reused connections"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once", action="store_true", help="Drain the due messages and exit."
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to wait between polls when the outbox is empty.",
+        )
+        parser.add_argument("--batch-size", type=int, help="Messages per connection.")
+        parser.add_argument(
+            "--concurrency", type=int, help="Batches sent at the same time."
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = drain(
+                batch_size=options["batch_size"], concurrency=options["concurrency"]
+            )
+            if sent or failed or options["verbosity"] > 1:
+                self.stdout.write(f"Sent {sent} messages, {failed} failed.")
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
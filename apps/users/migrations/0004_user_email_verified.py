@@ -0,0 +1,29 @@
+# Generated by Django 4.0.4 on 2026-10-18 18:45
+
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def mark_existing_verified(apps, schema_editor):
+    # accounts that were ever activated or used are not purge candidates
+    User = apps.get_model('users', 'User')
+    users = User.objects.using(schema_editor.connection.alias)
+    users.filter(Q(is_active=True) | Q(last_login__isnull=False)).update(
+        email_verified=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='email_verified',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_existing_verified, migrations.RunPython.noop),
+    ]
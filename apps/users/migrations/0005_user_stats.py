@@ -0,0 +1,53 @@
+# Generated by Django 4.0.4 on 2026-10-18 18:47
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+
+def backfill_stats(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Post = apps.get_model('blog', 'Post')
+    Comment = apps.get_model('blog', 'Comment')
+    db = schema_editor.connection.alias
+
+    posts = Post.objects.using(db).filter(author=OuterRef('pk')).order_by().values('author')
+    comments = Comment.objects.using(db).filter(author=OuterRef('pk')).order_by().values('author')
+    latest_post = Subquery(posts.annotate(last=Max('created')).values('last'))
+    latest_comment = Subquery(comments.annotate(last=Max('created')).values('last'))
+    User.objects.using(db).update(
+        post_count=Coalesce(Subquery(posts.annotate(n=Count('id')).values('n')), Value(0)),
+        comment_count=Coalesce(Subquery(comments.annotate(n=Count('id')).values('n')), Value(0)),
+        # GREATEST is NULL on SQLite if either side is, coalesce both ways
+        last_active_at=Greatest(
+            Coalesce(latest_post, latest_comment),
+            Coalesce(latest_comment, latest_post),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_email_verified'),
+        ('blog', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='last_active_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,7 @@ import uuid
 
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 from django_countries.fields import CountryField
 
 
@@ -13,5 +14,66 @@ class User(AbstractUser):
     about = models.CharField(max_length=254, blank=True)
     country = CountryField(blank_label="(select country)")
     image = models.ImageField(verbose_name="image", upload_to="users/", blank=True)
+    # resized copies of ``image``, written by users.images off the request
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # set by the activation link, unverified inactive accounts get purged
+    email_verified = models.BooleanField(default=False)
+    # denormalized from posts and comments, see blog.counters
+    post_count = models.PositiveIntegerField(default=0, editable=False)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    last_active_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     EMAIL_FIELD = "email"
+
+    # written by other code paths with UPDATE, never by a full save
+    DERIVED_FIELDS = ("image_variants", "post_count", "comment_count", "last_active_at")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # what a save renames from, blog responses show usernames
+        instance._loaded_username = instance.__dict__.get("username")
+        return instance
+
+    def save(self, *args, **kwargs):
+        # never write back values loaded before their writers updated them
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            skipped = self.get_deferred_fields() | set(self.DERIVED_FIELDS)
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped
+            ]
+        super().save(*args, **kwargs)
+
+
+class OutboxMessage(models.Model):
+    """stores a rendered email until the outbox worker has sent it"""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    to = models.EmailField()
+    subject = models.CharField(max_length=254)
+    body = models.TextField()
+    created = models.DateTimeField(auto_now_add=True)
+    # the worker leaves a message alone until then, retries push it back
+    send_after = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    failed_at = models.DateTimeField(null=True, blank=True)
+    # a worker's claim on the message, stale claims expire
+    locked_by = models.UUIDField(null=True, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["send_after"]
+        indexes = [
+            # the worker's scan for due messages
+            models.Index(
+                fields=["sent_at", "failed_at", "send_after"],
+                name="users_outbox_due_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {self.to}"
@@ -0,0 +1,130 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from oauth2_provider.oauth2_validators import OAuth2Validator
+
+
+def get_cache_settings():
+    """``(timeout, max_entries)`` of the access token cache, 0 turns it off"""
+    provider = getattr(settings, "OAUTH2_PROVIDER", {})
+    return (
+        provider.get("ACCESS_TOKEN_CACHE_TIMEOUT", 0),
+        provider.get("ACCESS_TOKEN_CACHE_MAX_ENTRIES", 0),
+    )
+
+
+class AccessTokenCache:
+    """
+    in-process LRU of validated access tokens, keyed by a hash of the token
+
+    Entries live until ``ACCESS_TOKEN_CACHE_TIMEOUT`` seconds pass or the
+    token expires, whichever is first. Token and user changes made in this
+    process evict right away through signals, other processes see them once
+    the timeout runs out, so keep it short.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._user_keys = {}
+        self.hits = self.misses = self.evictions = 0
+
+    def make_key(self, token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token):
+        timeout, max_entries = get_cache_settings()
+        if timeout <= 0 or max_entries <= 0:
+            return None
+
+        key = self.make_key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.time():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        # requests get their own instances, the cached ones stay pristine
+        access_token = copy.copy(entry[0])
+        access_token.user = copy.copy(entry[0].user)
+        return access_token
+
+    def set(self, token, access_token):
+        timeout, max_entries = get_cache_settings()
+        if timeout <= 0 or max_entries <= 0:
+            return
+
+        deadline = min(time.time() + timeout, access_token.expires.timestamp())
+        if deadline <= time.time():
+            return
+
+        key = self.make_key(token)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (access_token, deadline)
+            self._user_keys.setdefault(access_token.user_id, set()).add(key)
+            while len(self._entries) > max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def evict_token(self, token):
+        with self._lock:
+            self._remove(self.make_key(token))
+
+    def evict_user(self, user_id):
+        with self._lock:
+            for key in list(self._user_keys.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+            }
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+
+        user_id = entry[0].user_id
+        keys = self._user_keys.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._user_keys[user_id]
+
+
+access_token_cache = AccessTokenCache()
+
+
+class CachedOAuth2Validator(OAuth2Validator):
+    """OAuth2Validator that looks bearer tokens up in ``access_token_cache`` first"""
+
+    def _load_access_token(self, token):
+        access_token = access_token_cache.get(token)
+        if access_token is None:
+            access_token = super()._load_access_token(token)
+            if access_token is not None:
+                access_token_cache.set(token, access_token)
+
+        return access_token
@@ -0,0 +1,167 @@
+import datetime
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+
+def queue_email(to, subject, body):
+    """store a message for the outbox worker, inside the caller's transaction"""
+    return OutboxMessage.objects.create(to=to, subject=subject, body=body)
+
+
+def get_due_messages(now):
+    return OutboxMessage.objects.filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lt=now),
+        sent_at__isnull=True,
+        failed_at__isnull=True,
+        send_after__lte=now,
+    )
+
+
+def claim_batch(batch_size):
+    """
+    lock up to ``batch_size`` due messages for this worker and return them
+
+    The claim is a single conditional UPDATE, so concurrent workers never
+    get the same message; a claim left by a crashed worker expires after
+    ``OUTBOX_LOCK_TIMEOUT`` seconds.
+    """
+    now = timezone.now()
+    ids = list(
+        get_due_messages(now)
+        .order_by("send_after")
+        .values_list("pk", flat=True)[:batch_size]
+    )
+    if not ids:
+        return []
+
+    token = uuid.uuid4()
+    get_due_messages(now).filter(pk__in=ids).update(
+        locked_by=token,
+        locked_until=now + datetime.timedelta(seconds=settings.OUTBOX_LOCK_TIMEOUT),
+    )
+
+    return list(OutboxMessage.objects.filter(locked_by=token).order_by("send_after"))
+
+
+def describe_error(error):
+    return f"{type(error).__name__}: {error}"
+
+
+def send_batch(messages):
+    """
+    send over one connection, ``(message, error)`` pairs, error None when sent
+
+    A connection that cannot be opened fails every message of the batch,
+    so they are retried with backoff like any other failure.
+    """
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        return [(message, describe_error(error)) for message in messages]
+
+    results = []
+    try:
+        for message in messages:
+            email = EmailMessage(
+                message.subject, message.body, to=[message.to], connection=connection
+            )
+            try:
+                email.send()
+            except Exception as error:
+                results.append((message, describe_error(error)))
+            else:
+                results.append((message, None))
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            # what was sent is sent, the results stand
+            pass
+
+    return results
+
+
+def get_retry_delay(attempts):
+    """exponential backoff, doubling from OUTBOX_RETRY_BACKOFF up to an hour"""
+    return min(settings.OUTBOX_RETRY_BACKOFF * 2 ** (attempts - 1), 3600)
+
+
+def record_results(results):
+    now = timezone.now()
+    sent = [message.pk for message, error in results if error is None]
+    OutboxMessage.objects.filter(pk__in=sent).update(
+        sent_at=now, locked_by=None, locked_until=None
+    )
+
+    failed = []
+    for message, error in results:
+        if error is None:
+            continue
+
+        message.attempts += 1
+        message.last_error = error
+        message.locked_by = message.locked_until = None
+        if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            message.failed_at = now
+        else:
+            message.send_after = now + datetime.timedelta(
+                seconds=get_retry_delay(message.attempts)
+            )
+        failed.append(message)
+
+    OutboxMessage.objects.bulk_update(
+        failed,
+        [
+            "attempts",
+            "last_error",
+            "locked_by",
+            "locked_until",
+            "failed_at",
+            "send_after",
+        ],
+    )
+
+    return len(sent), len(failed)
+
+
+def drain(batch_size=None, concurrency=None):
+    """
+    send every due message, ``concurrency`` batches at a time
+
+    Each batch goes out over its own reused connection on a worker
+    thread; claiming and bookkeeping stay on the calling thread.
+    Returns the number of messages sent and failed.
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    concurrency = concurrency or settings.OUTBOX_CONCURRENCY
+    totals = [0, 0]
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while True:
+            batches = []
+            for _ in range(concurrency):
+                batch = claim_batch(batch_size)
+                if not batch:
+                    break
+                batches.append(batch)
+            if not batches:
+                return tuple(totals)
+
+            # each batch is recorded on its own, whatever the others did
+            futures = [executor.submit(send_batch, batch) for batch in batches]
+            for batch, future in zip(batches, futures):
+                try:
+                    results = future.result()
+                except Exception as error:
+                    results = [(message, describe_error(error)) for message in batch]
+                sent, failed = record_results(results)
+                totals[0] += sent
+                totals[1] += failed
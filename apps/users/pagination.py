@@ -0,0 +1,27 @@
+from core.pagination import KeysetPagination
+from django.db import connections
+
+
+class UsernamePagination(KeysetPagination):
+    """keyset pages of users in username order, served by its unique index"""
+
+    ordering = ("username",)
+
+
+def filter_username_prefix(queryset, prefix):
+    """
+    users whose username starts with ``prefix``, as an index range scan
+
+    PostgreSQL answers ``LIKE 'prefix%'`` from the ``varchar_pattern_ops``
+    index it keeps next to the unique one. SQLite's LIKE ignores case and
+    never uses an index, so there the prefix is also bounded by the range
+    ``prefix <= username < successor``, exact under its binary collation.
+    """
+    queryset = queryset.filter(username__startswith=prefix)
+    if connections[queryset.db].vendor == "sqlite":
+        queryset = queryset.filter(username__gte=prefix)
+        if ord(prefix[-1]) < 0x10FFFF:
+            successor = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+            queryset = queryset.filter(username__lt=successor)
+
+    return queryset
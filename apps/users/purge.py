@@ -0,0 +1,86 @@
+import datetime
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from oauth2_provider.models import (
+    get_access_token_model,
+    get_grant_model,
+    get_refresh_token_model,
+)
+
+
+def get_provider_seconds(name):
+    value = getattr(settings, "OAUTH2_PROVIDER", {}).get(name)
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+
+    return value
+
+
+def get_purge_querysets(now=None):
+    """
+    ``(label, queryset)`` of every kind of stale row, in a safe deletion order
+
+    Refresh tokens go before access tokens, as an access token is only
+    stale once no refresh token can still rotate it.
+    """
+    now = now or timezone.now()
+    signup_cutoff = now - datetime.timedelta(days=settings.PASSWORD_RESET_TIMEOUT_DAYS)
+    # revoked refresh tokens are still accepted for this long
+    grace = get_provider_seconds("REFRESH_TOKEN_GRACE_PERIOD_SECONDS") or 0
+    refresh_tokens = get_refresh_token_model().objects.filter(
+        revoked__lt=now - datetime.timedelta(seconds=grace)
+    )
+    refresh_expire = get_provider_seconds("REFRESH_TOKEN_EXPIRE_SECONDS")
+    if refresh_expire:
+        refresh_tokens = refresh_tokens | get_refresh_token_model().objects.filter(
+            access_token__expires__lt=now - datetime.timedelta(seconds=refresh_expire)
+        )
+
+    return [
+        ("grants", get_grant_model().objects.filter(expires__lt=now)),
+        ("refresh tokens", refresh_tokens),
+        (
+            "access tokens",
+            get_access_token_model().objects.filter(
+                expires__lt=now, refresh_token__isnull=True
+            ),
+        ),
+        (
+            "unactivated users",
+            get_user_model().objects.filter(
+                is_active=False, email_verified=False, date_joined__lt=signup_cutoff
+            ),
+        ),
+    ]
+
+
+def purge(queryset, batch_size=1000, rate=None):
+    """
+    delete ``queryset`` in batches, yielding the rows deleted by each
+
+    Each batch is its own short transaction, selecting at most
+    ``batch_size`` primary keys and deleting those still matching, so a
+    row that stopped being stale meanwhile is kept. ``rate`` caps the rows
+    deleted per second by sleeping between batches.
+    """
+    model = queryset.model
+    label = model._meta.label
+    while True:
+        started = time.monotonic()
+        with transaction.atomic():
+            pks = list(queryset.values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                return
+            _, deleted = queryset.filter(pk__in=pks).delete()
+
+        count = deleted.get(label, 0)
+        yield count
+        if len(pks) < batch_size:
+            return
+
+        if rate:
+            time.sleep(max(len(pks) / rate - (time.monotonic() - started), 0))
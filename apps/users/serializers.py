@@ -1,11 +1,16 @@
+from core.serializers import SparseFieldsetsMixin, ValuesSerializerMixin
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from django_countries.serializers import CountryFieldMixin
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 
+from .images import get_variant_urls
 
-class UserListSerializer(serializers.ModelSerializer):
+
+class UserListSerializer(
+    SparseFieldsetsMixin, ValuesSerializerMixin, serializers.ModelSerializer
+):
     """serializer for user endpoint"""
 
     class Meta:
@@ -24,7 +29,11 @@ class UserImageSerializer(serializers.ModelSerializer):
         fields = ("image",)
 
 
-class UserDetailSerializer(CountryFieldMixin, serializers.ModelSerializer):
+class UserDetailSerializer(
+    SparseFieldsetsMixin, CountryFieldMixin, serializers.ModelSerializer
+):
+    image_variants = serializers.SerializerMethodField()
+
     class Meta:
         model = get_user_model()
         fields = (
@@ -36,8 +45,16 @@ class UserDetailSerializer(CountryFieldMixin, serializers.ModelSerializer):
             "country",
             "about",
             "image",
+            "image_variants",
+            "post_count",
+            "comment_count",
+            "last_active_at",
         )
         read_only_fields = ["id", "email", "image"]
+        required_fields = ("image", "image_variants")
+
+    def get_image_variants(self, obj):
+        return get_variant_urls(obj, self.context.get("request"))
 
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -100,7 +117,9 @@ class ResetPasswordSerializer(serializers.ModelSerializer):
         fields = ["email", "password"]
 
     def validate(self, attrs):
-        if get_user_model().objects.filter(email=attrs["email"]).exists():
+        # keep the user found here, save() needs it too
+        attrs["user"] = get_user_model().objects.filter(email=attrs["email"]).first()
+        if attrs["user"] is not None:
             return attrs
 
         raise serializers.ValidationError(
@@ -108,9 +127,7 @@ class ResetPasswordSerializer(serializers.ModelSerializer):
         )
 
     def save(self):
-        user = get_user_model().objects.get(
-            email=self.validated_data["email"],
-        )
+        user = self.validated_data["user"]
         password = self.validated_data["password"]
 
         user.set_password(password)
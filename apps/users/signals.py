@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django_cleanup.signals import cleanup_pre_delete
+from oauth2_provider.models import get_access_token_model
+
+from .images import delete_variants
+from .oauth import access_token_cache
+from .tokens import is_signed_token, revoke_signed_token, revoke_user_tokens
+
+AccessToken = get_access_token_model()
+
+
+@receiver(post_save, sender=AccessToken)
+@receiver(post_delete, sender=AccessToken)
+def evict_access_token(sender, instance, **kwargs):
+    # revoke() deletes the token, scope or expiry changes are saves
+    access_token_cache.evict_token(instance.token)
+
+
+@receiver(post_delete, sender=AccessToken)
+def revoke_access_token(sender, instance, **kwargs):
+    # signed tokens keep verifying until listed as revoked
+    if is_signed_token(instance.token):
+        revoke_signed_token(instance.token)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def evict_user_tokens(sender, instance, **kwargs):
+    # cached tokens carry the user, deactivation must not wait for the timeout
+    access_token_cache.evict_user(instance.pk)
+
+
+@receiver(post_save, sender=get_user_model())
+def revoke_inactive_user_tokens(sender, instance, **kwargs):
+    if not instance.is_active:
+        revoke_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=get_user_model())
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    revoke_user_tokens(instance.pk)
+
+
+@receiver(cleanup_pre_delete)
+def delete_image_variants(sender, file, **kwargs):
+    # django_cleanup removed a replaced or orphaned image, its variants follow
+    field = getattr(file, "field", None)
+    if getattr(field, "model", None) is get_user_model() and field.name == "image":
+        delete_variants(file.name, file.storage)
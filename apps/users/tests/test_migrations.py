@@ -0,0 +1,33 @@
+from core.testing import MigrationTestMixin
+from django.test import TransactionTestCase
+
+
+# test the stats backfill on a database written before the stats
+class UserStatsMigrationTests(MigrationTestMixin, TransactionTestCase):
+    """Tests on users 0005 migrating users with and without posts"""
+
+    app = "users"
+    migrate_from = "0004_user_email_verified"
+
+    def test_backfill(self):
+        User = self.apps.get_model("users", "User")
+        Post = self.apps.get_model("blog", "Post")
+        Comment = self.apps.get_model("blog", "Comment")
+        author = User.objects.create(username="author", email="author@gmail.com")
+        commenter = User.objects.create(username="commenter", email="dev@gmail.com")
+        idle = User.objects.create(username="idle", email="idle@gmail.com")
+        post = Post.objects.create(author=author, title="Hello", body="World")
+        comment = Comment.objects.create(author=commenter, post=post, body="first")
+        Comment.objects.create(author=commenter, post=post, body="second")
+
+        User = self.migrate("0005_user_stats").get_model("users", "User")
+
+        author = User.objects.get(pk=author.pk)
+        self.assertEqual((author.post_count, author.comment_count), (1, 0))
+        self.assertEqual(author.last_active_at, post.created)
+        commenter = User.objects.get(pk=commenter.pk)
+        self.assertEqual((commenter.post_count, commenter.comment_count), (0, 2))
+        self.assertGreaterEqual(commenter.last_active_at, comment.created)
+        idle = User.objects.get(pk=idle.pk)
+        self.assertEqual((idle.post_count, idle.comment_count), (0, 0))
+        self.assertIsNone(idle.last_active_at)
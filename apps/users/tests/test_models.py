@@ -1,5 +1,9 @@
-from django.contrib.auth import get_user_model
-from django.test import TestCase
+import threading
+from unittest import mock
+
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import Argon2PasswordHasher
+from django.test import TestCase, override_settings
 
 User = get_user_model()
 
@@ -37,3 +41,39 @@ class UserModelTest(TestCase):
         self.assertEqual(about, "clever")
         self.assertEqual(country, "KE")
         self.assertEqual(image, "")
+
+
+# test passwords hash on the worker pool and follow cost changes
+@override_settings(ARGON2_TIME_COST=1, ARGON2_MEMORY_COST=1024, ARGON2_PARALLELISM=1)
+class PooledArgon2HasherTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # create user
+        cls.testuser = User.objects.create_user(
+            username="testuser", email="testemail@gmail.com", password="abcde12345"
+        )
+
+    def test_hashes_on_pool(self):
+        threads = []
+        encode = Argon2PasswordHasher.encode
+
+        def record(hasher, password, salt):
+            threads.append(threading.current_thread().name)
+            return encode(hasher, password, salt)
+
+        with mock.patch.object(Argon2PasswordHasher, "encode", record):
+            self.testuser.set_password("edcba54321")
+        self.assertTrue(threads[0].startswith("password-hashing"))
+        self.assertTrue(self.testuser.check_password("edcba54321"))
+        self.assertFalse(self.testuser.check_password("abcde12345"))
+
+    def test_rehash_on_login(self):
+        """raised costs apply at the next successful login"""
+        old = self.testuser.password
+        self.assertIn("t=1", old)
+        with self.settings(ARGON2_TIME_COST=2):
+            user = authenticate(username="testuser", password="abcde12345")
+        self.assertEqual(user, self.testuser)
+        user.refresh_from_db()
+        self.assertNotEqual(user.password, old)
+        self.assertIn("t=2", user.password)
@@ -0,0 +1,243 @@
+import datetime
+import time
+from pathlib import Path
+from unittest import mock
+
+import users.urls
+from core.serializers import ValuesSerializerMixin
+from core.testing import QueryCountSnapshotMixin
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from oauth2_provider.contrib.rest_framework import OAuth2Authentication
+from oauth2_provider.models import AccessToken, get_application_model
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase
+from users.oauth import access_token_cache
+from users.serializers import UserDetailSerializer, UserListSerializer
+from users.utils import account_activation_token
+
+User = get_user_model()
+Application = get_application_model()
+
+
+# test query counts stay flat however many users exist
+class UserQueryCountAPITests(APITestCase):
+    """APITests on the number of queries per endpoint"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # create users
+        cls.users = [
+            User.objects.create_user(
+                username=f"testuser{i}",
+                email=f"testemail{i}@gmail.com",
+                password="abcde12345",
+            )
+            for i in range(4)
+        ]
+
+    def assertQueriesFor(self, num, url):
+        client = APIClient()
+        with self.assertNumQueries(num):
+            response = client.get(url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_user_list(self):
+        self.assertQueriesFor(1, reverse("users:user-list"))
+
+    def test_user_list_fields(self):
+        """autocomplete style lists read only the columns they return"""
+        client = APIClient()
+        url = reverse("users:user-list") + "?fields=username"
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, format="json")
+
+        self.assertEqual(
+            response.data["results"][0], {"username": self.users[0].username}
+        )
+        self.assertNotIn('"users_user"."password"', queries[0]["sql"])
+
+    def test_user_list_prefix_index(self):
+        """prefix search is a range scan of the username index"""
+        client = APIClient()
+        url = reverse("users:user-list") + "?username__startswith=testuser1"
+        with CaptureQueriesContext(connection) as queries:
+            client.get(url, format="json")
+
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + queries[0]["sql"])
+            plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn("SEARCH", plan)
+        self.assertIn("username", plan)
+
+    def test_user_detail_omit(self):
+        client = APIClient()
+        url = reverse("users:user-detail", kwargs={"user_pk": self.users[0].id})
+        response = client.get(url + "?omit=email,about", format="json")
+
+        self.assertNotIn("email", response.data)
+        self.assertIn("username", response.data)
+
+    def test_user_detail(self):
+        url = reverse("users:user-detail", kwargs={"user_pk": self.users[0].id})
+        self.assertQueriesFor(1, url)
+
+    def test_user_pic(self):
+        url = reverse("users:user-pic", kwargs={"user_pk": self.users[0].id})
+        self.assertQueriesFor(1, url)
+
+    def test_user_list_values_plan(self):
+        """the values() fast path renders what the serializer renders"""
+        client = APIClient()
+        fast = client.get(reverse("users:user-list"), format="json")
+        with mock.patch.object(
+            UserListSerializer, "get_values_plan", return_value=None
+        ):
+            slow = client.get(reverse("users:user-list"), format="json")
+        self.assertEqual(fast.content, slow.content)
+
+        # image and country fields wrap their columns, so they never compile
+        class DetailSerializer(ValuesSerializerMixin, UserDetailSerializer):
+            pass
+
+        self.assertIsNone(DetailSerializer().get_values_plan())
+
+
+# test bearer tokens are validated from the cache after the first request
+@override_settings(
+    OAUTH2_PROVIDER={
+        **settings.OAUTH2_PROVIDER,
+        "ACCESS_TOKEN_CACHE_TIMEOUT": 60,
+        "ACCESS_TOKEN_CACHE_MAX_ENTRIES": 10,
+    }
+)
+class AccessTokenCacheTests(APITestCase):
+    """Tests on the in-process access token cache"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # create user, application and token
+        cls.user = User.objects.create_user(
+            username="testuser", email="testemail@gmail.com", password="abcde12345"
+        )
+        cls.application = Application.objects.create(
+            name="Test Application",
+            redirect_uris="http://127.0.0.1:8000/noexist/callback",
+            user=cls.user,
+            client_type="Application.CLIENT_CONFIDENTIAL",
+            authorization_grant_type="Application.GRANT_PASSWORD",
+        )
+        cls.token = cls.create_token("1234567890")
+
+    @classmethod
+    def create_token(cls, token, **kwargs):
+        kwargs.setdefault("expires", timezone.now() + datetime.timedelta(days=1))
+        return AccessToken.objects.create(
+            user=cls.user, token=token, application=cls.application, **kwargs
+        )
+
+    def setUp(self):
+        access_token_cache.clear()
+
+    def authenticate(self, token="1234567890"):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        return OAuth2Authentication().authenticate(Request(request))
+
+    def test_hit(self):
+        """the second request is validated without queries"""
+        with self.assertNumQueries(1):
+            self.authenticate()
+        with self.assertNumQueries(0):
+            user, token = self.authenticate()
+        self.assertEqual(user, self.user)
+        self.assertEqual(token, self.token)
+        self.assertEqual(access_token_cache.stats()["hits"], 1)
+        self.assertEqual(access_token_cache.stats()["misses"], 1)
+
+    def test_revoked(self):
+        """a revoked token stops working at once"""
+        self.authenticate()
+        self.token.revoke()
+        self.assertIsNone(self.authenticate())
+
+    def test_user_deactivated(self):
+        """deactivating the user drops their cached tokens"""
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+        with self.assertNumQueries(1):
+            user, _ = self.authenticate()
+        self.assertFalse(user.is_active)
+
+    def test_ttl_capped_by_expiry(self):
+        """entries never outlive the token itself"""
+        self.create_token(
+            "short", expires=timezone.now() + datetime.timedelta(seconds=5)
+        )
+        self.authenticate("short")
+        with mock.patch("users.oauth.time.time", return_value=time.time() + 10):
+            with self.assertNumQueries(1):
+                self.authenticate("short")
+
+    def test_lru_bound(self):
+        """the least recently used entry goes first"""
+        for i in range(11):
+            self.create_token(f"token{i}")
+            self.authenticate(f"token{i}")
+        self.assertEqual(access_token_cache.stats()["size"], 10)
+        self.assertEqual(access_token_cache.stats()["evictions"], 1)
+        with self.assertNumQueries(1):
+            self.authenticate("token0")
+
+
+# test no endpoint runs more queries than recorded in query_counts.json
+class UserQuerySnapshotTests(QueryCountSnapshotMixin, APITestCase):
+    """APITests on the query counts of every users endpoint"""
+
+    urlconf = users.urls
+    snapshot_path = Path(__file__).with_name("query_counts.json")
+    extra_requests = (
+        ("PATCH", "user-detail", {"about": "curious"}),
+        (
+            "POST",
+            "register",
+            {
+                "username": "newuser",
+                "email": "newemail@gmail.com",
+                "password": "zzzYYYYabcde12345",
+                "password2": "zzzYYYYabcde12345",
+            },
+        ),
+        (
+            "POST",
+            "password-reset",
+            {"email": "testemail@gmail.com", "password": "a3e5r6t7y8u90g7v6bt7"},
+        ),
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        # create user
+        cls.user = User.objects.create_user(
+            username="testuser", email="testemail@gmail.com", password="abcde12345"
+        )
+
+    def get_client(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        return client
+
+    def get_url_kwargs(self):
+        return {
+            "user_pk": self.user.pk,
+            "uidb64": urlsafe_base64_encode(force_bytes(self.user.pk)),
+            "token": account_activation_token.make_token(self.user),
+        }
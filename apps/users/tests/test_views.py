@@ -1,16 +1,50 @@
 import datetime
+import tempfile
+import time
+from io import StringIO
+from smtplib import SMTPException
+from unittest import mock
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import EmailMessage
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
-from oauth2_provider.models import AccessToken, get_application_model
+from oauth2_provider.models import (
+    AccessToken,
+    Grant,
+    RefreshToken,
+    get_application_model,
+)
 from PIL import Image
 from rest_framework import status
-from rest_framework.test import APIClient, APITestCase
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase
+from users.authentication import SignedTokenAuthentication
+from users.checks import check_signed_token_cache
+from users.images import generate_user_variants
+from users.models import OutboxMessage
+from users.outbox import claim_batch, drain, queue_email
+from users.tokens import (
+    decode_signed_token,
+    get_max_token_length,
+    is_signed_token,
+    make_signed_token,
+)
 
 User = get_user_model()
 Application = get_application_model()
 
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
 
 # test registration view
 class RegistrationViewAPITests(APITestCase):
@@ -31,6 +65,24 @@ class RegistrationViewAPITests(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
+    def test_email_queued(self):
+        """the activation email is stored with the user, not sent inline"""
+        client = APIClient()
+
+        url = reverse("users:register")
+        data = {
+            "username": "testuser",
+            "email": "testemail@gmail.com",
+            "password": "zzzYYYYabcde12345",
+            "password2": "zzzYYYYabcde12345",
+        }
+        client.post(url, data, format="json")
+
+        self.assertEqual(len(mail.outbox), 0)
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.to, "testemail@gmail.com")
+        self.assertEqual(message.subject, "Activate Your Account")
+
 
 # test password reset view
 class ResetPasswordViewAPITests(APITestCase):
@@ -77,6 +129,38 @@ class UserListViewAPITests(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_pages(self):
+        """pages follow username order through the next cursor"""
+        for name in ["carol", "alice", "bob"]:
+            User.objects.create_user(
+                username=name, email=f"{name}@gmail.com", password="abcde12345"
+            )
+        client = APIClient()
+
+        url = reverse("users:user-list") + "?page_size=2"
+        response = client.get(url, format="json")
+        usernames = [user["username"] for user in response.data["results"]]
+        self.assertEqual(usernames, ["alice", "bob"])
+
+        response = client.get(response.data["next"], format="json")
+        usernames = [user["username"] for user in response.data["results"]]
+        self.assertEqual(usernames, ["carol"])
+        self.assertIsNone(response.data["next"])
+
+    def test_username_prefix(self):
+        """only usernames starting with the prefix, case sensitive"""
+        for name in ["anna", "annabel", "Annika", "ben"]:
+            User.objects.create_user(
+                username=name, email=f"{name}@gmail.com", password="abcde12345"
+            )
+        client = APIClient()
+
+        url = reverse("users:user-list") + "?username__startswith=ann"
+        response = client.get(url, format="json")
+        usernames = [user["username"] for user in response.data["results"]]
+
+        self.assertEqual(usernames, ["anna", "annabel"])
+
 
 # test user detail view
 class UserDetailViewAPITests(APITestCase):
@@ -322,3 +406,371 @@ class UserImageViewAPITests(APITestCase):
         response = client.delete(url)
 
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+
+# test uploads are resized into variants off the request thread
+class UserImageVariantTests(APITestCase):
+    """APITests on building, exposing and deleting image variants"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # create user
+        cls.testuser = User.objects.create_user(
+            username="testuser", email="testemail@gmail.com", password="abcde12345"
+        )
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.client.force_authenticate(self.testuser)
+        self.url = reverse("users:user-pic", kwargs={"user_pk": self.testuser.id})
+
+    def upload(self):
+        """upload an image, return what was handed to the worker pool"""
+        executor = mock.Mock()
+        with mock.patch("users.images.get_executor", return_value=executor):
+            with self.captureOnCommitCallbacks(execute=True):
+                with open("tests_data/user.png", "rb") as image:
+                    response = self.client.put(
+                        self.url, {"image": image}, format="multipart"
+                    )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        return executor.submit.call_args.args[1:]
+
+    def test_variants(self):
+        user_pk, name = self.upload()
+        # nothing is resized in the request
+        detail = reverse("users:user-detail", kwargs={"user_pk": user_pk})
+        self.assertEqual(self.client.get(detail).data["image_variants"], {})
+
+        variants = generate_user_variants(user_pk, name)
+
+        self.assertEqual(set(variants), {"64", "256", "1024"})
+        storage = User._meta.get_field("image").storage
+        with storage.open(variants["64"]["webp"]) as variant:
+            self.assertEqual(Image.open(variant).size, (64, 64))
+        # the original is 200px and never upscaled
+        with storage.open(variants["1024"]["jpeg"]) as variant:
+            self.assertEqual(Image.open(variant).format, "JPEG")
+            self.assertEqual(Image.open(variant).size, (200, 200))
+        urls = self.client.get(detail).data["image_variants"]
+        self.assertRegex(urls["256"]["webp"], r"/256\.[0-9a-f]{16}\.webp$")
+
+    def test_replaced_image_deletes_variants(self):
+        user_pk, name = self.upload()
+        variants = generate_user_variants(user_pk, name)
+
+        self.upload()
+
+        storage = User._meta.get_field("image").storage
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(storage.exists(variants["64"]["webp"]))
+        # a stale job for the old image stores nothing
+        self.assertIsNone(generate_user_variants(user_pk, name))
+
+
+# test signed access tokens, issued by /o/token/ and verified without queries
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    OAUTH2_PROVIDER={**settings.OAUTH2_PROVIDER, "SIGNED_ACCESS_TOKENS": True},
+)
+class SignedTokenAPITests(APITestCase):
+    """APITests on issuing and authenticating with signed access tokens"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # create user
+        cls.testuser = User.objects.create_user(
+            username="testuser",
+            email="testemail@gmail.com",
+            about="stupid",
+            password="abcde12345",
+        )
+        # create application for the password grant
+        cls.application = Application.objects.create(
+            name="Test Application",
+            user=cls.testuser,
+            client_type=Application.CLIENT_CONFIDENTIAL,
+            authorization_grant_type=Application.GRANT_PASSWORD,
+            client_secret="secret",
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get_token(self):
+        response = self.client.post(
+            "/o/token/",
+            {
+                "grant_type": "password",
+                "username": "testuser",
+                "password": "abcde12345",
+                "client_id": self.application.client_id,
+                "client_secret": "secret",
+                "scope": "read write",
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def authenticate(self, token):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        return SignedTokenAuthentication().authenticate(Request(request))
+
+    def test_issue(self):
+        """access tokens are signed, refresh tokens stay opaque"""
+        token = self.get_token()
+        self.assertTrue(is_signed_token(token["access_token"]))
+        self.assertFalse(is_signed_token(token["refresh_token"]))
+        self.assertEqual(
+            decode_signed_token(token["access_token"])["scp"], "read write"
+        )
+
+    def test_authenticate_without_queries(self):
+        """the user and scopes come from the token alone"""
+        token = self.get_token()["access_token"]
+        with self.assertNumQueries(0):
+            user, auth = self.authenticate(token)
+        self.assertEqual(user, self.testuser)
+        self.assertTrue(auth.is_valid(["read"]))
+        self.assertFalse(auth.is_valid(["groups"]))
+
+    def test_api_request(self):
+        """a signed token authenticates api writes"""
+        token = self.get_token()["access_token"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        response = self.client.post(
+            reverse("blog:post-list"), {"title": "Signed", "body": "..."}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["author"], "testuser")
+
+    def test_revoked(self):
+        """revoking the stored token lists it as revoked"""
+        token = self.get_token()["access_token"]
+        AccessToken.objects.get(token=token).revoke()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+    def test_user_deactivated(self):
+        token = self.get_token()["access_token"]
+        self.testuser.is_active = False
+        self.testuser.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+    def test_tampered_and_expired(self):
+        token = self.get_token()["access_token"]
+        header, payload, signature = token.split(".")
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(f"{header}.{payload}.{signature[::-1]}")
+
+        with mock.patch("users.tokens.time.time", return_value=time.time() + 10**6):
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate(token)
+
+    def test_disabled(self):
+        """with signed tokens off, opaque tokens are issued and left to DOT"""
+        disabled = {**settings.OAUTH2_PROVIDER, "SIGNED_ACCESS_TOKENS": False}
+        with self.settings(OAUTH2_PROVIDER=disabled):
+            token = self.get_token()["access_token"]
+            self.assertFalse(is_signed_token(token))
+            self.assertIsNone(self.authenticate(token))
+
+    def test_fits_token_column(self):
+        """a token with every scope fits AccessToken.token, longer ones go opaque"""
+        scopes = settings.OAUTH2_PROVIDER["SCOPES"]
+        token = make_signed_token(self.testuser.pk, scopes, 10**8)
+        self.assertLessEqual(len(token), get_max_token_length())
+
+        with mock.patch("users.tokens.get_max_token_length", return_value=100):
+            token = self.get_token()["access_token"]
+        self.assertFalse(is_signed_token(token))
+        self.assertEqual(AccessToken.objects.get(token=token).user, self.testuser)
+
+    def test_shared_cache_check(self):
+        """signed tokens refuse revocation caches kept per process"""
+        self.assertEqual(
+            [error.id for error in check_signed_token_cache(None)], ["users.E001"]
+        )
+
+        shared = {
+            **LOCMEM_CACHES,
+            "shared": {
+                "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+                "LOCATION": "shared_cache",
+            },
+        }
+        provider = {
+            **settings.OAUTH2_PROVIDER,
+            "SIGNED_ACCESS_TOKEN_CACHE_ALIAS": "shared",
+        }
+        with self.settings(CACHES=shared, OAUTH2_PROVIDER=provider):
+            self.assertEqual(check_signed_token_cache(None), [])
+
+
+class RefusingEmailBackend(BaseEmailBackend):
+    def open(self):
+        raise ConnectionRefusedError(111, "Connection refused")
+
+    def send_messages(self, email_messages):
+        self.open()
+
+
+# test the outbox worker
+class SendOutboxTests(TestCase):
+    """Tests on the send_outbox worker"""
+
+    def setUp(self):
+        for i in range(5):
+            queue_email(f"user{i}@gmail.com", "Hello", f"Message {i}")
+
+    def test_send(self):
+        """due messages go out in batches and are marked sent"""
+        call_command("send_outbox", "--once", "--batch-size", "2", stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertFalse(OutboxMessage.objects.filter(sent_at__isnull=True).exists())
+
+        # nothing is sent twice
+        call_command("send_outbox", "--once", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 5)
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2)
+    def test_retry_with_backoff(self):
+        """failures are retried later, then given up on"""
+        error = SMTPException("no route")
+        with mock.patch.object(EmailMessage, "send", side_effect=error):
+            self.assertEqual(drain(), (0, 5))
+            message = OutboxMessage.objects.first()
+            self.assertEqual(message.attempts, 1)
+            self.assertIn("no route", message.last_error)
+            self.assertGreater(message.send_after, timezone.now())
+            self.assertIsNone(message.locked_by)
+
+            # not due yet
+            self.assertEqual(drain(), (0, 0))
+
+            OutboxMessage.objects.update(send_after=timezone.now())
+            self.assertEqual(drain(), (0, 5))
+
+        given_up = OutboxMessage.objects.filter(failed_at__isnull=False)
+        self.assertEqual(given_up.count(), 5)
+
+    def test_connection_refused(self):
+        """a mail server that is down fails the batches, the worker carries on"""
+        backend = "users.tests.test_views.RefusingEmailBackend"
+        with self.settings(EMAIL_BACKEND=backend):
+            self.assertEqual(drain(batch_size=2), (0, 5))
+
+        for message in OutboxMessage.objects.all():
+            self.assertEqual(message.attempts, 1)
+            self.assertIn("ConnectionRefusedError", message.last_error)
+            self.assertGreater(message.send_after, timezone.now())
+            self.assertIsNone(message.locked_by)
+
+    def test_claimed_messages_are_skipped(self):
+        """another worker's live claim keeps messages out of a batch"""
+        self.assertEqual(len(claim_batch(3)), 3)
+        self.assertEqual(len(claim_batch(10)), 2)
+
+
+# test the purge of stale accounts, tokens and grants
+class PurgeStaleTests(TestCase):
+    """Tests on the purge_stale command"""
+
+    def setUp(self):
+        now = timezone.now()
+        old = now - datetime.timedelta(days=settings.PASSWORD_RESET_TIMEOUT_DAYS + 1)
+        # never activated, past the activation link's expiry
+        self.stale = User.objects.create_user(
+            username="stale", email="stale@gmail.com", is_active=False
+        )
+        User.objects.filter(pk=self.stale.pk).update(date_joined=old)
+        # a fresh signup and an activated account waiting on a password reset
+        User.objects.create_user(
+            username="fresh", email="fresh@gmail.com", is_active=False
+        )
+        self.resetting = User.objects.create_user(
+            username="resetting",
+            email="resetting@gmail.com",
+            is_active=False,
+            email_verified=True,
+        )
+        User.objects.filter(pk=self.resetting.pk).update(date_joined=old)
+
+        application = Application.objects.create(
+            name="Test Application",
+            user=self.resetting,
+            client_type=Application.CLIENT_CONFIDENTIAL,
+            authorization_grant_type=Application.GRANT_PASSWORD,
+        )
+        expired = now - datetime.timedelta(hours=1)
+        live = now + datetime.timedelta(hours=1)
+        for i, expires in enumerate([expired, expired, expired, live]):
+            AccessToken.objects.create(
+                user=self.resetting,
+                token=f"token{i}",
+                application=application,
+                expires=expires,
+            )
+        # an expired access token a live refresh token can still rotate
+        RefreshToken.objects.create(
+            user=self.resetting,
+            token="refresh0",
+            application=application,
+            access_token=AccessToken.objects.get(token="token0"),
+        )
+        # a revoked refresh token
+        RefreshToken.objects.create(
+            user=self.resetting,
+            token="refresh1",
+            application=application,
+            access_token=AccessToken.objects.get(token="token1"),
+            revoked=expired,
+        )
+        Grant.objects.create(
+            user=self.resetting,
+            code="grant",
+            application=application,
+            expires=expired,
+            redirect_uri="http://127.0.0.1:8000/noexist/callback",
+        )
+
+    def test_purge(self):
+        out = StringIO()
+        call_command("purge_stale", "--batch-size", "1", "-v", "2", stdout=out)
+
+        self.assertEqual(
+            set(User.objects.values_list("username", flat=True)),
+            {"fresh", "resetting"},
+        )
+        self.assertEqual(
+            set(AccessToken.objects.values_list("token", flat=True)),
+            {"token0", "token3"},
+        )
+        self.assertEqual(
+            list(RefreshToken.objects.values_list("token", flat=True)), ["refresh0"]
+        )
+        self.assertFalse(Grant.objects.exists())
+        self.assertIn("Deleted 2 access tokens.", out.getvalue())
+        self.assertIn("Deleted 1 unactivated users.", out.getvalue())
+
+    def test_dry_run(self):
+        out = StringIO()
+        call_command("purge_stale", "--dry-run", stdout=out)
+
+        self.assertIn("Would delete 1 unactivated users.", out.getvalue())
+        self.assertEqual(User.objects.count(), 3)
+
+    def test_rate_limit(self):
+        with mock.patch("users.purge.time.sleep") as sleep:
+            call_command(
+                "purge_stale", "--batch-size", "1", "--rate", "0.5", stdout=StringIO()
+            )
+
+        # full batches of one row at half a row per second
+        self.assertAlmostEqual(max(call.args[0] for call in sleep.call_args_list), 2, 0)
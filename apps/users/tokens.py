@@ -0,0 +1,176 @@
+import base64
+import functools
+import hashlib
+import json
+import secrets
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from jwcrypto import jwk, jws
+from jwcrypto.common import JWException
+from oauth2_provider.models import get_access_token_model
+from oauthlib.oauth2.rfc6749.tokens import random_token_generator
+
+REVOKED_TOKEN_KEY = "signed-token:revoked:{}"
+REVOKED_USER_KEY = "signed-token:user:{}"
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def get_token_settings():
+    return getattr(settings, "OAUTH2_PROVIDER", {})
+
+
+def signed_tokens_enabled():
+    return bool(get_token_settings().get("SIGNED_ACCESS_TOKENS", False))
+
+
+@functools.lru_cache(maxsize=4)
+def _make_key(secret):
+    digest = hashlib.sha256(f"users.tokens:{secret}".encode()).digest()
+    return jwk.JWK(kty="oct", k=base64.urlsafe_b64encode(digest).rstrip(b"=").decode())
+
+
+def get_signing_key():
+    """the HS256 key, ``SIGNED_ACCESS_TOKEN_KEY`` or derived from SECRET_KEY"""
+    return _make_key(
+        get_token_settings().get("SIGNED_ACCESS_TOKEN_KEY") or settings.SECRET_KEY
+    )
+
+
+def get_revocation_cache():
+    return caches[
+        get_token_settings().get("SIGNED_ACCESS_TOKEN_CACHE_ALIAS", "default")
+    ]
+
+
+def is_signed_token(token):
+    return token.count(".") == 2
+
+
+def make_signed_token(user_id, scopes, expires_in):
+    """a compact JWS carrying user id, scopes, issue and expiry times"""
+    now = int(time.time())
+    claims = {
+        "sub": str(user_id),
+        "scp": " ".join(scopes),
+        "iat": now,
+        "exp": now + int(expires_in),
+        "jti": secrets.token_urlsafe(12),
+    }
+    token = jws.JWS(json.dumps(claims, separators=(",", ":")).encode())
+    token.add_signature(get_signing_key(), alg="HS256", protected={"alg": "HS256"})
+
+    return token.serialize(compact=True)
+
+
+def access_token_generator(request, refresh_token=False):
+    """
+    DOT ``ACCESS_TOKEN_GENERATOR``, signed tokens for users when enabled
+
+    Client credentials tokens have no user to carry and stay opaque, as do
+    all tokens while ``SIGNED_ACCESS_TOKENS`` is off and the rare signed
+    token too long for ``AccessToken.token``.
+    """
+    user = getattr(request, "user", None)
+    if (
+        not signed_tokens_enabled()
+        or request.grant_type == "client_credentials"
+        or getattr(user, "pk", None) is None
+    ):
+        return random_token_generator(request)
+
+    token = make_signed_token(user.pk, request.scopes or (), request.expires_in)
+    if len(token) > get_max_token_length():
+        return random_token_generator(request)
+
+    return token
+
+
+def get_max_token_length():
+    return get_access_token_model()._meta.get_field("token").max_length
+
+
+def decode_signed_token(token, check_revoked=True):
+    """the verified claims of ``token``, raises InvalidToken"""
+    try:
+        signed = jws.JWS()
+        signed.deserialize(token)
+        signed.verify(get_signing_key(), alg="HS256")
+        claims = json.loads(signed.payload)
+    except (JWException, ValueError):
+        raise InvalidToken("Invalid token.")
+
+    if not isinstance(claims, dict) or not {"sub", "exp", "iat", "jti"} <= set(claims):
+        raise InvalidToken("Invalid token.")
+    if claims["exp"] <= time.time():
+        raise InvalidToken("Token has expired.")
+
+    if check_revoked:
+        revoked = get_revocation_cache().get_many(
+            [
+                REVOKED_TOKEN_KEY.format(claims["jti"]),
+                REVOKED_USER_KEY.format(claims["sub"]),
+            ]
+        )
+        if REVOKED_TOKEN_KEY.format(claims["jti"]) in revoked:
+            raise InvalidToken("Token has been revoked.")
+        if claims["iat"] <= revoked.get(REVOKED_USER_KEY.format(claims["sub"]), -1):
+            raise InvalidToken("Token has been revoked.")
+
+    return claims
+
+
+def revoke_signed_token(token):
+    """list the token as revoked until it would have expired anyway"""
+    try:
+        claims = decode_signed_token(token, check_revoked=False)
+    except InvalidToken:
+        return
+
+    timeout = max(int(claims["exp"] - time.time()), 1)
+    get_revocation_cache().set(REVOKED_TOKEN_KEY.format(claims["jti"]), True, timeout)
+
+
+def revoke_user_tokens(user_id):
+    """revoke every signed token issued to the user so far"""
+    timeout = get_token_settings().get("ACCESS_TOKEN_EXPIRE_SECONDS", 36000)
+    get_revocation_cache().set(
+        REVOKED_USER_KEY.format(user_id), int(time.time()), timeout
+    )
+
+
+class SignedToken:
+    """the verified claims of a signed token, shaped like DOT's AccessToken"""
+
+    def __init__(self, token, claims):
+        self.token = token
+        self.user_id = claims["sub"]
+        self.scope = claims.get("scp", "")
+        self.expires_at = claims["exp"]
+
+    def __str__(self):
+        return self.token
+
+    def is_expired(self):
+        return self.expires_at <= time.time()
+
+    def allow_scopes(self, scopes):
+        if not scopes:
+            return True
+
+        return set(scopes).issubset(set(self.scope.split()))
+
+    def is_valid(self, scopes=None):
+        return not self.is_expired() and self.allow_scopes(scopes)
+
+
+def get_token_user(user_id):
+    """a user known only by id, other fields load on first access"""
+    User = get_user_model()
+    return User.from_db(DEFAULT_DB_ALIAS, ["id"], [User._meta.pk.to_python(user_id)])
@@ -5,6 +5,8 @@ from django.template.loader import render_to_string
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
 
+from .outbox import queue_email
+
 
 class TokenGenerator(PasswordResetTokenGenerator):
     def _make_hash_value(self, user, timestamp):
@@ -19,7 +21,7 @@ account_activation_token = TokenGenerator()
 reset_password_token = TokenGenerator()
 
 
-def send_email_confirm_account(user, request):
+def queue_email_confirm_account(user, request):
     domain = request.get_host()
     subject = "Activate Your Account"
     uid = urlsafe_base64_encode(force_bytes(user.pk))
@@ -34,10 +36,10 @@ def send_email_confirm_account(user, request):
             "expiry": settings.PASSWORD_RESET_TIMEOUT_DAYS,
         },
     )
-    user.email_user(subject, message)
+    queue_email(user.email, subject, message)
 
 
-def send_email_reset_password(user, request):
+def queue_email_reset_password(user, request):
     domain = request.get_host()
     subject = "Confirm Password Reset"
     uid = urlsafe_base64_encode(force_bytes(user.pk))
@@ -52,4 +54,4 @@ def send_email_reset_password(user, request):
             "expiry": settings.PASSWORD_RESET_TIMEOUT_DAYS,
         },
     )
-    user.email_user(subject, message)
+    queue_email(user.email, subject, message)
@@ -1,4 +1,6 @@
+from core.mixins import OptimizedQuerysetMixin, ValuesListMixin
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.http import HttpResponse
 from django.utils.encoding import force_str
 from django.utils.http import urlsafe_base64_decode
@@ -7,6 +9,8 @@ from rest_framework import generics, permissions, status
 from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.response import Response
 
+from .images import schedule_user_variants
+from .pagination import UsernamePagination, filter_username_prefix
 from .permissions import IsUserOrReadOnly
 from .serializers import (
     RegisterSerializer,
@@ -18,28 +22,40 @@ from .serializers import (
 from .utils import (
     account_activation_token,
     reset_password_token,
-    send_email_confirm_account,
-    send_email_reset_password,
+    queue_email_confirm_account,
+    queue_email_reset_password,
 )
 
 
-class UserListView(generics.ListAPIView):
-    """Lists users"""
+class UserListView(ValuesListMixin, OptimizedQuerysetMixin, generics.ListAPIView):
+    """Lists users, ``?username__startswith=`` narrows to a prefix"""
 
     queryset = get_user_model().objects.all()
     serializer_class = UserListSerializer
+    pagination_class = UsernamePagination
+    query_budget = 2
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        prefix = self.request.query_params.get("username__startswith")
+        if prefix:
+            queryset = filter_username_prefix(queryset, prefix)
 
-class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
+        return queryset
+
+
+class UserDetailView(OptimizedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """Retrieve, Update, Delete user details"""
 
     queryset = get_user_model().objects.all()
     serializer_class = UserDetailSerializer
     permission_classes = (IsUserOrReadOnly,)
     lookup_url_kwarg = "user_pk"
+    # renames also mark the user's posts and comments as changed
+    query_budget = {"GET": 2, "PUT": 7, "PATCH": 7, "DELETE": 16}
 
 
-class UserImageView(generics.RetrieveUpdateDestroyAPIView):
+class UserImageView(OptimizedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """Retrieve, Update, Delete user details"""
 
     queryset = get_user_model().objects.all()
@@ -47,6 +63,12 @@ class UserImageView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = (IsUserOrReadOnly,)
     parser_classes = [MultiPartParser, FormParser]
     lookup_url_kwarg = "user_pk"
+    query_budget = {"GET": 2, "PUT": 4, "PATCH": 4, "DELETE": 4}
+
+    def perform_update(self, serializer):
+        user = serializer.save()
+        # resizing runs on a worker pool after commit, not in the request
+        schedule_user_variants(user)
 
     def perform_destroy(self, instance):
         instance.image.delete()
@@ -57,14 +79,15 @@ class RegistrationView(generics.GenericAPIView):
 
     permission_classes = (permissions.AllowAny,)
     serializer_class = RegisterSerializer
+    query_budget = {"POST": 7}
 
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-
-        user = get_user_model().objects.get(username=serializer.data["username"])
-        send_email_confirm_account(user, request)
+        # the email is queued with the user, the outbox worker sends it
+        with transaction.atomic():
+            user = serializer.save()
+            queue_email_confirm_account(user, request)
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -79,6 +102,7 @@ class RegistrationEmailVerificationView(View):
 
         if user is not None and account_activation_token.check_token(user, token):
             user.is_active = True
+            user.email_verified = True
             user.save()
             return HttpResponse("Thank you for your email confirmation!")
         else:
@@ -103,14 +127,14 @@ class ResetPasswordView(generics.GenericAPIView):
 
     permission_classes = (permissions.AllowAny,)
     serializer_class = ResetPasswordSerializer
+    query_budget = {"POST": 5}
 
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-
-        user = get_user_model().objects.get(email=serializer.data["email"])
-        send_email_reset_password(user, request)
+        with transaction.atomic():
+            user = serializer.save()
+            queue_email_reset_password(user, request)
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -125,6 +149,7 @@ class ResetPasswordEmailVerificationView(View):
 
         if user is not None and reset_password_token.check_token(user, token):
             user.is_active = True
+            user.email_verified = True
             user.save()
             return HttpResponse("Password Changed Successfully!")
         else:
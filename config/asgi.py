@@ -9,8 +9,13 @@ https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django.setup(set_prefix=False)
+
+# importable once the settings have put apps/ on the path
+from core.handlers import ASGIHandler  # noqa: E402
+
+application = ASGIHandler()
@@ -0,0 +1,9 @@
+from django.urls import include, path
+
+from .urls import urlpatterns as wsgi_urlpatterns
+
+# the ASGI entry point resolves here, the first match wins
+urlpatterns = [
+    path("api/v1/", include("blog.async_urls", namespace="blog")),
+    *wsgi_urlpatterns,
+]
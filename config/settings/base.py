@@ -32,6 +32,7 @@ THIRD_PARTY_APPS = [
 ]
 
 LOCAL_APPS = [
+    "core",
     "users",
     "blog",
     "swagger",
@@ -41,19 +42,59 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 INSTALLED_APPS += ["django_cleanup.apps.CleanupConfig"]
 
 MIDDLEWARE = [
-    "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    # first, so every read of the request can be routed
+    "core.middleware.ReplicaPinningMiddleware",
+    # core.middleware's are Django's and corsheaders', running on the event
+    # loop under ASGI; session to clickjacking are skipped for bearer
+    # requests to the API
+    "core.middleware.SecurityMiddleware",
+    "core.middleware.SessionMiddleware",
     # corsheaders
-    "corsheaders.middleware.CorsMiddleware",
-    "django.middleware.common.CommonMiddleware",
-    "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "django.contrib.messages.middleware.MessageMiddleware",
-    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.middleware.CorsMiddleware",
+    "core.middleware.CommonMiddleware",
+    "core.middleware.CsrfViewMiddleware",
+    "core.middleware.AuthenticationMiddleware",
+    "core.middleware.MessageMiddleware",
+    "core.middleware.XFrameOptionsMiddleware",
+    # last, so it counts what the view runs
+    "core.middleware.QueryBudgetMiddleware",
 ]
 
+# Django's deploy checks look for its security, clickjacking and CSRF
+# middleware by dotted path and miss the core.middleware subclasses;
+# core.W001 to core.W003 report them missing instead, see core.checks
+SILENCED_SYSTEM_CHECKS = ["security.W001", "security.W002", "security.W003"]
+
 ROOT_URLCONF = "config.urls"
 
+# config.asgi resolves here instead, with async views for cached reads
+ASGI_ROOT_URLCONF = "config.asgi_urls"
+
+# threads per process running the database work of async views
+ASYNC_DB_WORKERS = 4
+
+# requests under this path with an "Authorization: Bearer" header skip the
+# session, CSRF, auth, message and clickjacking middleware
+LEAN_API_PREFIX = "/api/"
+
+# databases, each environment sets DATABASES, replicas are aliases in it
+# mirroring "default"; reads of these apps' models go to one of them during
+# safe requests to their views, see core.db.routers
+DATABASE_ROUTERS = ["core.db.routers.ReplicaRouter"]
+
+DATABASE_REPLICAS = []
+
+REPLICA_APPS = ("blog", "users")
+
+# seconds a client reads from the primary after a write, to see it
+REPLICA_PIN_SECONDS = 5
+
+REPLICA_PIN_COOKIE = "db_pin"
+
+# cache keeping the pins of bearer clients, which must be shared between
+# processes when there are replicas (core.E001)
+REPLICA_PIN_CACHE_ALIAS = "shared"
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -72,6 +113,32 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "config.wsgi.application"
 
+# Cache
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "blogapi",
+        "TIMEOUT": 300,
+        "OPTIONS": {
+            "MAX_ENTRIES": 10000,
+        },
+    },
+    # what every process must see at once, e.g. signed token revocations,
+    # replica pins and blog responses; create its table with ``manage.py
+    # createcachetable``, or point it at memcached or Redis where they are
+    # available
+    "shared": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "shared_cache",
+        "TIMEOUT": 300,
+        "OPTIONS": {
+            "MAX_ENTRIES": 10000,
+        },
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -93,12 +160,20 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 PASSWORD_HASHERS = [
-    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "users.hashers.PooledArgon2PasswordHasher",
     "django.contrib.auth.hashers.PBKDF2PasswordHasher",
     "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
     "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
 ]
 
+# argon2 costs, see ``manage.py calibrate_argon2``; changes rehash at next login
+ARGON2_TIME_COST = 2
+ARGON2_MEMORY_COST = 102400
+ARGON2_PARALLELISM = 8
+
+# threads per process that hash and verify passwords
+PASSWORD_HASHING_WORKERS = 2
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.0/topics/i18n/
 
@@ -122,6 +197,15 @@ MEDIA_URL = "media/"
 
 MEDIA_ROOT = BASE_DIR / "media"
 
+# hand files to the front server instead of sending them from Python,
+# None, "x-sendfile" or "x-accel-redirect" to an nginx internal location
+MEDIA_SENDFILE = None
+
+MEDIA_ACCEL_REDIRECT_PREFIX = "/protected-media/"
+
+# names that never change content, served with a year long immutable max-age
+MEDIA_IMMUTABLE_PATTERNS = (r"^users/variants/.+\.[0-9a-f]{16}\.\w+$",)
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
@@ -134,6 +218,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework.authentication.SessionAuthentication",
+        "users.authentication.SignedTokenAuthentication",
         "oauth2_provider.contrib.rest_framework.OAuth2Authentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": [
@@ -144,6 +229,8 @@ REST_FRAMEWORK = {
         "rest_framework.renderers.BrowsableAPIRenderer",
         "rest_framework.renderers.MultiPartRenderer",
     ],
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.KeysetPagination",
+    "PAGE_SIZE": 20,
 }
 
 # django oauth toolkit
@@ -155,9 +242,60 @@ OAUTH2_PROVIDER = {
         "write": "Write scope",
         "groups": "Access to your groups",
     },
+    # bearer tokens are validated from an in-process cache, see users.oauth
+    "OAUTH2_VALIDATOR_CLASS": "users.oauth.CachedOAuth2Validator",
+    "ACCESS_TOKEN_CACHE_TIMEOUT": 60,
+    "ACCESS_TOKEN_CACHE_MAX_ENTRIES": 10000,
+    # self-contained signed access tokens, see users.tokens; revocations
+    # live in this cache, which must be shared between processes (users.E001)
+    "SIGNED_ACCESS_TOKENS": False,
+    "SIGNED_ACCESS_TOKEN_KEY": None,
+    "SIGNED_ACCESS_TOKEN_CACHE_ALIAS": "shared",
+    "ACCESS_TOKEN_GENERATOR": "users.tokens.access_token_generator",
+    # unset, the refresh token generator falls back to the access one
+    "REFRESH_TOKEN_GENERATOR": "oauthlib.oauth2.rfc6749.tokens.random_token_generator",
 }
 
 
+# blog
+
+# comments embedded in each post, and the cap for ?include=comments
+BLOG_COMMENT_PREVIEW_LIMIT = 3
+
+BLOG_COMMENT_INCLUDE_LIMIT = 50
+
+# cache holding post and comment responses, and seconds they are kept for;
+# list generations are bumped in it, so it must be shared (blog.E001)
+BLOG_CACHE_ALIAS = "shared"
+
+BLOG_CACHE_TIMEOUT = 300
+
+# largest list accepted by the bulk write endpoints
+BLOG_BULK_MAX_ITEMS = 1000
+
+# rows read and serialized per batch by the exports
+BLOG_EXPORT_CHUNK_SIZE = 2000
+
+
+# what happens when a view runs more queries than its ``query_budget``,
+# "log" a warning or "raise" QueryBudgetExceeded
+QUERY_BUDGET_ACTION = "log"
+
+# email outbox, drained by ``manage.py send_outbox``
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_CONCURRENCY = 2
+OUTBOX_MAX_ATTEMPTS = 8
+# seconds before the first retry, doubling with every attempt
+OUTBOX_RETRY_BACKOFF = 30
+# seconds before a crashed worker's claim on a batch expires
+OUTBOX_LOCK_TIMEOUT = 300
+
+# profile picture variants, longest side in pixels and formats, built on
+# this many threads per process
+USER_IMAGE_VARIANT_SIZES = (64, 256, 1024)
+USER_IMAGE_VARIANT_FORMATS = ("webp", "jpeg")
+USER_IMAGE_WORKERS = 2
+
 # email confirmation expiry
 
 PASSWORD_RESET_TIMEOUT_DAYS = 3
@@ -15,15 +15,31 @@ ALLOWED_HOSTS = []
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": "core.db.backends.postgresql",
         "NAME": str(os.getenv("db_NAME")),
         "USER": str(os.getenv("db_USER")),
         "PASSWORD": str(os.getenv("db_PASSWORD")),
         "HOST": str(os.getenv("db_HOST")),
         "PORT": "",
+        # requests give their connection back to the pool when they finish
+        "CONN_MAX_AGE": 0,
+        "POOL": {
+            "MAX_SIZE": int(os.getenv("db_POOL_MAX_SIZE", 10)),
+            "TIMEOUT": 10,
+            "HEALTH_CHECK_INTERVAL": 30,
+            "MAX_LIFETIME": 30 * 60,
+        },
     }
 }
 
+# a streaming replica of the same database, for safe requests to the apps
+if os.getenv("db_REPLICA_HOST"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": str(os.getenv("db_REPLICA_HOST")),
+    }
+    DATABASE_REPLICAS = ["replica"]
+
 # email
 
 
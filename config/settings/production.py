@@ -17,8 +17,20 @@ ALLOWED_HOSTS = [
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
+        # WAL, busy timeout and BEGIN IMMEDIATE, for concurrent writers
+        "ENGINE": "core.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {
+            "transaction_mode": "IMMEDIATE",
+            "pragmas": {"busy_timeout": int(os.getenv("db_BUSY_TIMEOUT", 5000))},
+        },
+        # requests give their connection back to the pool when they finish
+        "CONN_MAX_AGE": 0,
+        "POOL": {
+            "MAX_SIZE": int(os.getenv("db_POOL_MAX_SIZE", 4)),
+            "TIMEOUT": 10,
+            "HEALTH_CHECK_INTERVAL": 60,
+        },
     }
 }
 
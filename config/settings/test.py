@@ -17,9 +17,45 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
-    }
+    },
+    # a stand-in replica, only routed to by tests that list it in
+    # DATABASE_REPLICAS; refreshed by ``manage.py sync_sqlite_replica``
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "db.replica.sqlite3",
+    },
 }
 
+# query budgets are hard limits under test
+
+QUERY_BUDGET_ACTION = "raise"
+
 # email
 
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+
+# cache, tests that exercise caching override this with locmem
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.dummy.DummyCache",
+    }
+}
+
+# tests run in one process, replica pins and blog responses can live in
+# "default"
+
+REPLICA_PIN_CACHE_ALIAS = "default"
+
+BLOG_CACHE_ALIAS = "default"
+
+SILENCED_SYSTEM_CHECKS = [*SILENCED_SYSTEM_CHECKS, "blog.E001"]
+
+# the access token cache outlives test transactions, tests that need it enable
+# it; tests run in one process, signed token revocations can live in "default"
+
+OAUTH2_PROVIDER = {
+    **OAUTH2_PROVIDER,
+    "ACCESS_TOKEN_CACHE_TIMEOUT": 0,
+    "SIGNED_ACCESS_TOKEN_CACHE_ALIAS": "default",
+}
@@ -1,7 +1,10 @@
+import re
+from urllib.parse import urlsplit
+
+from core.media import MediaView
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
 
 from .views import HomeView
 
@@ -14,4 +17,12 @@ urlpatterns = [
     path("o/", include("oauth2_provider.urls", namespace="oauth2_provider")),
 ]
 
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# uploads, unless MEDIA_URL points at another host
+if not urlsplit(settings.MEDIA_URL).netloc:
+    urlpatterns += [
+        re_path(
+            r"^%s(?P<path>.*)$" % re.escape(settings.MEDIA_URL.lstrip("/")),
+            MediaView.as_view(),
+            name="media",
+        ),
+    ]